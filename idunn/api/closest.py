@@ -4,11 +4,15 @@ from fastapi import HTTPException
 from pydantic import confloat
 
 from idunn import settings
-from idunn.utils.es_wrapper import get_mimir_elasticsearch
+from idunn.utils.es_wrapper import get_mimir_elasticsearch, get_mimir_elasticsearch_async
 from idunn.utils import prometheus
 from idunn.places import Street, Address, Place
 
-from idunn.datasources.mimirsbrunn import fetch_closest, get_es_place_type
+from idunn.datasources.mimirsbrunn import (
+    fetch_closest,
+    fetch_closest_async,
+    get_es_place_type,
+)
 
 from idunn.utils.verbosity import Verbosity
 
@@ -22,7 +26,17 @@ def get_closest_place(lat: float, lon: float, es=None):
     if es is None:
         es = get_mimir_elasticsearch()
     es_addr = fetch_closest(lat, lon, es=es, max_distance=MAX_DISTANCE_IN_METERS)
+    return closest_place_from_es(es_addr, lat, lon)
 
+
+async def get_closest_place_async(lat: float, lon: float, es=None):
+    if es is None:
+        es = get_mimir_elasticsearch_async()
+    es_addr = await fetch_closest_async(lat, lon, es=es, max_distance=MAX_DISTANCE_IN_METERS)
+    return closest_place_from_es(es_addr, lat, lon)
+
+
+def closest_place_from_es(es_addr, lat: float, lon: float):
     places = {
         "addr": Address,
         "street": Street,
@@ -41,7 +55,7 @@ def get_closest_place(lat: float, lon: float, es=None):
     return loader(es_addr["_source"])
 
 
-def closest_address(
+async def closest_address(
     lat: confloat(ge=-90, le=90),
     lon: confloat(ge=-180, le=180),
     lang=None,
@@ -49,11 +63,9 @@ def closest_address(
 ) -> Place:
     """Find the closest address to a point."""
 
-    es = get_mimir_elasticsearch()
-
     if not lang:
         lang = settings["DEFAULT_LANGUAGE"]
     lang = lang.lower()
 
-    place = get_closest_place(lat, lon, es)
-    return place.load_place(lang, verbosity)
+    place = await get_closest_place_async(lat, lon)
+    return await place.load_place_async(lang, verbosity)
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from dataclasses import dataclass
 from typing import Optional, List, Tuple, Union
 
 from fastapi import Query
@@ -12,9 +13,10 @@ from idunn.api.places_list import get_places_bbox_impl, PlacesQueryParam
 from idunn.datasources.pages_jaunes import pj_source
 from idunn.geocoder.models import QueryParams
 from idunn.geocoder.models.geocodejson import IntentionType
-from idunn.geocoder.nlu_client import nlu_client, NluClientException
+from idunn.geocoder.nlu_client import nlu_client, IntentionTrace, NluClientException
 from idunn.places import Place
-from idunn.utils import maps_urls
+from idunn.utils import maps_urls, prometheus
+from idunn.utils.cache import SizedTimedLRUCache
 from idunn.utils.regions import get_region_lonlat
 from idunn.utils.result_filter import ResultFilter
 from .constants import PoiSource
@@ -29,6 +31,7 @@ result_filter = ResultFilter()
 
 nlu_allowed_languages = settings["NLU_ALLOWED_LANGUAGES"].split(",")
 ia_max_query_length = int(settings["IA_MAX_QUERY_LENGTH"])
+IA_CACHE_NO_ANSWER_TTL = float(settings["IA_CACHE_NO_ANSWER_TTL"])
 AVAILABLE_CLASS_TYPE_TRIPADVISOR = [
     "class_hotel",
     "class_lodging",
@@ -77,6 +80,24 @@ class InstantAnswerResult(BaseModel):
         return tuple(round(x, 6) for x in v)
 
 
+@dataclass
+class InstantAnswerTrace:
+    """
+    Record of the resolution of an instant answer, which must not be cached
+    if it is degraded by the failure of a service.
+    """
+
+    degraded: bool = False
+
+
+# Results of recent queries, or None when there was no instant answer
+ia_cache = SizedTimedLRUCache(
+    maxsize=int(settings["IA_CACHE_SIZE"]),
+    maxbytes=int(settings["IA_CACHE_MAX_BYTES"]),
+    seconds=float(settings["IA_CACHE_TTL"]),
+)
+
+
 class InstantAnswerQuery(BaseModel):
     query: str
     lang: str
@@ -130,10 +151,30 @@ def build_response(result: InstantAnswerResult, query: str, lang: str):
     )
 
 
-async def get_instant_answer_intention(intention, query: str, lang: str):
+def refresh_result(result: InstantAnswerResult) -> InstantAnswerResult:
+    """
+    Compute again the parts of a cached result which depend on current time,
+    such as the opening status of places.
+    """
+    places = [
+        place.copy(
+            update={
+                "blocks": [
+                    block
+                    for block in (block.refresh() for block in place.blocks)
+                    if block is not None
+                ]
+            }
+        )
+        for place in result.places
+    ]
+    return result.copy(update={"places": places})
+
+
+async def get_instant_answer_intention(intention, lang: str) -> Optional[InstantAnswerResult]:
     # if there is not brand or category intention with an associated place
     if not intention.filter.bbox:
-        return no_instant_answer(query=query, lang=lang)
+        return None
 
     category = intention.filter.category
 
@@ -163,12 +204,12 @@ async def get_instant_answer_intention(intention, query: str, lang: str):
 
     places = places_bbox_response.places
     if len(places) == 0:
-        return no_instant_answer(query=query, lang=lang)
+        return None
 
     if len(places) == 1:
-        return build_single_ia_answer(lang, query, places[0], intention.filter.bbox)
+        return build_single_ia_result(places[0], intention.filter.bbox)
 
-    result = InstantAnswerResult(
+    return InstantAnswerResult(
         places=places,
         source=places_bbox_response.source,
         intention_bbox=intention.filter.bbox,
@@ -176,8 +217,6 @@ async def get_instant_answer_intention(intention, query: str, lang: str):
         maps_frame_url=maps_urls.get_places_url(intention.filter, no_ui=True),
     )
 
-    return build_response(result, query=query, lang=lang)
-
 
 def get_single_ia_datasource_priority_france(
     fetch_bragi_tripadvisor, fetch_pj, fetch_bragi_osm
@@ -199,6 +238,54 @@ def get_single_ia_datasource_priority_world(
     ]
 
 
+async def resolve_search_result(datasource, search_task, lang, normalized_query, trace):
+    """Wait for the search of a datasource and resolve its top candidate"""
+    # Don't propagate a cancellation to the search itself, see the note on
+    # httpx in `get_instant_answer`
+    datasource_response = await asyncio.shield(search_task)
+
+    try:
+        return await datasource.filter_search_result(datasource_response, lang, normalized_query)
+    except Exception:
+        logger.warning(
+            "Failed to resolve instant answer from %s", type(datasource).__name__, exc_info=True
+        )
+        trace.degraded = True
+        return None
+
+
+async def get_first_search_result(datasource_priority_list, lang, normalized_query, trace):
+    """
+    Return the result of the first datasource by priority which has one.
+
+    The candidate of each datasource is resolved as soon as its search
+    returns, so that lower-priority results are already available when
+    higher-priority datasources have none. Remaining work is cancelled once
+    the answer is known.
+    """
+    resolve_tasks = [
+        asyncio.create_task(
+            resolve_search_result(datasource, search_task, lang, normalized_query, trace),
+            name=f"ia_resolve_{type(datasource).__name__.lower()}",
+        )
+        for datasource, search_task in datasource_priority_list
+    ]
+
+    try:
+        for task in resolve_tasks:
+            result_place = await task
+            if result_place:
+                return result_place
+        return None
+    finally:
+        for task in resolve_tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Mark a possible failure as retrieved
+                task.exception()
+
+
 async def get_instant_answer(
     q: str = Query(..., title="Query string"),
     lang: str = Query("en", title="Language"),
@@ -224,6 +311,37 @@ async def get_instant_answer(
         )
         return build_response(result, query=q, lang=lang)
 
+    # Results only depend on the normalized query
+    cache_key = (normalized_query, lang, user_country)
+
+    try:
+        result = ia_cache.get(cache_key)
+    except IndexError:
+        prometheus.local_cache_request("instant_answer", hit=False)
+        trace = InstantAnswerTrace()
+        result = await get_instant_answer_result(normalized_query, lang, user_country, trace)
+        if result is None:
+            if not trace.degraded:
+                ia_cache.put(
+                    cache_key, None, size=len(normalized_query), seconds=IA_CACHE_NO_ANSWER_TTL
+                )
+        else:
+            response = build_response(result, query=q, lang=lang)
+            if not trace.degraded:
+                ia_cache.put(cache_key, result, size=len(response.body))
+            return response
+    else:
+        prometheus.local_cache_request("instant_answer", hit=True)
+        if result is not None:
+            return build_response(refresh_result(result), query=q, lang=lang)
+
+    return no_instant_answer(query=q, lang=lang, region=user_country)
+
+
+async def get_instant_answer_result(
+    normalized_query: str, lang: str, user_country: Optional[str], trace: InstantAnswerTrace
+) -> Optional[InstantAnswerResult]:
+    """Search for the instant answer of a normalized query"""
     extra_geocoder_params = {}
 
     if user_country and get_region_lonlat(user_country) is not None:
@@ -232,18 +350,22 @@ async def get_instant_answer(
 
     intention = None
     if lang in nlu_allowed_languages:
+        intention_trace = IntentionTrace()
         try:
             intention = await nlu_client.get_intention(
                 normalized_query,
                 lang,
                 extra_geocoder_params,
                 allow_types=[IntentionType.BRAND, IntentionType.CATEGORY, IntentionType.POI],
+                trace=intention_trace,
             )
             if intention and intention.type in [IntentionType.BRAND, IntentionType.CATEGORY]:
-                return await get_instant_answer_intention(intention, query=q, lang=lang)
+                return await get_instant_answer_intention(intention, lang=lang)
         except NluClientException:
             # No intention could be interpreted from query
             intention = None
+        finally:
+            trace.degraded |= intention_trace.degraded
 
     # Direct geocoding query
     query = QueryParams.build(q=normalized_query, lang=lang, limit=1, **extra_geocoder_params)
@@ -253,8 +375,10 @@ async def get_instant_answer(
     except Exception:
         is_france_query = False
 
-    # Query PJ API and Bragi osm asynchronously as a task which may be cancelled
-    # NOTE: As of httpx >=0.18,<=0.22, cancelling these tasks will fill httpx client's internal
+    # Query PJ API and Bragi osm asynchronously as tasks, which are never cancelled even if their
+    # result is not needed.
+    # NOTE: As of httpx >=0.18 (still with httpx 0.23 and httpcore 0.15), cancelling these tasks
+    #       while they are connecting will fill httpx client's internal
     #       connection pool which will lead on bragi not being available
     #       anymore (or a memory leak if the limit is very high).
     #       See https://github.com/encode/httpx/issues/2139
@@ -276,21 +400,20 @@ async def get_instant_answer(
             fetch_bragi_tripadvisor, fetch_bragi_osm
         )
 
-    for (datasource, task) in datasource_priority_list:
-        datasource_response = await task
-        result_place = datasource.filter_search_result(datasource_response, lang, normalized_query)
-        if result_place:
-            return build_single_ia_answer(lang, q, result_place)
+    result_place = await get_first_search_result(
+        datasource_priority_list, lang, normalized_query, trace
+    )
+    if result_place:
+        return build_single_ia_result(result_place)
 
-    return no_instant_answer(query=q, lang=lang, region=user_country)
+    return None
 
 
-def build_single_ia_answer(lang, q, result_place, intention_bbox=None):
-    result = InstantAnswerResult(
+def build_single_ia_result(result_place, intention_bbox=None) -> InstantAnswerResult:
+    return InstantAnswerResult(
         places=[result_place],
         source=result_place.meta.source,
         intention_bbox=intention_bbox,
         maps_url=maps_urls.get_place_url(result_place.id),
         maps_frame_url=maps_urls.get_place_url(result_place.id, no_ui=True),
     )
-    return build_response(result, query=q, lang=lang)
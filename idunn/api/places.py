@@ -1,29 +1,32 @@
+import asyncio
 import logging
 import urllib.parse
 from enum import Enum
 from starlette.datastructures import URL
 from fastapi import HTTPException, BackgroundTasks, Request, Query
 from fastapi.responses import JSONResponse
-from typing import Optional
-from pydantic import confloat
+from typing import List, Optional
+from pydantic import BaseModel, confloat
 
 
 from idunn import settings
 
-from idunn.utils.es_wrapper import get_mimir_elasticsearch
 from idunn.utils.covid19_dataset import covid19_osm_task
 from idunn.places import Place, Latlon
 from idunn.places.base import BasePlace
 from idunn.places.exceptions import PlaceNotFound
 from idunn.places.exceptions import RedirectToPlaceId, InvalidPlaceId
-from .closest import get_closest_place
+from .closest import get_closest_place_async
 
-from ..utils.place import place_from_id
+from ..utils.place import place_from_id_async, places_from_ids_async
 from ..utils.verbosity import Verbosity
 
 logger = logging.getLogger(__name__)
 
 
+PLACES_BATCH_MAX_SIZE = int(settings["PLACES_BATCH_MAX_SIZE"])
+
+
 class PlaceType(str, Enum):
     ADDRESS = "address"
     ADMIN = "admin"
@@ -31,6 +34,17 @@ class PlaceType(str, Enum):
     STREET = "street"
 
 
+class PlacesBatchError(BaseModel):
+    id: str
+    status: int
+    detail: str
+
+
+class PlacesBatchResponse(BaseModel):
+    places: List[Place]
+    errors: List[PlacesBatchError]
+
+
 def validate_lang(lang):
     if not lang:
         return settings["DEFAULT_LANGUAGE"]
@@ -78,7 +92,7 @@ def log_place_request(place: BasePlace, headers):
     logger.info("Received details about user query", extra={"user_selection": custom_data})
 
 
-def get_place(
+async def get_place(
     id: str,
     request: Request,
     background_tasks: BackgroundTasks,
@@ -91,7 +105,7 @@ def get_place(
     """Main handler that returns the requested place."""
     lang = validate_lang(lang)
     try:
-        place = place_from_id(id, lang, type)
+        place = await place_from_id_async(id, lang, type)
     except InvalidPlaceId as e:
         raise HTTPException(status_code=404, detail=e.message) from e
     except PlaceNotFound as e:
@@ -108,10 +122,10 @@ def get_place(
     log_place_request(place, request.headers)
     if settings["BLOCK_COVID_ENABLED"] and settings["COVID19_USE_REDIS_DATASET"]:
         background_tasks.add_task(covid19_osm_task)
-    return place.load_place(lang, verbosity)
+    return await place.load_place_async(lang, verbosity)
 
 
-def get_place_latlon(
+async def get_place_latlon(
     lat: confloat(ge=-90, le=90),
     lon: confloat(ge=-180, le=180),
     lang: str = None,
@@ -119,11 +133,65 @@ def get_place_latlon(
 ) -> Place:
     """Find the closest place to a point."""
 
-    es = get_mimir_elasticsearch()
     lang = validate_lang(lang)
     try:
-        closest_place = get_closest_place(lat, lon, es)
+        closest_place = await get_closest_place_async(lat, lon)
     except HTTPException:
         closest_place = None
     place = Latlon(lat, lon, closest_address=closest_place)
-    return place.load_place(lang, verbosity)
+    return await place.load_place_async(lang, verbosity)
+
+
+def get_place_error(id, error) -> PlacesBatchError:
+    if isinstance(error, (InvalidPlaceId, PlaceNotFound)):
+        return PlacesBatchError(id=id, status=404, detail=error.message)
+    if isinstance(error, HTTPException):
+        return PlacesBatchError(id=id, status=error.status_code, detail=str(error.detail))
+
+    logger.error("Failed to get place '%s'", id, exc_info=error)
+    return PlacesBatchError(id=id, status=500, detail="Internal error")
+
+
+async def get_places_batch(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    ids: List[str] = Query(..., description="Ids of the requested places."),
+    lang: str = None,
+    verbosity: Verbosity = Verbosity.default(),
+) -> PlacesBatchResponse:
+    """
+    Get several places at once, as they would be returned by `get_place`.
+
+    Places that can't be returned are listed in `errors`, with the HTTP status
+    that the request of this single place would have returned.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > PLACES_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"At most {PLACES_BATCH_MAX_SIZE} ids can be requested"
+        )
+
+    lang = validate_lang(lang)
+    places = await places_from_ids_async(ids, lang, follow_redirect=True)
+
+    async def load_place(place):
+        if isinstance(place, Exception):
+            return place
+        log_place_request(place, request.headers)
+        return await place.load_place_async(lang, verbosity)
+
+    if settings["BLOCK_COVID_ENABLED"] and settings["COVID19_USE_REDIS_DATASET"]:
+        if not all(isinstance(place, Exception) for place in places.values()):
+            background_tasks.add_task(covid19_osm_task)
+
+    loaded_places = await asyncio.gather(
+        *(load_place(place) for place in places.values()), return_exceptions=True
+    )
+
+    response = PlacesBatchResponse(places=[], errors=[])
+    for id, place in zip(places, loaded_places):
+        if isinstance(place, Exception):
+            response.errors.append(get_place_error(id, place))
+        else:
+            response.places.append(place)
+    return response
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List, Optional, Any, Tuple
 
@@ -27,6 +28,7 @@ EXTENDED_BBOX_MAX_SIZE = float(
     settings["LIST_PLACES_EXTENDED_BBOX_MAX_SIZE"]
 )  # max bbox width and height after second extended query
 EXTENDED_BBOX_MAX_SIZE_AIRPORT = 1
+EXTENDED_BBOX_CONCURRENT = settings["LIST_PLACES_EXTENDED_BBOX_CONCURRENT"]
 TRIPADVISOR_CATEGORIES_COVERED_WORLDWIDE = ["hotel", "leisure", "attraction", "restaurant"]
 TRIPADVISOR_CATEGORIES_COVERED_IN_FRANCE = ["hotel", "leisure", "attraction"]
 
@@ -166,10 +168,15 @@ async def get_places_bbox_impl(
     if params.source is None:
         select_datasource(params)
 
-    places_list = await _fetch_places_list(params)
-    bbox_extended = False
-    if (params.extend_bbox or params.category == "airport") and len(places_list) == 0:
-        bbox_extended, places_list = await _fetch_extended_bbox(bbox_extended, params, places_list)
+    extended_bbox = None
+    if params.extend_bbox or params.category == "airport":
+        extended_bbox = _get_extended_bbox(params)
+
+    if extended_bbox is None:
+        places_list = await _fetch_places_list(params)
+        bbox_extended = False
+    else:
+        bbox_extended, places_list = await _fetch_places_list_or_extended(params, extended_bbox)
 
     if len(places_list) == 0:
         results_bbox = None
@@ -219,43 +226,65 @@ def is_brand_detected_or_pj_category_cover(params):
     return params.q or (params.category and all(c.pj_what() for c in params.category))
 
 
-async def _fetch_extended_bbox(bbox_extended, params, places_list):
+def _get_extended_bbox(params) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Bbox to search in if no result is found in the original bbox, or None if
+    the original bbox is already large enough.
+    """
     original_bbox = params.bbox
     original_bbox_width = original_bbox[2] - original_bbox[0]
     original_bbox_height = original_bbox[3] - original_bbox[1]
     original_bbox_size = max(original_bbox_height, original_bbox_width)
+
     if len(params.category) > 0 and params.category[0] == Category.airport:
-        bbox_extended, places_list = await _fetch_and_extend_bbox(
-            EXTENDED_BBOX_MAX_SIZE_AIRPORT,
-            bbox_extended,
-            original_bbox,
-            original_bbox_size,
-            params,
-            places_list,
-        )
+        max_bbox_size = EXTENDED_BBOX_MAX_SIZE_AIRPORT
     else:
-        bbox_extended, places_list = await _fetch_and_extend_bbox(
-            EXTENDED_BBOX_MAX_SIZE,
-            bbox_extended,
-            original_bbox,
-            original_bbox_size,
-            params,
-            places_list,
+        max_bbox_size = EXTENDED_BBOX_MAX_SIZE
+
+    if original_bbox_size >= max_bbox_size:
+        return None
+
+    scale_factor = max_bbox_size / original_bbox_size
+    return scale(box(*original_bbox), xfact=scale_factor, yfact=scale_factor).bounds
+
+
+async def _fetch_places_list_or_extended(params: PlacesQueryParam, extended_bbox):
+    """
+    Fetch places in the original bbox, or in the extended bbox if there is
+    none. Unless disabled by settings, both queries are sent at once and the
+    query in the extended bbox is cancelled if it is not needed. Queries of
+    map tiles which have been sent are not cancelled and fill the cache.
+    """
+    extended_params = params.copy(update={"bbox": extended_bbox})
+    extended_task = None
+
+    if EXTENDED_BBOX_CONCURRENT:
+        extended_task = asyncio.create_task(
+            _fetch_places_list(extended_params), name="fetch_extended_bbox"
         )
-    return bbox_extended, places_list
-
-
-async def _fetch_and_extend_bbox(
-    max_bbox_size, bbox_extended, original_bbox, original_bbox_size, params, places_list
-):
-    # Compute extended bbox and fetch results a second time
-    if original_bbox_size < max_bbox_size:
-        scale_factor = max_bbox_size / original_bbox_size
-        new_box = scale(box(*original_bbox), xfact=scale_factor, yfact=scale_factor)
-        params.bbox = new_box.bounds
-        bbox_extended = True
+
+    def discard_extended_task():
+        if extended_task is None:
+            return
+        if extended_task.done():
+            # Mark a possible failure as retrieved
+            extended_task.exception()
+        extended_task.cancel()
+
+    try:
         places_list = await _fetch_places_list(params)
-    return bbox_extended, places_list
+    except BaseException:
+        discard_extended_task()
+        raise
+
+    if len(places_list) > 0:
+        discard_extended_task()
+        return False, places_list
+
+    params.bbox = extended_bbox
+    if extended_task is None:
+        return True, await _fetch_places_list(extended_params)
+    return True, await extended_task
 
 
 async def _fetch_places_list(params: PlacesQueryParam):
@@ -1,7 +1,7 @@
 from fastapi import Depends
 
 from .hotel_pricing import get_hotel_pricing
-from .places import get_place, get_place_latlon
+from .places import get_place, get_place_latlon, get_places_batch, PlacesBatchResponse
 from .status import get_status
 from .places_list import get_places_bbox, PlacesBboxResponse
 from .categories import AllCategoriesResponse, get_all_categories
@@ -47,6 +47,14 @@ def get_api_urls(settings):
         expire=int(settings["GET_PLACE_RL_EXPIRE"]),
     )
 
+    # Each place requested at once counts as a request to the place endpoint
+    rate_limiter_places_batch = rate_limiter_dependency(
+        resource="idunn.get_places_bbox",
+        max_requests=int(settings["GET_PLACE_RL_MAX_REQUESTS"]),
+        expire=int(settings["GET_PLACE_RL_EXPIRE"]),
+        request_cost=lambda request: max(1, len(set(request.query_params.getlist("ids")))),
+    )
+
     rate_limiter_places_list = rate_limiter_dependency(
         resource="idunn.get_places_bbox",
         max_requests=int(settings["LIST_PLACES_RL_MAX_REQUESTS"]),
@@ -76,6 +84,13 @@ def get_api_urls(settings):
             dependencies=[rate_limiter_get_place],
             response_model=Place,
         ),
+        api_route(
+            "/places/batch",
+            get_places_batch,
+            dependencies=[rate_limiter_places_batch],
+            response_model=PlacesBatchResponse,
+            responses={400: {"description": "Too many ids requested"}},
+        ),
         api_route(
             "/places/{id}",
             get_place,
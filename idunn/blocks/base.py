@@ -1,10 +1,16 @@
 from pydantic import BaseModel
-from typing import Any
+from starlette.concurrency import run_in_threadpool
+from typing import Any, ClassVar, List
 
 
 class BaseBlock(BaseModel):
     type: Any
 
+    # Set for blocks which perform network I/O in `from_es`: they are built
+    # concurrently, within a latency budget, when a place is loaded
+    # asynchronously (see `idunn.utils.verbosity.build_blocks_async`).
+    HAS_IO: ClassVar[bool] = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -15,6 +21,29 @@ class BaseBlock(BaseModel):
     def from_es(cls, place, lang):
         raise NotImplementedError
 
+    @classmethod
+    def get_cache_keys(cls, place, lang) -> List[str]:  # pylint: disable = unused-argument
+        """
+        Keys of the Redis cache that `from_es` is expected to read. They are
+        fetched at once before the blocks are built asynchronously.
+        """
+        return []
+
+    @classmethod
+    async def from_es_async(cls, place, lang):
+        """
+        Build the block without blocking the event loop.
+        """
+        return await run_in_threadpool(cls.from_es, place, lang)
+
+    def refresh(self):
+        """
+        Compute again the fields of the block which depend on current time,
+        for blocks kept in memory. Returns the updated block or None if it
+        should not be displayed anymore.
+        """
+        return self
+
     @classmethod
     def is_enabled(cls):
         return True
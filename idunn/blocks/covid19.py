@@ -1,9 +1,9 @@
 import logging
 from enum import Enum
-from typing import Optional, Literal
+from typing import ClassVar, Optional, Literal
 
 from idunn import settings
-from idunn.utils.covid19_dataset import get_poi_covid_status
+from idunn.utils.covid19_dataset import get_poi_covid_status, get_poi_covid_status_key
 from .base import BaseBlock
 from .opening_hour import OpeningHourBlock
 
@@ -27,6 +27,13 @@ class Covid19Block(BaseBlock):
     note: Optional[str]
     contribute_url: Optional[str]
 
+    HAS_IO: ClassVar[bool] = True
+
+    def refresh(self):
+        if self.opening_hours is None:
+            return self
+        return self.copy(update={"opening_hours": self.opening_hours.refresh()})
+
     @classmethod
     def get_ca_reste_ouvert_url(cls, place):
         try:
@@ -39,6 +46,17 @@ class Covid19Block(BaseBlock):
         lon = place.get_coord()["lon"]
         return f"https://www.caresteouvert.fr/@{lat:.6f},{lon:.6f},17/place/{cro_id}"
 
+    @classmethod
+    def get_cache_keys(cls, place, lang):
+        if (
+            place.PLACE_TYPE != "poi"
+            or settings["BLOCK_COVID_ENABLED"] is not True
+            or not settings["COVID19_USE_REDIS_DATASET"]
+            or place.get_meta().source != "osm"
+        ):
+            return []
+        return [get_poi_covid_status_key(place.get_id())]
+
     @classmethod
     def from_es(cls, place, lang):
         if place.PLACE_TYPE != "poi":
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Literal, Optional
+from typing import ClassVar, Literal, Optional
 
 import idunn
 from idunn import settings
@@ -29,6 +29,41 @@ class DescriptionBlock(BaseBlock):
     source: DescriptionSources
     url: Optional[str]
 
+    HAS_IO: ClassVar[bool] = True
+
+    @staticmethod
+    def get_wikipedia_title(place):
+        """
+        Returns the language and the title of the Wikipedia page of a place,
+        from its "wikipedia" tag.
+        """
+        wikipedia_value = place.properties.get("wikipedia")
+
+        if not wikipedia_value:
+            return None
+
+        wiki_split = wikipedia_value.split(":", maxsplit=1)
+
+        if len(wiki_split) != 2:
+            return None
+
+        wiki_lang, wiki_title = wiki_split
+        return wiki_lang.lower(), wiki_title
+
+    @classmethod
+    def get_cache_keys(cls, place, lang):
+        if wiki_info_key := place.get_wiki_info_cache_key(lang):
+            return [wiki_info_key]
+
+        if not (wikipedia_title := cls.get_wikipedia_title(place)):
+            return []
+
+        wiki_lang, wiki_title = wikipedia_title
+
+        if wiki_lang != lang:
+            return [wikipedia_session.get_title_in_language_cache_key(wiki_title, wiki_lang, lang)]
+        return [wikipedia_session.get_summary_cache_key(wiki_title, lang)]
+
     @classmethod
     def from_wikipedia(cls, place, lang):
         """
@@ -36,7 +71,7 @@ class DescriptionBlock(BaseBlock):
         database or directly from Wikipedia's if it is not available.
         """
         # Try to fetch from ES.
-        if place.wikidata_id is not None and wiki_es.enabled() and wiki_es.is_lang_available(lang):
+        if place.has_wiki_info(lang):
             wiki_poi_info = wiki_es.get_info(place.wikidata_id, lang)
 
             if wiki_poi_info is None:
@@ -49,19 +84,10 @@ class DescriptionBlock(BaseBlock):
             )
 
         # Overwise, fetch summary from Wikipedia API
-        wikipedia_value = place.properties.get("wikipedia")
-        wiki_title = None
-
-        if not wikipedia_value:
+        if not (wikipedia_title := cls.get_wikipedia_title(place)):
             return None
 
-        wiki_split = wikipedia_value.split(":", maxsplit=1)
-
-        if len(wiki_split) != 2:
-            return None
-
-        wiki_lang, wiki_title = wiki_split
-        wiki_lang = wiki_lang.lower()
+        wiki_lang, wiki_title = wikipedia_title
 
         if wiki_lang != lang:
             wiki_title = wikipedia_session.get_title_in_language(wiki_title, wiki_lang, lang)
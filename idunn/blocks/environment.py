@@ -23,14 +23,26 @@ class Weather(BaseBlock):
     icon: Optional[constr(regex="11d|09d|10d|13d|50d|01d|01n|02d|03d|04d|02n|03n|04n")]
     _connection: ClassVar = None
 
-    @classmethod
-    def from_es(cls, place, lang):
+    HAS_IO: ClassVar[bool] = True
+
+    @staticmethod
+    def get_place_coord(place):
         if place.PLACE_TYPE != "admin":
             return None
         if place.get("zone_type") not in ("city", "city_district", "suburd"):
             return None
+        return place.get_coord()
+
+    @classmethod
+    def get_cache_keys(cls, place, lang):
+        coord = cls.get_place_coord(place)
+        if not coord or not weather_client.enabled:
+            return []
+        return [get_local_weather_cache_key(coord)]
 
-        coord = place.get_coord()
+    @classmethod
+    def from_es(cls, place, lang):
+        coord = cls.get_place_coord(place)
         if not coord:
             return None
 
@@ -46,11 +58,15 @@ class Weather(BaseBlock):
         return cls(**weather)
 
 
+def get_local_weather_cache_key(coord):
+    return f"weather_{coord['lat']}_{coord['lon']}"
+
+
 def get_local_weather(coord):
     def inner(coord):
         return weather_client.fetch_weather_places(coord)
 
     if not weather_client.enabled:
         return None
-    key = f"weather_{coord['lat']}_{coord['lon']}"
+    key = get_local_weather_cache_key(coord)
     return RedisWrapperWeather.cache_it(key, inner)(coord)
@@ -2,7 +2,7 @@ import re
 import logging
 from urllib.parse import quote
 from pydantic import BaseModel, validator
-from typing import List, Literal
+from typing import ClassVar, List, Literal
 
 from idunn import settings
 from idunn.api.constants import PoiSource
@@ -34,6 +34,8 @@ class ImagesBlock(BaseBlock):
     type: Literal["images"] = "images"
     images: List[Image]
 
+    HAS_IO: ClassVar[bool] = True
+
     @classmethod
     def is_enabled(cls):
         return settings["BLOCK_IMAGES_ENABLED"]
@@ -76,6 +78,12 @@ class ImagesBlock(BaseBlock):
             cls.build_image(raw_url, alt=place_name, source_url=source_url) for raw_url in raw_urls
         ]
 
+    @classmethod
+    def get_cache_keys(cls, place, lang):
+        if wiki_info_key := place.get_wiki_info_cache_key(lang):
+            return [wiki_info_key]
+        return []
+
     @classmethod
     def get_wikipedia_thumbnail(cls, place, lang):
         wiki_resp = place.get_wiki_resp(lang)
@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime, timedelta, date
 from pytz import utc
-from pydantic import BaseModel, conint, constr
+from pydantic import BaseModel, PrivateAttr, conint, constr
 from typing import List, Literal, Optional
 
 from .base import BaseBlock
@@ -53,9 +53,8 @@ def get_days(oh, dt):
     last_monday = dt.date() - timedelta(days=dt.weekday())
     days = []
 
-    for x in range(0, 7):
+    for x, intervals in enumerate(oh.get_week_intervals(last_monday)):
         day = last_monday + timedelta(days=x)
-        intervals = oh.get_open_intervals_at_date(day, overlap_next_day=True)
         days.append(
             {
                 "dayofweek": day.isoweekday(),
@@ -80,10 +79,13 @@ class OpeningHourBlock(BaseBlock):
     raw: str
     days: List[DaysType]
 
+    # Parsed expression, kept to compute the status again (see `refresh`)
+    _oh: Optional[OpeningHours] = PrivateAttr(None)
+
     @classmethod
     def init_class(cls, status, next_transition_datetime, time_before_next, oh, curr_dt, raw):
         is_24_7 = status == OPEN and next_transition_datetime is None
-        return cls(
+        block = cls(
             status=status,
             next_transition_datetime=next_transition_datetime if not is_24_7 else None,
             seconds_before_next_transition=time_before_next if not is_24_7 else None,
@@ -91,6 +93,8 @@ class OpeningHourBlock(BaseBlock):
             raw=raw,
             days=get_days(oh, curr_dt),
         )
+        block._oh = oh
+        return block
 
     @staticmethod
     def get_raw_oh(place):
@@ -103,7 +107,6 @@ class OpeningHourBlock(BaseBlock):
         poi_tz = place.get_tz()
 
         oh = OpeningHours(raw_oh, poi_tz, poi_country_code)
-        curr_dt = utc.localize(datetime.utcnow())
 
         if not oh.validate():
             logger.info(
@@ -114,6 +117,11 @@ class OpeningHourBlock(BaseBlock):
             )
             return None
 
+        return cls.from_oh(oh, raw_oh)
+
+    @classmethod
+    def from_oh(cls, oh, raw_oh):
+        curr_dt = utc.localize(datetime.utcnow())
         next_transition = oh.next_change(curr_dt)
 
         if oh.is_open(curr_dt):
@@ -135,6 +143,11 @@ class OpeningHourBlock(BaseBlock):
             status, next_transition.isoformat(), time_before_next, oh, curr_dt, raw_oh
         )
 
+    def refresh(self):
+        if self._oh is None:
+            return self
+        return self.from_oh(self._oh, self.raw)
+
     @classmethod
     def from_es(cls, place, lang):
         raw_oh = cls.get_raw_oh(place)
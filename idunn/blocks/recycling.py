@@ -1,6 +1,6 @@
 import logging
 from datetime import datetime
-from typing import List, Literal
+from typing import ClassVar, List, Literal
 from enum import Enum
 from pydantic import BaseModel, validator, ValidationError
 from pytz import UTC
@@ -50,14 +50,30 @@ class RecyclingBlock(BaseBlock):
     type: Literal["recycling"] = "recycling"
     containers: List[RecyclingContainer]
 
+    HAS_IO: ClassVar[bool] = True
+
+    @staticmethod
+    def is_available(place):
+        return (
+            recycling_client.enabled  # Data source is configured
+            and place.PLACE_TYPE == "poi"
+            and place.get_class_name() == "recycling"
+            and is_poi_in_finistere(place)
+        )
+
+    @classmethod
+    def get_cache_keys(cls, place, lang):
+        if not recycling_client.use_cache or not cls.is_available(place):
+            return []
+
+        coord = place.get_coord()
+        if not coord or coord.get("lat") is None or coord.get("lon") is None:
+            return []
+        return [recycling_client.get_latest_measures_cache_key(coord["lat"], coord["lon"])]
+
     @classmethod
     def from_es(cls, place, lang):
-        if (
-            not recycling_client.enabled  # Data source is not configured
-            or place.PLACE_TYPE != "poi"
-            or place.get_class_name() != "recycling"
-            or not is_poi_in_finistere(place)
-        ):
+        if not cls.is_available(place):
             return None
 
         try:
@@ -13,5 +13,5 @@ class Datasource(ABC):
         """Get places within a given Bbox"""
 
     @abstractmethod
-    def filter_search_result(self, results, lang, normalized_query):
+    async def filter_search_result(self, results, lang, normalized_query):
         """Filter results from the `fetch_search` query"""
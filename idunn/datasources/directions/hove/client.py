@@ -7,6 +7,7 @@ from typing import Optional
 from idunn import settings
 from idunn.geocoder.models.params import QueryParams
 from idunn.places.base import BasePlace
+from idunn.utils.transport import CoalescingTransport
 from .models import HoveResponse
 from ..abs_client import AbsDirectionsClient
 from ..mapbox.models import IdunnTransportMode
@@ -23,7 +24,12 @@ logger = logging.getLogger(__name__)
 class HoveClient(AbsDirectionsClient):
     def __init__(self):
         self.api_url = settings["HOVE_API_BASE_URL"]
-        self.session = httpx.AsyncClient(verify=settings["VERIFY_HTTPS"])
+        self.session = httpx.AsyncClient(
+            verify=settings["VERIFY_HTTPS"],
+            transport=CoalescingTransport(
+                httpx.AsyncHTTPTransport(verify=settings["VERIFY_HTTPS"]), name="hove"
+            ),
+        )
         self.session.headers["User-Agent"] = settings["USER_AGENT"]
 
     @staticmethod
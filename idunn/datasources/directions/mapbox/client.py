@@ -9,6 +9,7 @@ from typing import Optional, Tuple
 from idunn import settings
 from idunn.geocoder.models.params import QueryParams
 from idunn.places.base import BasePlace
+from idunn.utils.transport import CoalescingTransport
 from ..abs_client import AbsDirectionsClient
 from ..mapbox.models import DirectionsResponse, IdunnTransportMode
 
@@ -25,7 +26,12 @@ class MapboxAPIExtraParams(BaseModel):
 
 class MapboxClient(AbsDirectionsClient):
     def __init__(self):
-        self.session = httpx.AsyncClient(verify=settings["VERIFY_HTTPS"])
+        self.session = httpx.AsyncClient(
+            verify=settings["VERIFY_HTTPS"],
+            transport=CoalescingTransport(
+                httpx.AsyncHTTPTransport(verify=settings["VERIFY_HTTPS"]), name="mapbox"
+            ),
+        )
         self.session.headers["User-Agent"] = settings["USER_AGENT"]
         self.request_timeout = float(settings["DIRECTIONS_TIMEOUT"])
 
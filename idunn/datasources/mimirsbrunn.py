@@ -1,9 +1,16 @@
+import asyncio
 import logging
+from typing import List, NamedTuple, Optional
+
+import orjson
 from fastapi import HTTPException
 from elasticsearch import ElasticsearchException
 from idunn import settings
-from idunn.utils.es_wrapper import get_mimir_elasticsearch
+from idunn.utils import prometheus
+from idunn.utils.cache import SizedTimedLRUCache
+from idunn.utils.es_wrapper import get_mimir_elasticsearch, get_mimir_elasticsearch_async
 from idunn.utils.index_names import INDICES
+from idunn.utils.tiles import tile_bbox, tiles_covering
 from idunn.places.exceptions import PlaceNotFound
 
 logger = logging.getLogger(__name__)
@@ -13,6 +20,20 @@ PLACE_POI_INDEX = settings["PLACE_POI_INDEX"]
 PLACE_ADDRESS_INDEX = settings["PLACE_ADDRESS_INDEX"]
 PLACE_STREET_INDEX = settings["PLACE_STREET_INDEX"]
 
+LIST_PLACES_TILE_MAX_POIS = int(settings["LIST_PLACES_TILE_MAX_POIS"])
+LIST_PLACES_TILE_MAX_COUNT = int(settings["LIST_PLACES_TILE_MAX_COUNT"])
+
+# Type of the places identified by each id namespace, which allows to fetch
+# them from their index by id rather than through a search.
+NAMESPACE_PLACE_TYPES = {
+    "admin": "admin",
+    "addr": "address",
+    "street": "street",
+    "osm": "poi",
+    "poi": "poi",
+    "ta": "poi_tripadvisor",
+}
+
 
 class MimirPoiFilter:
     def __init__(self, poi_class=None, poi_subclass=None, extra=None):
@@ -40,8 +61,7 @@ class MimirPoiFilter:
         return cls(poi_class, poi_subclass)
 
 
-def fetch_es_pois(index_name: str, filters: [MimirPoiFilter], bbox, max_size) -> list:
-    es = get_mimir_elasticsearch()
+def build_pois_query(filters: [MimirPoiFilter], bbox, max_size) -> dict:
     left, bot, right, top = bbox[0], bbox[1], bbox[2], bbox[3]
 
     should_terms = []
@@ -54,10 +74,8 @@ def fetch_es_pois(index_name: str, filters: [MimirPoiFilter], bbox, max_size) ->
                 {"bool": {"must": [{"term": {"poi_type.name": term}} for term in terms]}}
             )
 
-    # pylint: disable = unexpected-keyword-arg
-    bbox_places = es.search(
-        index=INDICES[index_name],
-        query={
+    return {
+        "query": {
             "bool": {
                 "should": should_terms,
                 "minimum_should_match": 1,
@@ -71,14 +89,233 @@ def fetch_es_pois(index_name: str, filters: [MimirPoiFilter], bbox, max_size) ->
                 },
             }
         },
-        sort={"weight": "desc"},
-        size=max_size,
-        timeout="3s",
+        "sort": {"weight": "desc"},
+        "size": max_size,
+        "timeout": "3s",
+    }
+
+
+def fetch_es_pois(index_name: str, filters: [MimirPoiFilter], bbox, max_size) -> list:
+    es = get_mimir_elasticsearch()
+    # pylint: disable = unexpected-keyword-arg
+    bbox_places = es.search(
+        index=INDICES[index_name],
+        body=build_pois_query(filters, bbox, max_size),
         ignore_unavailable=True,
     )
+    return bbox_places.get("hits", {}).get("hits", [])
+
+
+async def search_es_pois_async(index_name: str, filters: [MimirPoiFilter], bbox, max_size) -> dict:
+    es = get_mimir_elasticsearch_async()
+    return await es.search(
+        index=INDICES[index_name],
+        body=build_pois_query(filters, bbox, max_size),
+        params={"ignore_unavailable": "true"},
+    )
+
+
+async def fetch_es_pois_async(index_name: str, filters: [MimirPoiFilter], bbox, max_size) -> list:
+    bbox_places = await search_es_pois_async(index_name, filters, bbox, max_size)
+    return bbox_places.get("hits", {}).get("hits", [])
+
+
+def is_partial_response(es_response) -> bool:
+    """
+    Check if some hits may be missing from a search response, because it
+    timed out or some shards failed.
+
+    >>> is_partial_response({"timed_out": False, "_shards": {"total": 1, "failed": 0}})
+    False
+    >>> is_partial_response({"timed_out": True, "_shards": {"total": 1, "failed": 0}})
+    True
+    >>> is_partial_response({"timed_out": False, "_shards": {"total": 2, "failed": 1}})
+    True
+    """
+    return bool(es_response.get("timed_out")) or es_response.get("_shards", {}).get("failed", 0) > 0
+
+
+class TilePoi(NamedTuple):
+    id: str
+    weight: float
+    lon: float
+    lat: float
+    hit: bytes  # raw ES hit, decoded for each request as callers may edit it
+
+
+class PoisTile(NamedTuple):
+    pois: List[TilePoi]
+    # True if the tile contains more POIs than the ones which were fetched
+    truncated: bool
+
+
+_pois_tiles_cache = SizedTimedLRUCache(
+    maxsize=int(settings["LIST_PLACES_TILE_CACHE_SIZE"]),
+    maxbytes=int(settings["LIST_PLACES_TILE_CACHE_MAX_BYTES"]),
+    seconds=float(settings["LIST_PLACES_TILE_CACHE_TTL"]),
+)
+
+
+def clear_pois_tiles_cache():
+    _pois_tiles_cache.clear()
+
+
+def hit_weight(hit) -> float:
+    # POIs without weight are sorted last by Elasticsearch
+    weight = hit["_source"].get("weight")
+    return float("-inf") if weight is None else float(weight)
+
+
+async def fetch_es_pois_tile(index_name: str, filters: [MimirPoiFilter], zoom, x, y) -> PoisTile:
+    """
+    Fetch the POIs with highest weight in a tile, or read them from cache.
+
+    A query which has been sent is not cancelled with the caller: its result
+    is still cached for the next requests.
+    """
+    filters_key = tuple(sorted(tuple(f.get_terms_filters()) for f in filters))
+    key = (index_name, filters_key, zoom, x, y)
+
+    try:
+        tile = _pois_tiles_cache.get(key)
+    except IndexError:
+        prometheus.local_cache_request("places_tiles", hit=False)
+    else:
+        prometheus.local_cache_request("places_tiles", hit=True)
+        return tile
+
+    task = asyncio.ensure_future(fetch_and_cache_es_pois_tile(key, index_name, filters, zoom, x, y))
+
+    def on_done(_):
+        if not task.cancelled():
+            # Mark the exception as retrieved if the caller gave up
+            task.exception()
+
+    task.add_done_callback(on_done)
+    return await asyncio.shield(task)
+
+
+async def fetch_and_cache_es_pois_tile(key, index_name, filters, zoom, x, y) -> PoisTile:
+    """
+    Fetch the POIs of a tile from Elasticsearch and cache them. Partial
+    responses from Elasticsearch are not cached.
+    """
+    es_response = await search_es_pois_async(
+        index_name, filters, tile_bbox(zoom, x, y), LIST_PLACES_TILE_MAX_POIS
+    )
+    hits = es_response.get("hits", {}).get("hits", [])
+    pois = [
+        TilePoi(
+            id=hit["_id"],
+            weight=hit_weight(hit),
+            lon=hit["_source"]["coord"]["lon"],
+            lat=hit["_source"]["coord"]["lat"],
+            hit=orjson.dumps(hit),
+        )
+        for hit in hits
+    ]
+    tile = PoisTile(pois=pois, truncated=len(hits) >= LIST_PLACES_TILE_MAX_POIS)
+
+    if is_partial_response(es_response):
+        logger.warning("Partial response from Elasticsearch for tile %s", (zoom, x, y))
+        prometheus.exception("PartialPoisTile")
+    else:
+        _pois_tiles_cache.put(key, tile, size=sum(len(poi.hit) for poi in pois))
+
+    return tile
+
+
+async def fetch_es_pois_by_tiles_async(
+    index_name: str, filters: [MimirPoiFilter], bbox, max_size
+) -> list:
+    """
+    Same as `fetch_es_pois_async`, using the POIs of cached map tiles covering
+    the bbox. Overlapping bboxes from different requests then share tiles.
+
+    Results are the same as a direct query, except for the order of POIs of
+    equal weight. When tiles are too dense to know the top POIs of the bbox
+    for sure, the query falls back to Elasticsearch.
+    """
+    if max_size > LIST_PLACES_TILE_MAX_POIS:
+        return await fetch_es_pois_async(index_name, filters, bbox, max_size)
+
+    zoom, tiles = tiles_covering(bbox, LIST_PLACES_TILE_MAX_COUNT)
+    tiles = await asyncio.gather(
+        *(fetch_es_pois_tile(index_name, filters, zoom, x, y) for x, y in tiles)
+    )
+
+    # Truncated tiles miss POIs with a lower weight than their last one, so
+    # only POIs above these weights are known to be ranked correctly.
+    truncated_weights = [tile.pois[-1].weight for tile in tiles if tile.truncated]
+    min_weight = max(truncated_weights, default=None)
+
+    left, bot, right, top = bbox
+    candidates = {}
+    for tile in tiles:
+        for poi in tile.pois:
+            if (
+                left <= poi.lon <= right
+                and bot <= poi.lat <= top
+                and (min_weight is None or poi.weight > min_weight)
+            ):
+                candidates.setdefault(poi.id, poi)
+
+    if min_weight is not None and len(candidates) < max_size:
+        logger.debug("Tiles are too dense for bbox %s, querying Elasticsearch", bbox)
+        return await fetch_es_pois_async(index_name, filters, bbox, max_size)
+
+    selected = sorted(candidates.values(), key=lambda poi: poi.weight, reverse=True)[:max_size]
+    return [orjson.loads(poi.hit) for poi in selected]
+
+
+def get_place_index(type) -> str:
+    if type is None:
+        return PLACE_DEFAULT_INDEX
+    if type not in INDICES:
+        raise HTTPException(status_code=400, detail=f"Wrong type parameter: type={type}")
+    return INDICES[type]
+
+
+def get_place_index_from_id(id, type) -> Optional[str]:
+    """
+    Returns the index (or comma separated list of indices) which should
+    contain the place, if it can be guessed from its type or its id.
+    """
+    if type is not None:
+        return get_place_index(type)
 
-    bbox_places = bbox_places.get("hits", {}).get("hits", [])
-    return bbox_places
+    namespace = id.split(":", 1)[0]
+    place_type = NAMESPACE_PLACE_TYPES.get(namespace)
+
+    if place_type is None:
+        return None
+    return INDICES[place_type]
+
+
+def build_place_mget_query(id, index_name) -> dict:
+    return {"docs": [{"_index": index, "_id": id} for index in index_name.split(",")]}
+
+
+def get_found_place(es_docs) -> Optional[dict]:
+    return next((doc for doc in es_docs.get("docs", []) if doc.get("found")), None)
+
+
+def build_place_query(id) -> dict:
+    return {"query": {"bool": {"filter": {"term": {"_id": id}}}}}
+
+
+def get_unique_place(es_places, id, type) -> dict:
+    es_place = es_places.get("hits", {}).get("hits", [])
+    if len(es_place) == 0:
+        if type is None:
+            message = f"place '{id}' not found"
+        else:
+            message = f"place '{id}' not found with type={type}"
+        raise PlaceNotFound(message=message)
+    if len(es_place) > 1:
+        logger.warning("Got multiple places with id %s", id)
+
+    return es_place[0]
 
 
 def fetch_es_place(id, es, type) -> dict:
@@ -86,38 +323,100 @@ def fetch_es_place(id, es, type) -> dict:
 
     This function gets from Elasticsearch the
     entry corresponding to the given id.
+
+    When the index of the place is known, it is fetched with a realtime GET
+    and the search over all indices is only used as a fallback.
     """
-    if type is None:
-        index_name = PLACE_DEFAULT_INDEX
-    elif type not in INDICES:
-        raise HTTPException(status_code=400, detail=f"Wrong type parameter: type={type}")
-    else:
-        index_name = INDICES.get(type)
+    index_name = get_place_index(type)
+    id_index_name = get_place_index_from_id(id, type)
 
-    extra_search_params = {"_source_excludes": "boundary"}
+    if id_index_name is not None:
+        try:
+            es_place = get_found_place(
+                es.mget(body=build_place_mget_query(id, id_index_name), _source_excludes="boundary")
+            )
+        except ElasticsearchException as error:
+            logger.warning("failed to get place '%s' by id: %s", id, error)
+        else:
+            if es_place is not None:
+                return es_place
 
     try:
         es_places = es.search(
             index=index_name,
-            query={"bool": {"filter": {"term": {"_id": id}}}},
+            body=build_place_query(id),
             ignore_unavailable=True,
-            **extra_search_params,
+            _source_excludes="boundary",
         )
     except ElasticsearchException as error:
         logger.warning("error with database: %s", error)
         raise HTTPException(detail="database issue", status_code=503) from error
 
-    es_place = es_places.get("hits", {}).get("hits", [])
-    if len(es_place) == 0:
-        if type is None:
-            message = f"place '{id}' not found"
+    return get_unique_place(es_places, id, type)
+
+
+async def fetch_es_place_async(id, es, type) -> dict:
+    """Returns the raw Place data
+
+    Same as `fetch_es_place`, using the async client.
+    """
+    index_name = get_place_index(type)
+    id_index_name = get_place_index_from_id(id, type)
+
+    if id_index_name is not None:
+        try:
+            es_place = get_found_place(
+                await es.mget(
+                    body=build_place_mget_query(id, id_index_name),
+                    params={"_source_excludes": "boundary"},
+                )
+            )
+        except ElasticsearchException as error:
+            logger.warning("failed to get place '%s' by id: %s", id, error)
         else:
-            message = f"place '{id}' not found with type={type}"
-        raise PlaceNotFound(message=message)
-    if len(es_place) > 1:
-        logger.warning("Got multiple places with id %s", id)
+            if es_place is not None:
+                return es_place
+
+    try:
+        es_places = await es.search(
+            index=index_name,
+            body=build_place_query(id),
+            params={"ignore_unavailable": "true", "_source_excludes": "boundary"},
+        )
+    except ElasticsearchException as error:
+        logger.warning("error with database: %s", error)
+        raise HTTPException(detail="database issue", status_code=503) from error
+
+    return get_unique_place(es_places, id, type)
 
-    return es_place[0]
+
+async def fetch_es_places_async(ids, es) -> dict:
+    """Returns the raw data of several places, by id
+
+    All the places with an id from which their index can be guessed are
+    fetched with a single `mget`. Places that couldn't be found this way are
+    missing from the result.
+    """
+    docs = []
+    for id in ids:
+        index_name = get_place_index_from_id(id, None)
+        if index_name is not None:
+            docs += build_place_mget_query(id, index_name)["docs"]
+
+    if not docs:
+        return {}
+
+    try:
+        es_docs = await es.mget(body={"docs": docs}, params={"_source_excludes": "boundary"})
+    except ElasticsearchException as error:
+        logger.warning("failed to get places by id: %s", error)
+        return {}
+
+    es_places = {}
+    for doc in es_docs.get("docs", []):
+        if doc.get("found"):
+            es_places.setdefault(doc["_id"], doc)
+    return es_places
 
 
 def get_es_place_type(es_place) -> str:
@@ -128,12 +427,11 @@ def get_es_place_type(es_place) -> str:
     return es_place.get("_index").split("_")[1]
 
 
-def fetch_closest(lat, lon, max_distance, es):
-    es_addrs = es.search(
-        index=",".join([PLACE_ADDRESS_INDEX, PLACE_STREET_INDEX]),
-        from_=0,
-        size=1,
-        query={
+def build_closest_query(lat, lon, max_distance) -> dict:
+    return {
+        "from": 0,
+        "size": 1,
+        "query": {
             "function_score": {
                 "query": {
                     "bool": {
@@ -159,10 +457,29 @@ def fetch_closest(lat, lon, max_distance, es):
                 ],
             }
         },
-    )
+    }
+
+
+def get_closest(es_addrs, lat, lon, max_distance) -> dict:
     es_addrs = es_addrs.get("hits", {}).get("hits", [])
     if len(es_addrs) == 0:
         raise HTTPException(
             status_code=404, detail=f"nothing around {lat}:{lon} within {max_distance}m..."
         )
     return es_addrs[0]
+
+
+def fetch_closest(lat, lon, max_distance, es):
+    es_addrs = es.search(
+        index=",".join([PLACE_ADDRESS_INDEX, PLACE_STREET_INDEX]),
+        body=build_closest_query(lat, lon, max_distance),
+    )
+    return get_closest(es_addrs, lat, lon, max_distance)
+
+
+async def fetch_closest_async(lat, lon, max_distance, es):
+    es_addrs = await es.search(
+        index=",".join([PLACE_ADDRESS_INDEX, PLACE_STREET_INDEX]),
+        body=build_closest_query(lat, lon, max_distance),
+    )
+    return get_closest(es_addrs, lat, lon, max_distance)
@@ -1,14 +1,13 @@
 import logging
 
-from starlette.concurrency import run_in_threadpool
-
 from idunn.api.constants import PoiSource
 from idunn.datasources import Datasource
-from idunn.datasources.mimirsbrunn import fetch_es_pois, MimirPoiFilter
+from idunn.datasources.mimirsbrunn import fetch_es_pois_by_tiles_async, MimirPoiFilter
 from idunn.geocoder.bragi_client import bragi_client
 from idunn.geocoder.models.params import QueryParams
 from idunn.places.poi import BragiPOI, OsmPOI
-from idunn.utils.place import place_from_id
+from idunn.places.exceptions import IdunnPlaceError
+from idunn.utils.place import place_from_id_async
 
 logger = logging.getLogger(__name__)
 
@@ -37,18 +36,19 @@ class Osm(Datasource):
     async def fetch_search(cls, query: QueryParams):
         return bragi_client.search(query)
 
-    def filter_search_result(self, results, lang, normalized_query=None):
+    async def filter_search_result(self, results, lang, normalized_query=None):
         try:
             feature_properties = results["features"][0]["properties"]["geocoding"]
             place_id = feature_properties["id"]
-            place = place_from_id(place_id, lang, follow_redirect=True)
-            if self.is_wiki_filter:
-                if place.wikidata_id and place.get_subclass_name() not in SUBCLASS_HOTEL_OSM:
-                    return place.load_place(lang=lang)
-                return None
-            return place.load_place(lang=lang)
-        except Exception:
+            place = await place_from_id_async(place_id, lang, follow_redirect=True)
+        except (KeyError, IndexError, IdunnPlaceError):
+            # No candidate, other errors are raised to the caller
+            return None
+        if self.is_wiki_filter:
+            if place.wikidata_id and place.get_subclass_name() not in SUBCLASS_HOTEL_OSM:
+                return await place.load_place_async(lang=lang)
             return None
+        return await place.load_place_async(lang=lang)
 
     async def get_places_bbox(self, params) -> list:
         """Get places within a given Bbox"""
@@ -63,8 +63,7 @@ class Osm(Datasource):
             filters = [MimirPoiFilter.from_url_raw_filter(f) for f in params.raw_filter]
         else:
             filters = [f for c in params.category for f in c.raw_filters()]
-        bbox_places = await run_in_threadpool(
-            fetch_es_pois,
+        bbox_places = await fetch_es_pois_by_tiles_async(
             "poi",
             filters=filters,
             bbox=params.bbox,
@@ -1,10 +1,11 @@
+import asyncio
 import logging
+from math import ceil
 from os import path
-from typing import List
+from typing import List, Optional
 
-import requests
+import httpx
 from requests import HTTPError as RequestsHTTPError
-from starlette.concurrency import run_in_threadpool
 
 from idunn import settings
 from idunn.datasources import Datasource
@@ -12,7 +13,7 @@ from idunn.geocoder.models.params import QueryParams
 from idunn.places.exceptions import PlaceNotFound
 from idunn.places.models import pj_info, pj_find
 from idunn.places.pj_poi import PjApiPOI
-from idunn.utils.auth_session import AuthSession
+from idunn.utils.auth_session import AsyncAuthSession, AuthSession
 from idunn.utils.category import CategoryEnum
 from idunn.utils.geometry import bbox_inside_polygon, france_polygon
 from idunn.utils.result_filter import ResultFilter
@@ -21,7 +22,9 @@ logger = logging.getLogger(__name__)
 result_filter = ResultFilter()
 
 
-class PjAuthSession(AuthSession):
+class PjAuthentication:
+    name = "pagesjaunes"
+
     def get_authorization_url(self):
         return "https://api.pagesjaunes.fr/oauth/client_credential/accesstoken"
 
@@ -33,6 +36,14 @@ class PjAuthSession(AuthSession):
         }
 
 
+class PjAuthSession(PjAuthentication, AuthSession):
+    pass
+
+
+class PjAsyncAuthSession(PjAuthentication, AsyncAuthSession):
+    pass
+
+
 class PagesJaunes(Datasource):
     PLACE_ID_NAMESPACE = "pj"
     PJ_RESULT_MAX_SIZE = 30
@@ -44,7 +55,14 @@ class PagesJaunes(Datasource):
         super().__init__()
         pj_api_url = settings.get("PJ_API_ID")
         if pj_api_url:
+            # The synchronous session is kept for callers which can't await
             self.session = PjAuthSession(refresh_timeout=self.PJ_API_TIMEOUT)
+            self.async_session = PjAsyncAuthSession(
+                refresh_timeout=self.PJ_API_TIMEOUT,
+                timeout=self.PJ_API_TIMEOUT,
+                verify=settings["VERIFY_HTTPS"],
+                limits=httpx.Limits(max_connections=int(settings["PJ_API_MAX_CONNECTIONS"])),
+            )
             self.enabled = True
         else:
             self.enabled = False
@@ -61,16 +79,12 @@ class PagesJaunes(Datasource):
 
     @classmethod
     async def fetch_search(cls, query: QueryParams, intention=None):
-        return run_in_threadpool(
-            pj_source.search_places,
-            query,
-            intention.description._place_in_query,
-        )
+        return pj_source.search_places(query, intention.description._place_in_query)
 
-    def filter_search_result(self, results, lang=None, normalized_query=None):
+    async def filter_search_result(self, results, lang=None, normalized_query=None):
         place = next(iter(result_filter.filter_places(normalized_query, results)), None)
         if place:
-            return place.load_place(lang=lang)
+            return await place.load_place_async(lang=lang)
         return None
 
     def bbox_is_covered(self, bbox):
@@ -91,47 +105,75 @@ class PagesJaunes(Datasource):
         res.raise_for_status()
         return res.json()
 
-    def get_places_from_url(self, url, params=None, size=10, ignore_status=()):
+    async def get_from_params_async(self, url, params=None) -> dict:
+        res = await self.async_session.get(url, params=params)
+        res.raise_for_status()
+        return res.json()
+
+    async def get_search_page(
+        self, url, params=None, ignore_status=()
+    ) -> Optional[pj_find.Response]:
         try:
-            res = pj_find.Response(**self.get_from_params(url, params))
-        except requests.RequestException as exc:
-            if exc.response is not None and exc.response.status_code in ignore_status:
+            return pj_find.Response(**await self.get_from_params_async(url, params))
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code in ignore_status:
                 logger.debug("Ignored pagesjaunes error: %s", exc)
             else:
                 logger.error("Failed to query pagesjaunes: %s", exc)
+        except httpx.HTTPError as exc:
+            logger.error("Failed to query pagesjaunes: %s", exc)
+        return None
+
+    async def get_places_from_url(self, url, params=None, size=10, ignore_status=()):
+        res = await self.get_search_page(url, params, ignore_status)
+
+        if res is None:
             return []
 
-        pois = [PjApiPOI(listing) for listing in res.search_results.listings[:size] or []]
-
-        if (
-            len(pois) < size
-            and res.context
-            and res.context.pages
-            and res.context.pages.next_page_url
-        ):
-            pois += self.get_places_from_url(
-                res.context.pages.next_page_url,
-                size=size - len(pois),
+        listings = res.search_results.listings or []
+        pois = [PjApiPOI(listing) for listing in listings[:size]]
+        pages = res.context.pages if res.context else None
+
+        if len(pois) >= size or not pages or not pages.next_page_url:
+            return pois
+
+        if not (pages.current_page and pages.page_count and listings):
+            # Follow the link to the next page when the pagination is unknown
+            return pois + await self.get_places_from_url(
+                pages.next_page_url, size=size - len(pois), ignore_status=ignore_status
+            )
+
+        # Fetch all the missing pages at once
+        per_page = pages.listings_per_page or len(listings)
+        last_page = min(pages.page_count, pages.current_page + ceil((size - len(pois)) / per_page))
+        next_pages = await asyncio.gather(
+            *(
+                self.get_search_page(url, {**(params or {}), "page": page}, ignore_status)
+                for page in range(pages.current_page + 1, last_page + 1)
             )
+        )
 
-        return pois
+        for page in next_pages:
+            if page is not None:
+                pois += [PjApiPOI(listing) for listing in page.search_results.listings or []]
 
-    def search_places(self, query: str, place_in_query: bool, size=10) -> List[PjApiPOI]:
+        return pois[:size]
+
+    async def search_places(self, query: str, place_in_query: bool, size=10) -> List[PjApiPOI]:
         query_params = {"q": query if place_in_query else f"{query} france"}
-        return self.get_places_from_url(
+        return await self.get_places_from_url(
             self.PJ_FIND_API_URL, query_params, size, ignore_status=(400,)
         )
 
     async def get_places_bbox(self, params) -> List[PjApiPOI]:
-        return await run_in_threadpool(
-            self.fetch_places_bbox,
+        return await self.fetch_places_bbox(
             params.category,
             params.bbox,
             size=params.size,
             query=params.q,
         )
 
-    def fetch_places_bbox(
+    async def fetch_places_bbox(
         self, categories: List[CategoryEnum], bbox, size=10, query=""
     ) -> List[PjApiPOI]:
         query_params = {
@@ -142,7 +184,7 @@ class PagesJaunes(Datasource):
             "max": min(self.PJ_RESULT_MAX_SIZE, size + 5),
         }
 
-        api_places = self.get_places_from_url(self.PJ_FIND_API_URL, query_params, size)
+        api_places = await self.get_places_from_url(self.PJ_FIND_API_URL, query_params, size)
 
         # Remove null merchant ids
         # or duplicated merchant ids that may be returned in different pages
@@ -172,5 +214,25 @@ class PagesJaunes(Datasource):
                 raise PlaceNotFound from e
             raise
 
+    async def get_place_async(self, poi_id) -> PjApiPOI:
+        """
+        Same as `get_place`, without blocking the event loop.
+        """
+        try:
+            return PjApiPOI(
+                pj_info.Response(
+                    **await self.get_from_params_async(
+                        path.join(self.PJ_INFO_API_URL, self.internal_id(poi_id))
+                    )
+                )
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in (404, 400):
+                logger.debug(
+                    "Got HTTP %s from PagesJaunes API", e.response.status_code, exc_info=True
+                )
+                raise PlaceNotFound from e
+            raise
+
 
 pj_source = PagesJaunes()
@@ -10,6 +10,8 @@ logger = logging.getLogger(__name__)
 
 
 class RecyclingAuthSession(AuthSession):
+    name = "recycling"
+
     def get_authorization_url(self):
         base_url = settings.get("RECYCLING_SERVER_URL")
         return f"{base_url}/_login/local"
@@ -30,6 +32,8 @@ class RecyclingAuthSession(AuthSession):
         return self.inner.get(
             self.get_authorization_url(),
             json=self.get_authorization_params(),
+            # The current token must not be sent to the authorization API
+            headers={"Authorization": None},
             timeout=self.refresh_timeout,
         )
 
@@ -53,6 +57,10 @@ class RecyclingDataSource:
     def enabled(self):
         return bool(self.base_url)
 
+    @staticmethod
+    def get_latest_measures_cache_key(lat, lon):
+        return f"recycling_latest_measures_{lat:.1f}_{lon:.1f}"
+
     def get_latest_measures(self, lat, lon, max_distance, size=50):
         """
         If cache is used, latest measures will be fetched and cached with a larger radius.
@@ -69,10 +77,13 @@ class RecyclingDataSource:
 
         assert max_distance <= 2000, "Cached recycling data cannot be retrieved for radius > 2km"
         rounded_lat, rounded_lon = f"{lat:.1f}", f"{lon:.1f}"
-        key = f"recycling_latest_measures_{rounded_lat}_{rounded_lon}"
-        results = RedisWrapper.cache_it(key, self._fetch_latest_measures, expire=self.cache_expire)(
-            rounded_lat, rounded_lon, max_distance=10_000, size=10_000
-        )
+        key = self.get_latest_measures_cache_key(lat, lon)
+        results = RedisWrapper.cache_it(
+            key,
+            self._fetch_latest_measures,
+            expire=self.cache_expire,
+            prefix="recycling_latest_measures",
+        )(rounded_lat, rounded_lon, max_distance=10_000, size=10_000)
 
         if not results:
             return []
@@ -5,15 +5,15 @@ from json import JSONDecodeError
 import httpx
 import pydantic
 from fastapi import HTTPException
-from starlette.concurrency import run_in_threadpool
 
 from idunn import settings
 from idunn.datasources import Datasource
-from idunn.datasources.mimirsbrunn import MimirPoiFilter, fetch_es_pois
+from idunn.datasources.mimirsbrunn import MimirPoiFilter, fetch_es_pois_by_tiles_async
 from idunn.geocoder.bragi_client import bragi_client
 from idunn.geocoder.models.params import QueryParams
 from idunn.places.poi import TripadvisorPOI
-from idunn.utils.place import place_from_id
+from idunn.places.exceptions import IdunnPlaceError
+from idunn.utils.place import place_from_id_async
 
 logger = logging.getLogger(__name__)
 
@@ -42,14 +42,17 @@ class Tripadvisor(Datasource):
             query_tripadvisor.poi_types = SUBCLASS_HOTEL_TRIPADVISOR
         return bragi_client.search(query_tripadvisor)
 
-    def filter_search_result(self, results, lang, normalized_query=None):
+    async def filter_search_result(self, results, lang, normalized_query=None):
         try:
             feature_properties = results["features"][0]["properties"]["geocoding"]
             place_id = feature_properties["id"]
-            place = place_from_id(place_id, lang, type="poi_tripadvisor", follow_redirect=True)
-            return place.load_place(lang=lang)
-        except Exception:
+            place = await place_from_id_async(
+                place_id, lang, type="poi_tripadvisor", follow_redirect=True
+            )
+        except (KeyError, IndexError, IdunnPlaceError):
+            # No candidate, other errors are raised to the caller
             return None
+        return await place.load_place_async(lang=lang)
 
     async def get_places_bbox(self, params) -> list:
         """Get places within a given Bbox"""
@@ -58,8 +61,7 @@ class Tripadvisor(Datasource):
             filters = [MimirPoiFilter.from_url_raw_filter(f) for f in params.raw_filter]
         else:
             filters = [f for c in params.category for f in c.raw_filters()]
-        bbox_places = await run_in_threadpool(
-            fetch_es_pois,
+        bbox_places = await fetch_es_pois_by_tiles_async(
             "poi_tripadvisor",
             filters=filters,
             bbox=params.bbox,
@@ -51,6 +51,10 @@ class WikiEs:
             return f"wikidata_{lang}"
         return None
 
+    def get_info_cache_key(self, wikidata_id, lang):
+        es_index = self.get_index(lang)
+        return self.REDIS_INFO_KEY_PREFIX + "_" + wikidata_id + "_" + lang + "_" + es_index
+
     def get_info(self, wikidata_id, lang):
         if not self.enabled() or not self.is_lang_available(lang):
             return None
@@ -92,8 +96,10 @@ class WikiEs:
 
             return resp[0].get("_source")
 
-        redis_key = self.REDIS_INFO_KEY_PREFIX + "_" + wikidata_id + "_" + lang + "_" + es_index
-        fetch_data_cached = RedisWrapper.cache_it(redis_key, fetch_data)
+        redis_key = self.get_info_cache_key(wikidata_id, lang)
+        fetch_data_cached = RedisWrapper.cache_it(
+            redis_key, fetch_data, prefix=self.REDIS_INFO_KEY_PREFIX
+        )
         return fetch_data_cached()
 
 
@@ -83,6 +83,14 @@ class WikipediaSession:
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": settings["WIKI_USER_AGENT"]})
 
+    @classmethod
+    def get_summary_cache_key(cls, title, lang):
+        return cls.REDIS_GET_SUMMARY_PREFIX + "_" + title + "_" + lang
+
+    @classmethod
+    def get_title_in_language_cache_key(cls, title, source_lang, dest_lang):
+        return cls.REDIS_TITLE_IN_LANG_PREFIX + "_" + title + "_" + source_lang + "_" + dest_lang
+
     def get_summary(self, title, lang):
         @self.Helpers.handle_requests_error
         @self.circuit_breaker
@@ -95,8 +103,10 @@ class WikipediaSession:
             resp.raise_for_status()
             return resp.json()
 
-        key = self.REDIS_GET_SUMMARY_PREFIX + "_" + title + "_" + lang
-        fetch_data_cached = RedisWrapper.cache_it(key, fetch_data)
+        key = self.get_summary_cache_key(title, lang)
+        fetch_data_cached = RedisWrapper.cache_it(
+            key, fetch_data, prefix=self.REDIS_GET_SUMMARY_PREFIX
+        )
         return fetch_data_cached()
 
     def get_title_in_language(self, title, source_lang, dest_lang):
@@ -134,8 +144,10 @@ class WikipediaSession:
 
             return None
 
-        key = self.REDIS_TITLE_IN_LANG_PREFIX + "_" + title + "_" + source_lang + "_" + dest_lang
-        fetch_data_cached = RedisWrapper.cache_it(key, fetch_data)
+        key = self.get_title_in_language_cache_key(title, source_lang, dest_lang)
+        fetch_data_cached = RedisWrapper.cache_it(
+            key, fetch_data, prefix=self.REDIS_TITLE_IN_LANG_PREFIX
+        )
         return fetch_data_cached()
 
 
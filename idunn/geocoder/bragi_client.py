@@ -1,10 +1,14 @@
 import logging
 import httpx
 from json.decoder import JSONDecodeError
+import orjson
 import pydantic
 from fastapi import HTTPException
 
 from idunn import settings
+from idunn.utils import prometheus
+from idunn.utils.cache import SizedTimedLRUCache
+from idunn.utils.transport import CoalescingTransport, HedgingTransport
 from .models import QueryParams, ExtraParams
 
 logger = logging.getLogger(__name__)
@@ -24,10 +28,53 @@ async def get_explain_error(response):
 
 
 class BragiClient:
+    # Parameters which don't change the response of Bragi, ignored to share
+    # responses of cached and coalesced requests
+    CACHE_IGNORED_PARAMS = {"request_id"}
+
     def __init__(self):
+        # Autocomplete restricted to a shape is sent as a POST
+        methods = ("GET", "POST")
+        limits = httpx.Limits(max_connections=int(settings["BRAGI_MAX_CONNECTIONS"]))
+        transport = httpx.AsyncHTTPTransport(verify=settings["VERIFY_HTTPS"], limits=limits)
+
+        if settings["BRAGI_HEDGING"]:
+            transport = HedgingTransport.from_settings(transport, name="bragi", methods=methods)
+
         self.client = httpx.AsyncClient(
             verify=settings["VERIFY_HTTPS"],
-            limits=httpx.Limits(max_connections=int(settings["BRAGI_MAX_CONNECTIONS"])),
+            limits=limits,
+            transport=CoalescingTransport(
+                transport, name="bragi", methods=methods, ignored_params=self.CACHE_IGNORED_PARAMS
+            ),
+        )
+        self.autocomplete_cache = SizedTimedLRUCache(
+            maxsize=int(settings["BRAGI_AUTOCOMPLETE_CACHE_SIZE"]),
+            maxbytes=int(settings["BRAGI_AUTOCOMPLETE_CACHE_MAX_BYTES"]),
+            seconds=float(settings["BRAGI_AUTOCOMPLETE_CACHE_TTL"]),
+        )
+
+    def clear_cache(self):
+        self.autocomplete_cache.clear()
+
+    @classmethod
+    def autocomplete_cache_key(cls, params):
+        """
+        Key of a response in the cache. The focus point is already snapped to
+        a grid depending on the zoom by `QueryParams.bragi_query_dict`, so
+        that close users share their responses.
+
+        >>> BragiClient.autocomplete_cache_key(
+        ...     {"q": "par", "type[]": ["city", "poi"], "lat": "48.90", "request_id": "42"}
+        ... )
+        (('lat', '48.90'), ('q', 'par'), ('type[]', ('city', 'poi')))
+        """
+        return tuple(
+            sorted(
+                (key, tuple(value) if isinstance(value, list) else value)
+                for key, value in params.items()
+                if key not in cls.CACHE_IGNORED_PARAMS
+            )
         )
 
     async def search(self, query: QueryParams):
@@ -56,6 +103,30 @@ class BragiClient:
         return await self.raw_autocomplete(params, body)
 
     async def raw_autocomplete(self, params, body=None):
+        """
+        Query Bragi's autocomplete. Responses of GET requests are cached, which
+        excludes requests with a body (restricted to a shape).
+        """
+        if body:
+            return self.parse_autocomplete(await self.fetch_autocomplete(params, body))
+
+        key = self.autocomplete_cache_key(params)
+
+        try:
+            cached = self.autocomplete_cache.get(key)
+        except IndexError:
+            prometheus.local_cache_request("bragi_autocomplete", hit=False)
+        else:
+            prometheus.local_cache_request("bragi_autocomplete", hit=True)
+            # Parse a fresh copy, as callers may edit the response
+            return orjson.loads(cached)
+
+        response = await self.fetch_autocomplete(params)
+        data = self.parse_autocomplete(response)
+        self.autocomplete_cache.put(key, response.content, size=len(response.content))
+        return data
+
+    async def fetch_autocomplete(self, params, body=None) -> httpx.Response:
         url = settings["BRAGI_BASE_URL"] + "/autocomplete"
         logger.info(url)
         try:
@@ -70,6 +141,10 @@ class BragiClient:
         if response.status_code != httpx.codes.OK:
             await get_explain_error(response)
 
+        return response
+
+    @staticmethod
+    def parse_autocomplete(response: httpx.Response):
         try:
             return response.json()
         except (JSONDecodeError, pydantic.ValidationError) as exc:
@@ -1,18 +1,21 @@
 import httpx
 import logging
-import re
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 from unidecode import unidecode
 
 from idunn.api.places_list import MAX_HEIGHT, MAX_WIDTH
 from idunn.geocoder.models.params import QueryParams as GeocoderParams
 from idunn import settings
+from idunn.utils import prometheus
+from idunn.utils.cache import TimedLRUCache
 from idunn.utils.circuit_breaker import IdunnCircuitBreaker
 from idunn.utils.result_filter import ResultFilter
+from idunn.utils.transport import CoalescingTransport, HedgingTransport
 
 from .models.geocodejson import Intention, IntentionType
 from .bragi_client import bragi_client
-from ..utils.category import Category
+from ..utils.category import Category, match_category
 
 logger = logging.getLogger(__name__)
 result_filter = ResultFilter()
@@ -36,6 +39,29 @@ class NluClientException(Exception):
         return self.extra["reason"]
 
 
+@dataclass
+class IntentionTrace:
+    """
+    Record of the services that were queried to resolve an intention.
+    """
+
+    stages: List[str] = field(default_factory=list)
+    degraded: bool = False  # a service failed and a fallback was used
+
+
+@dataclass
+class _CachedIntention:
+    intention: Optional[Intention]
+    stages: List[str]
+
+
+@dataclass
+class _CachedFailure:
+    reason: str
+    stages: List[str]
+    extra: dict  # logs context of the exception
+
+
 tagger_circuit_breaker = IdunnCircuitBreaker(
     "nlu_tagger_api_breaker",
     int(settings["NLU_BREAKER_MAXFAIL"]),
@@ -54,10 +80,29 @@ class NLU_Helper:  # pylint: disable = invalid-name
     CLASSIF_CATEGORY_MIN_WEIGHT = float(settings["NLU_CLASSIFIER_CATEGORY_MIN_WEIGHT"])
     CLASSIF_MAX_WEIGHT_RATIO = float(settings["NLU_CLASSIFIER_MAX_WEIGHT_RATIO"])
 
+    CACHE_SIZE = int(settings["NLU_INTENTION_CACHE_SIZE"])
+    CACHE_TTL = float(settings["NLU_INTENTION_CACHE_TTL"])
+    CACHE_FAILURES_TTL = float(settings["NLU_INTENTION_CACHE_FAILURES_TTL"])
+
     def __init__(self):
+        # Both the tagger and the classifier are queried with a POST
+        methods = ("POST",)
+        transport = httpx.AsyncHTTPTransport(verify=settings["VERIFY_HTTPS"])
+
+        if settings["NLU_HEDGING"]:
+            transport = HedgingTransport.from_settings(transport, name="nlu", methods=methods)
+
         self.client = httpx.AsyncClient(
-            timeout=float(settings["NLU_CLIENT_TIMEOUT"]), verify=settings["VERIFY_HTTPS"]
+            timeout=float(settings["NLU_CLIENT_TIMEOUT"]),
+            verify=settings["VERIFY_HTTPS"],
+            transport=CoalescingTransport(transport, name="nlu", methods=methods),
         )
+        self.intentions_cache = TimedLRUCache(self.CACHE_SIZE, self.CACHE_TTL)
+        self.failures_cache = TimedLRUCache(self.CACHE_SIZE, self.CACHE_FAILURES_TTL)
+
+    def clear_cache(self):
+        self.intentions_cache.clear()
+        self.failures_cache.clear()
 
     async def post_nlu_classifier(self, text):
         classifier_url = settings["NLU_CLASSIFIER_URL"]
@@ -112,13 +157,17 @@ class NLU_Helper:  # pylint: disable = invalid-name
 
         return Category.__members__.get(best)
 
-    async def nlu_classifier(self, text) -> Optional[Category]:
+    async def nlu_classifier(self, text, trace=None) -> Optional[Category]:
+        trace = trace or IntentionTrace()
+        trace.stages.append("classifier")
+
         try:
             response_classifier = await classifier_circuit_breaker.call_async(
                 self.post_nlu_classifier, text
             )
         except Exception:
             logger.error("Request to NLU classifier failed", exc_info=True)
+            trace.degraded = True
             return None
 
         return self.nlu_classifier_handle_response(response_classifier.json())
@@ -134,14 +183,10 @@ class NLU_Helper:  # pylint: disable = invalid-name
         True
         """
         normalized_text = unidecode(text).lower().strip()
-        for cat in list(Category):
-            regex = cat.regex()
-            if regex and re.search(regex, normalized_text):
-                return cat
-        return None
+        return match_category(normalized_text)
 
-    async def classify_category(self, text):
-        return await self.nlu_classifier(text) or self.regex_classifier(text)
+    async def classify_category(self, text, trace=None):
+        return await self.nlu_classifier(text, trace) or self.regex_classifier(text)
 
     @classmethod
     def fuzzy_match(cls, query, bragi_res):
@@ -198,8 +243,8 @@ class NLU_Helper:  # pylint: disable = invalid-name
                 raise NluClientException("matching place has no coordinates")
         return bbox, place
 
-    async def build_intention_category(self, cat_query):
-        category = await self.classify_category(cat_query)
+    async def build_intention_category(self, cat_query, trace=None):
+        category = await self.classify_category(cat_query, trace)
 
         if category:
             return Intention(
@@ -261,16 +306,100 @@ class NLU_Helper:  # pylint: disable = invalid-name
         response_nlu.raise_for_status()
         return response_nlu
 
+    @staticmethod
+    def intention_cache_key(text, lang, extra_geocoder_params, allow_types):
+        """
+        Key of an intention in the cache. Coordinates of the focus are rounded
+        so that close focus points share their intentions. The case of the
+        text is ignored if the tagger ignores it.
+
+        >>> NLU_Helper.intention_cache_key(
+        ...     " Pharmacie  Paris", "fr", {"lat": 48.8566, "lon": 2.3522, "zoom": 6}, []
+        ... )
+        ('pharmacie paris', 'fr', (('lat', 48.86), ('lon', 2.35), ('zoom', 6)), ())
+        """
+        text = " ".join(text.split())
+        if settings["NLU_TAGGER_LOWERCASE"]:
+            text = text.lower()
+
+        geocoder_params = tuple(
+            sorted(
+                (key, round(value, 2) if isinstance(value, float) else value)
+                for key, value in (extra_geocoder_params or {}).items()
+            )
+        )
+        return (
+            text,
+            lang,
+            geocoder_params,
+            tuple(IntentionType(t).value for t in allow_types),
+        )
+
     async def get_intention(
         self,
         text,
         lang,
         extra_geocoder_params=None,
         allow_types=[IntentionType.BRAND, IntentionType.CATEGORY],
+        trace: Optional[IntentionTrace] = None,
     ) -> Optional[Intention]:
         """
-        Get the intention with an associated bbox when a place is found in the query
+        Get the intention with an associated bbox when a place is found in the
+        query, from a cache of recently resolved intentions if possible.
+
+        The `trace` of the resolution can be provided to know if the result is
+        degraded by the failure of a service.
         """
+        key = self.intention_cache_key(text, lang, extra_geocoder_params, allow_types)
+
+        try:
+            cached = self.intentions_cache.get(key)
+        except IndexError:
+            pass
+        else:
+            self.count_cache_request(cached.stages, "hit")
+            return cached.intention.copy(deep=True) if cached.intention else None
+
+        try:
+            failure = self.failures_cache.get(key)
+        except IndexError:
+            pass
+        else:
+            self.count_cache_request(failure.stages, "failure_hit")
+            exc = NluClientException(failure.reason)
+            exc.extra.update(failure.extra)
+            raise exc
+
+        if trace is None:
+            trace = IntentionTrace()
+
+        try:
+            intention = await self.resolve_intention(
+                text, lang, extra_geocoder_params, allow_types, trace
+            )
+        except NluClientException as exp:
+            self.count_cache_request(trace.stages, "miss")
+            if not trace.degraded:
+                self.failures_cache.put(
+                    key, _CachedFailure(exp.reason(), trace.stages, dict(exp.extra))
+                )
+            raise
+
+        self.count_cache_request(trace.stages, "miss")
+        if not trace.degraded:
+            self.intentions_cache.put(
+                key, _CachedIntention(intention and intention.copy(deep=True), trace.stages)
+            )
+        return intention
+
+    @staticmethod
+    def count_cache_request(stages, result):
+        for stage in stages:
+            prometheus.nlu_cache_request(stage, result)
+
+    async def resolve_intention(
+        self, text, lang, extra_geocoder_params, allow_types, trace
+    ) -> Optional[Intention]:
         logs_extra = {
             "intention_detection": {
                 "text": text,
@@ -279,10 +408,12 @@ class NLU_Helper:  # pylint: disable = invalid-name
             }
         }
 
+        trace.stages.append("tagger")
         try:
             response_nlu = await tagger_circuit_breaker.call_async(self.post_intentions, text, lang)
         except Exception:
             logger.error("Request to NLU tagger failed", exc_info=True, extra=logs_extra)
+            trace.degraded = True
             return None
 
         tags_list = [t for t in response_nlu.json()["NLU"] if t["tag"] != "O"]
@@ -315,11 +446,12 @@ class NLU_Helper:  # pylint: disable = invalid-name
 
                 cat_or_brand_query = brand_query or cat_query
 
-                intention = await self.build_intention_category(cat_or_brand_query)
+                intention = await self.build_intention_category(cat_or_brand_query, trace)
 
                 self.add_extra_logs(brand_query, cat_query, intention, logs_extra, place_query)
                 logger.info("Detected intentions for '%s'", text, extra=logs_extra)
             if place_query:
+                trace.stages.append("geocoder")
                 bbox, place = await self.get_place_and_bbox_from_query(
                     extra_geocoder_params, lang, place_query
                 )
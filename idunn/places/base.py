@@ -5,13 +5,17 @@ from pytz import timezone, UTC
 from typing import Optional, Union
 
 from idunn.datasources.wiki_es import wiki_es
-from idunn.utils import maps_urls, tz
+from idunn.utils import maps_urls
 from idunn.utils.thumbr import thumbr
+from idunn.utils.tz_index import TimezoneFinder
 from .place import Place, PlaceMeta
-from ..utils.verbosity import build_blocks, Verbosity
+from ..utils.verbosity import build_blocks, build_blocks_async, Verbosity
 
 logger = logging.getLogger(__name__)
 
+# The timezone index is memory-mapped, so that it loads instantly
+tz = TimezoneFinder()
+
 
 ZONE_TYPE_ORDER_KEY = {
     "suburb": 1,
@@ -73,15 +77,21 @@ class BasePlace(dict):
     def wikidata_id(self):
         return self.properties.get("wikidata")
 
+    def has_wiki_info(self, lang):
+        return (
+            self.wikidata_id is not None and wiki_es.enabled() and wiki_es.is_lang_available(lang)
+        )
+
+    def get_wiki_info_cache_key(self, lang):
+        if not self.has_wiki_info(lang):
+            return None
+        return wiki_es.get_info_cache_key(self.wikidata_id, lang)
+
     def get_wiki_resp(self, lang):
         if lang not in self._wiki_resp:
             self._wiki_resp[lang] = None
 
-            if (
-                self.wikidata_id is not None
-                and wiki_es.enabled()
-                and wiki_es.is_lang_available(lang)
-            ):
+            if self.has_wiki_info(lang):
                 self._wiki_resp[lang] = wiki_es.get_info(self.wikidata_id, lang)
 
         return self._wiki_resp.get(lang)
@@ -307,7 +317,7 @@ class BasePlace(dict):
 
         return base_url
 
-    def load_place(self, lang, verbosity: Verbosity = Verbosity.default()) -> Place:
+    def build_place(self, lang, blocks) -> Place:
         return Place(
             type=self.PLACE_TYPE,
             id=self.get_id(),
@@ -317,10 +327,20 @@ class BasePlace(dict):
             subclass_name=self.get_subclass_name(),
             geometry=self.get_geometry(),
             address=self.build_address(lang),
-            blocks=build_blocks(self, lang, verbosity),
+            blocks=blocks,
             meta=self.get_meta(),
         )
 
+    def load_place(self, lang, verbosity: Verbosity = Verbosity.default()) -> Place:
+        return self.build_place(lang, build_blocks(self, lang, verbosity))
+
+    async def load_place_async(self, lang, verbosity: Verbosity = Verbosity.default()) -> Place:
+        """
+        Same as `load_place`, with the blocks fetching remote data built
+        concurrently.
+        """
+        return self.build_place(lang, await build_blocks_async(self, lang, verbosity))
+
     def get_images_urls(self):
         return []
 
@@ -383,7 +403,7 @@ class BasePlace(dict):
         'UTC'
         """
         coords = self.get_coord()
-        tz_name = tz.tzNameAt(latitude=coords["lat"], longitude=coords["lon"], forceTZ=True)
+        tz_name = tz.tz_name_at(coords["lat"], coords["lon"])
         if tz_name is None:
             return UTC
         return timezone(tz_name)
@@ -50,13 +50,13 @@ class ContactInfo(BaseModel):
 class Pages(BaseModel):
     """
     Omitted fields:
-      - current_page: Current page
-      - page_count: Total number of pages
-      - listings_per_page: Listings per page
       - prev_page_url: URL to the previous page
       - current_page_url: URL to the current page
     """
 
+    current_page: Optional[int] = Field(None, description="Current page")
+    page_count: Optional[int] = Field(None, description="Total number of pages")
+    listings_per_page: Optional[int] = Field(None, description="Listings per page")
     next_page_url: Optional[str] = Field(None, description="URL to the next page")
 
 
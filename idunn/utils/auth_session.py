@@ -1,10 +1,20 @@
-from time import time
+import asyncio
+import random
+from threading import Lock, Thread
+from time import sleep, time
+from typing import Optional
 
+import httpx
 import logging
 import requests
 
+from idunn.utils import prometheus
+from idunn.utils.cache import SingleFlight
 
-class AuthSession:
+logger = logging.getLogger(__name__)
+
+
+class BaseAuthSession:
     """
     Helper class for HTTP sessions that need to keep an authentification token.
     Default behavior corresponds to an OAuth2 API.
@@ -12,6 +22,10 @@ class AuthSession:
     Note that at least `get_authorization_url` and `get_authorization_params`
     need to be overriden.
 
+    The token is renewed in the background before it expires, so that requests
+    only wait for a new token when the session is first used or when the
+    background refresh fails.
+
     Parameters
     ----------
 
@@ -19,13 +33,31 @@ class AuthSession:
                           new token, in seconds.
 
     refresh_timeout: Timeout of the request asking for a new token.
+
+    refresh_ahead: Delay before `expiration_tolerance` to renew the token in
+                   the background, in seconds.
+
+    refresh_jitter: Random part of `refresh_ahead`, so that all workers don't
+                    renew their token at the same time.
     """
 
-    def __init__(self, expiration_tolerance=10, refresh_timeout=1):
-        self.inner = requests.Session()
+    name = "auth"
+
+    # Maximum time the background refresher sleeps before checking the token
+    REFRESH_CHECK_INTERVAL = 60
+    # Delay before retrying a failed background refresh
+    REFRESH_RETRY_DELAY = 5
+
+    def __init__(
+        self, expiration_tolerance=10, refresh_timeout=1, refresh_ahead=60, refresh_jitter=0.5
+    ):
         self.expiration_tolerance = expiration_tolerance
         self.refresh_timeout = refresh_timeout
+        self.refresh_ahead = refresh_ahead
+        self.refresh_jitter = refresh_jitter
         self.token_expires_at = 0
+        self.token_issued_at = 0
+        self.draw_refresh_ahead()
 
     def get_authorization_url(self) -> str:
         raise NotImplementedError
@@ -43,32 +75,108 @@ class AuthSession:
         expires_at = float(resp["issued_at"]) // 1000 + float(resp["expires_in"])
         return token, expires_at
 
+    def token_is_expired(self) -> bool:
+        return self.token_expires_at - time() < self.expiration_tolerance
+
+    def draw_refresh_ahead(self):
+        self.jittered_refresh_ahead = self.refresh_ahead * (
+            1 - random.random() * self.refresh_jitter
+        )
+
+    def next_refresh_delay(self) -> float:
+        """Delay before the token should be renewed in the background"""
+        # Don't renew short-lived tokens more than twice during their lifetime
+        lifetime = self.token_expires_at - self.token_issued_at
+        ahead = min(self.jittered_refresh_ahead, lifetime / 2)
+        return self.token_expires_at - self.expiration_tolerance - ahead - time()
+
+    def set_token(self, headers, resp: dict):
+        token, self.token_expires_at = self.parse_authorisation_response(resp)
+        self.token_issued_at = time()
+        self.draw_refresh_ahead()
+        headers["Authorization"] = f"Bearer {token}"
+
+    def log_new_token_query(self):
+        logger.info(
+            "token expires at %s, querying a new one from %s",
+            self.token_expires_at,
+            self.get_authorization_url(),
+        )
+
+    def report_token_age(self):
+        if self.token_issued_at:
+            prometheus.auth_token_age(self.name, time() - self.token_issued_at)
+
+
+class AuthSession(BaseAuthSession):  # pylint: disable = abstract-method
+    """
+    Authenticated session based on `requests`, see `BaseAuthSession`. The
+    token is renewed in the background by a daemon thread.
+
+    Subclasses must implement `get_authorization_url` and
+    `get_authorization_params`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.inner = requests.Session()
+        self.single_flight = SingleFlight()
+        self.refresher: Optional[Thread] = None
+        self.refresher_lock = Lock()
+
     def query_new_token(self) -> requests.Response:
         """Perform a query to the authorization API"""
         return self.inner.post(
             self.get_authorization_url(),
             data=self.get_authorization_params(),
+            # The current token must not be sent to the authorization API
+            headers={"Authorization": None},
             timeout=self.refresh_timeout,
         )
 
-    def get_new_token(self):
+    def get_new_token(self, trigger="request"):
         """Get a new token"""
-        logging.info(
-            "token expired at %s, querying a new one from %s",
-            self.token_expires_at,
-            self.get_authorization_url(),
-        )
-        resp = self.query_new_token()
+        self.log_new_token_query()
+        with prometheus.auth_token_refresh_duration(self.name, trigger):
+            resp = self.query_new_token()
         resp.raise_for_status()
+        self.set_token(self.inner.headers, resp.json())
+
+    def renew_token(self, trigger):
+        """Get a new token, or wait for the one being queried"""
+        self.single_flight.do("token", self.get_new_token, trigger)
 
-        token, self.token_expires_at = self.parse_authorisation_response(resp.json())
-        self.inner.headers["Authorization"] = f"Bearer {token}"
+    def refresh_loop(self):
+        while True:
+            delay = self.next_refresh_delay()
+            if delay > 0:
+                sleep(min(delay, self.REFRESH_CHECK_INTERVAL))
+                continue
+            try:
+                self.renew_token("background")
+            except Exception:
+                logger.warning("Failed to renew token for %s", self.name, exc_info=True)
+            if self.next_refresh_delay() <= 0:
+                # The refresh failed or the new token is too short-lived
+                sleep(self.REFRESH_RETRY_DELAY)
+
+    def start_refresher(self):
+        if self.refresher is not None:
+            return
+        with self.refresher_lock:
+            if self.refresher is None:
+                self.refresher = Thread(
+                    target=self.refresh_loop, name=f"{self.name}_token_refresh", daemon=True
+                )
+                self.refresher.start()
 
     def refresh_token(self):
         """Get a new token if current one is expired"""
-        if self.token_expires_at - time() < self.expiration_tolerance:
+        self.start_refresher()
+        if self.token_is_expired():
             self.inner.headers.pop("Authorization", None)
-            self.get_new_token()
+            self.renew_token("request")
+        self.report_token_age()
 
     def get(self, *args, **kwargs):
         self.refresh_token()
@@ -77,3 +185,92 @@ class AuthSession:
     def post(self, *args, **kwargs):
         self.refresh_token()
         return self.inner.post(*args, **kwargs)
+
+
+class AsyncAuthSession(BaseAuthSession):  # pylint: disable = abstract-method
+    """
+    Authenticated session based on `httpx.AsyncClient`, see `BaseAuthSession`.
+    The token is renewed in the background by a task of the running loop.
+
+    Requests sent while the token is being refreshed wait for the same new
+    token instead of querying one each.
+
+    Subclasses must implement `get_authorization_url` and
+    `get_authorization_params`.
+    """
+
+    def __init__(
+        self,
+        expiration_tolerance=10,
+        refresh_timeout=1,
+        refresh_ahead=60,
+        refresh_jitter=0.5,
+        **client_kwargs,
+    ):
+        super().__init__(expiration_tolerance, refresh_timeout, refresh_ahead, refresh_jitter)
+        self.inner = httpx.AsyncClient(**client_kwargs)
+        self.token_refresh: Optional[asyncio.Future] = None
+        self.refresher: Optional[asyncio.Task] = None
+
+    async def query_new_token(self) -> httpx.Response:
+        """Perform a query to the authorization API"""
+        request = self.inner.build_request(
+            "POST",
+            self.get_authorization_url(),
+            data=self.get_authorization_params(),
+            timeout=self.refresh_timeout,
+        )
+        # The current token must not be sent to the authorization API
+        request.headers.pop("Authorization", None)
+        return await self.inner.send(request)
+
+    async def get_new_token(self, trigger="request"):
+        """Get a new token"""
+        self.log_new_token_query()
+        with prometheus.auth_token_refresh_duration(self.name, trigger):
+            resp = await self.query_new_token()
+        resp.raise_for_status()
+        self.set_token(self.inner.headers, resp.json())
+
+    async def renew_token(self, trigger):
+        """Get a new token, or wait for the one being queried"""
+        if self.token_refresh is None or self.token_refresh.done():
+            self.token_refresh = asyncio.ensure_future(self.get_new_token(trigger))
+        await asyncio.shield(self.token_refresh)
+
+    async def refresh_loop(self):
+        while True:
+            delay = self.next_refresh_delay()
+            if delay > 0:
+                await asyncio.sleep(min(delay, self.REFRESH_CHECK_INTERVAL))
+                continue
+            try:
+                await self.renew_token("background")
+            except Exception:
+                logger.warning("Failed to renew token for %s", self.name, exc_info=True)
+            if self.next_refresh_delay() <= 0:
+                # The refresh failed or the new token is too short-lived
+                await asyncio.sleep(self.REFRESH_RETRY_DELAY)
+
+    def start_refresher(self):
+        loop = asyncio.get_running_loop()
+        if self.refresher is None or self.refresher.done() or self.refresher.get_loop() is not loop:
+            self.refresher = loop.create_task(
+                self.refresh_loop(), name=f"{self.name}_token_refresh"
+            )
+
+    async def refresh_token(self):
+        """Get a new token if current one is expired"""
+        self.start_refresher()
+        if self.token_is_expired():
+            self.inner.headers.pop("Authorization", None)
+            await self.renew_token("request")
+        self.report_token_age()
+
+    async def get(self, *args, **kwargs):
+        await self.refresh_token()
+        return await self.inner.get(*args, **kwargs)
+
+    async def post(self, *args, **kwargs):
+        await self.refresh_token()
+        return await self.inner.post(*args, **kwargs)
@@ -1,8 +1,9 @@
 from collections import OrderedDict
 from dataclasses import dataclass
 from functools import wraps
+from threading import Event, Lock
 from time import monotonic_ns
-from typing import Generic, TypeVar
+from typing import Generic, Optional, TypeVar
 
 
 # pylint: disable = invalid-name
@@ -45,6 +46,131 @@ class TimedLRUCache(Generic[K, V]):
         if len(self.inner) > self.capacity:
             self.inner.popitem(last=False)
 
+    def clear(self):
+        self.inner.clear()
+
+
+@dataclass
+class _CacheSizedValue(Generic[V]):
+    """
+    Store a cached value together with its size and expiration timestamp.
+    """
+
+    value: V
+    size: int
+    expires_at: int
+
+
+class SizedTimedLRUCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache, bounded both by its number of entries and by the
+    total size of its values, with a timed expiration for each entry.
+    """
+
+    def __init__(self, maxsize: int, maxbytes: int, seconds: float):
+        self.inner = OrderedDict()
+        self.capacity = maxsize
+        self.max_bytes = maxbytes
+        self.ttl = int(seconds * 10**9)  # nanoseconds
+        self.size = 0
+        self.lock = Lock()
+
+    def _pop(self, key: K):
+        self.size -= self.inner.pop(key).size
+
+    def get(self, key: K) -> V:
+        with self.lock:
+            entry = self.inner.get(key)
+
+            if entry is None:
+                raise IndexError
+
+            if monotonic_ns() >= entry.expires_at:
+                self._pop(key)
+                raise IndexError
+
+            self.inner.move_to_end(key)
+            return entry.value
+
+    def put(self, key: K, value: V, size: int, seconds: Optional[float] = None):
+        """
+        Store a value, which will expire after `seconds` if it is shorter than
+        the default TTL of the cache. Values larger than the whole cache are
+        ignored.
+        """
+        if size > self.max_bytes or self.capacity <= 0:
+            return
+
+        ttl = self.ttl if seconds is None else min(self.ttl, int(seconds * 10**9))
+
+        with self.lock:
+            if key in self.inner:
+                self._pop(key)
+
+            self.inner[key] = _CacheSizedValue(value, size, monotonic_ns() + ttl)
+            self.size += size
+
+            while len(self.inner) > self.capacity or self.size > self.max_bytes:
+                _, entry = self.inner.popitem(last=False)
+                self.size -= entry.size
+
+    def clear(self):
+        with self.lock:
+            self.inner.clear()
+            self.size = 0
+
+
+class _SingleFlightCall:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run a function only once at a time for a given key: threads calling it
+    concurrently for the same key wait for the result of the running call.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.calls = {}
+
+    def do(self, key, f, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Call `f` or wait for the result of the pending call for `key`. If
+        the pending call takes more than `timeout` seconds, `f` is called
+        anyway.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self.calls[key] = _SingleFlightCall()
+
+        if not is_leader:
+            if not call.done.wait(timeout):
+                return f(*args, **kwargs)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = f(*args, **kwargs)
+            return call.result
+        except Exception as err:
+            call.error = err
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def is_running(self, key) -> bool:
+        with self.lock:
+            return key in self.calls
+
 
 def async_timed_lru_cache(seconds: float = 60.0, maxsize: int = 128):
     """
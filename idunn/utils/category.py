@@ -1,5 +1,7 @@
 import os
+import re
 from enum import Enum
+from typing import Optional
 
 from idunn.datasources.mimirsbrunn import MimirPoiFilter
 from idunn.utils.settings import _load_yaml_file
@@ -39,3 +41,35 @@ class CategoryEnum(str):
 
 # Load the list of categories as an enum for validation purpose
 Category = Enum("Category", {cat: cat for cat in ALL_CATEGORIES}, type=CategoryEnum)
+
+
+def build_categories_regex():
+    """
+    Combine regexes of all categories in a single pattern, matched from the
+    start of the text. Alternatives are tried in the order of the categories
+    and each of them looks ahead for its regex anywhere in the text, so that
+    the first category that matches wins.
+    """
+    categories = [cat for cat in Category if cat.regex()]
+    pattern = "|".join(f"(?=.*?(?:{cat.regex()}))(?P<cat{i}>)" for i, cat in enumerate(categories))
+    return re.compile(pattern, re.DOTALL), {f"cat{i}": cat for i, cat in enumerate(categories)}
+
+
+CATEGORIES_REGEX, CATEGORIES_REGEX_GROUPS = build_categories_regex()
+
+
+def match_category(text) -> Optional[Category]:
+    """
+    Find the first category which regex matches a normalized text.
+
+    >>> match_category("restau").value
+    'restaurant'
+    >>> match_category("pub").value
+    'bar'
+    >>> match_category("republique") is None
+    True
+    """
+    match = CATEGORIES_REGEX.match(text)
+    if match is None:
+        return None
+    return CATEGORIES_REGEX_GROUPS[match.lastgroup]
@@ -1,10 +1,10 @@
 import logging
 import csv
-import json
 from datetime import datetime, timedelta
 import requests
 from idunn import settings
 from idunn.utils.redis import RedisWrapper, CacheNotAvailable
+from idunn.utils.redis_codec import encode_value
 from pydantic import BaseModel
 from redis.lock import LockError
 
@@ -76,7 +76,7 @@ def update_covid19_osm_dataset():
         row["updated_at"] = updated_at
         pipe.set(
             f"{COVID19_POI_STATUS_KEY_PREFIX}{poi_id}",
-            json.dumps(row),
+            encode_value(row),
             ex=settings["COVID19_POI_EXPIRE"],
         )
         count += 1
@@ -86,12 +86,16 @@ def update_covid19_osm_dataset():
     logger.info("Success. %s POIs have been written from Covid19 dataset to Redis", count)
 
 
+def get_poi_covid_status_key(place_id):
+    return f"{COVID19_POI_STATUS_KEY_PREFIX}{place_id}"
+
+
 def get_poi_covid_status(place_id):
     if not RedisWrapper.init_cache():
         return None
 
     try:
-        value = RedisWrapper.get_json(f"{COVID19_POI_STATUS_KEY_PREFIX}{place_id}")
+        value = RedisWrapper.get_json(get_poi_covid_status_key(place_id))
         if not value:
             return None
         return OsmPoiCovidStatus(**value)
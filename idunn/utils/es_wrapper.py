@@ -1,6 +1,16 @@
+import asyncio
+import weakref
 from functools import lru_cache
 
+import httpx
+import orjson
 from elasticsearch import Elasticsearch, RequestsHttpConnection
+from elasticsearch.exceptions import (
+    HTTP_EXCEPTIONS,
+    ConnectionError as EsConnectionError,
+    ConnectionTimeout,
+    TransportError,
+)
 
 from idunn import settings
 
@@ -13,3 +23,83 @@ def get_mimir_elasticsearch():
         kwargs.update({"verify_certs": False, "connection_class": RequestsHttpConnection})
 
     return Elasticsearch(settings["MIMIR_ES"], **kwargs)
+
+
+class AsyncMimirElasticsearch:
+    """
+    Minimal asynchronous client for the subset of the Elasticsearch API that
+    is queried on Mimir.
+
+    The official async client requires aiohttp, this one relies on httpx like
+    other async clients in Idunn. Errors are reported with the exceptions of
+    the `elasticsearch` package, so that they can be handled the same way as
+    with the synchronous client.
+    """
+
+    def __init__(self, url: str):
+        max_connections = int(settings["MIMIR_ES_MAX_CONNECTIONS"])
+        self.client = httpx.AsyncClient(
+            base_url=url,
+            verify=settings["VERIFY_HTTPS"],
+            timeout=float(settings["MIMIR_ES_TIMEOUT"]),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            headers={"content-type": "application/json"},
+        )
+
+    async def perform_request(self, method: str, path: str, params=None, body=None):
+        try:
+            response = await self.client.request(
+                method,
+                path,
+                params=params,
+                content=orjson.dumps(body) if body is not None else None,
+            )
+        except httpx.TimeoutException as exc:
+            raise ConnectionTimeout("TIMEOUT", str(exc), exc) from exc
+        except httpx.HTTPError as exc:
+            raise EsConnectionError("N/A", str(exc), exc) from exc
+
+        try:
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            data = None
+
+        if not httpx.codes.is_success(response.status_code):
+            error = response.text
+            if isinstance(data, dict):
+                error = data.get("error", error)
+                if isinstance(error, dict) and "type" in error:
+                    error = error["type"]
+            raise HTTP_EXCEPTIONS.get(response.status_code, TransportError)(
+                response.status_code, error, data
+            )
+
+        return data
+
+    async def search(self, index: str, body: dict, params=None) -> dict:
+        return await self.perform_request("POST", f"{index}/_search", params=params, body=body)
+
+    async def mget(self, body: dict, params=None) -> dict:
+        return await self.perform_request("POST", "_mget", params=params, body=body)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+# httpx connections can't be shared across event loops, so a client is kept
+# for each running loop (the server runs a single one).
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_mimir_elasticsearch_async() -> AsyncMimirElasticsearch:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+
+    if client is None:
+        client = AsyncMimirElasticsearch(settings["MIMIR_ES"])
+        _async_clients[loop] = client
+
+    return client
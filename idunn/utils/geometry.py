@@ -1,6 +1,10 @@
 import json
+import math
 import os
+
+import numpy as np
 from shapely.geometry import MultiPolygon, box, shape
+from shapely.prepared import prep
 
 # Approximate shape of Metropolitan France
 # (source: https://download.geofabrik.de/europe/france.html)
@@ -64,17 +68,148 @@ def parse_poly(lines):
     return MultiPolygon(coords)
 
 
+class PreparedPolygon:
+    """
+    Polygon wrapped with structures that answer coverage queries quickly.
+
+    Cells of a coarse grid over the bounds of the polygon are classified as
+    fully inside, fully outside or crossing its border. Points and bboxes are
+    classified from these cells, and the exact geometry is only used for
+    points in border cells and for bboxes that are close to the threshold.
+    """
+
+    OUTSIDE = 0
+    INSIDE = 1
+    BORDER = 2
+
+    def __init__(self, polygon, cell_size=0.05):
+        self.polygon = polygon
+        self.prepared = prep(polygon)
+        self.cell_size = cell_size
+
+        minx, miny, maxx, maxy = polygon.bounds
+        self.minx, self.miny = minx, miny
+        self.ncols = max(math.ceil((maxx - minx) / cell_size), 1)
+        self.nrows = max(math.ceil((maxy - miny) / cell_size), 1)
+        self.cells = np.full((self.nrows, self.ncols), self.OUTSIDE, dtype=np.uint8)
+        self._classify(0, 0, self.nrows, self.ncols)
+
+        # Summed-area tables, to count inside and border cells of any range
+        self.inside_counts = self._summed_area(self.cells == self.INSIDE)
+        self.border_counts = self._summed_area(self.cells == self.BORDER)
+
+    @staticmethod
+    def _summed_area(mask):
+        table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+        table[1:, 1:] = mask.cumsum(axis=0).cumsum(axis=1)
+        return table.tolist()
+
+    def _cells_box(self, row0, col0, row1, col1):
+        return box(
+            self.minx + col0 * self.cell_size,
+            self.miny + row0 * self.cell_size,
+            self.minx + col1 * self.cell_size,
+            self.miny + row1 * self.cell_size,
+        )
+
+    def _classify(self, row0, col0, row1, col1):
+        """
+        Classify a range of cells, splitting it recursively while it crosses
+        the border of the polygon.
+        """
+        cells_box = self._cells_box(row0, col0, row1, col1)
+        if self.prepared.contains(cells_box):
+            self.cells[row0:row1, col0:col1] = self.INSIDE
+        elif not self.prepared.intersects(cells_box):
+            self.cells[row0:row1, col0:col1] = self.OUTSIDE
+        elif row1 - row0 == 1 and col1 - col0 == 1:
+            self.cells[row0, col0] = self.BORDER
+        else:
+            row_mid = (row0 + row1 + 1) // 2
+            col_mid = (col0 + col1 + 1) // 2
+            for rows in ((row0, row_mid), (row_mid, row1)):
+                for cols in ((col0, col_mid), (col_mid, col1)):
+                    if rows[0] < rows[1] and cols[0] < cols[1]:
+                        self._classify(rows[0], cols[0], rows[1], cols[1])
+
+    def _overlaps(self, start, end, origin, size):
+        """
+        Split the cells overlapped by [start, end] along an axis into ranges
+        of cells with the same overlap: (first cell, last cell + 1, length).
+        """
+        first = min(max(math.floor((start - origin) / self.cell_size), 0), size)
+        last = min(max(math.ceil((end - origin) / self.cell_size), first), size)
+        if first == last:
+            return []
+
+        def overlap(cell):
+            cell_start = origin + cell * self.cell_size
+            return min(cell_start + self.cell_size, end) - max(cell_start, start)
+
+        if last - first == 1:
+            return [(first, last, overlap(first))]
+        return [
+            (first, first + 1, overlap(first)),
+            (first + 1, last - 1, self.cell_size),
+            (last - 1, last, overlap(last - 1)),
+        ]
+
+    def _covered_area(self, table, rows, cols):
+        return sum(
+            height
+            * width
+            * (table[row1][col1] - table[row0][col1] - table[row1][col0] + table[row0][col0])
+            for row0, row1, height in rows
+            for col0, col1, width in cols
+        )
+
+    def contains(self, point) -> bool:
+        col = math.floor((point.x - self.minx) / self.cell_size)
+        row = math.floor((point.y - self.miny) / self.cell_size)
+        if not (0 <= row < self.nrows and 0 <= col < self.ncols):
+            return False
+
+        cell = self.cells[row, col]
+        if cell == self.BORDER:
+            return self.prepared.contains(point)
+        return cell == self.INSIDE
+
+    def covers_bbox(self, minx, miny, maxx, maxy, threshold) -> bool:
+        """
+        Check if more than `threshold` of the area of a bbox is covered by the
+        polygon.
+        """
+        area = (maxx - minx) * (maxy - miny)
+        if area <= 0:
+            return False
+
+        # Areas of the bbox covered by inside and border cells
+        cols = self._overlaps(minx, maxx, self.minx, self.ncols)
+        rows = self._overlaps(miny, maxy, self.miny, self.nrows)
+        inside_area = self._covered_area(self.inside_counts, rows, cols)
+        border_area = self._covered_area(self.border_counts, rows, cols)
+
+        if inside_area / area > threshold:
+            return True
+        if (inside_area + border_area) / area <= threshold:
+            return False
+        return self.polygon.intersection(box(minx, miny, maxx, maxy)).area / area > threshold
+
+
 # Load shape for France
 with open(france_poly_filename) as france_file:
-    france_polygon = parse_poly(france_file.readlines())
+    france_polygon = PreparedPolygon(parse_poly(france_file.readlines()))
 
 # Load shape for some cities surrounding
 with open(cities_surrounds_file, "r") as f:
     city_surrounds_polygons = {
-        city_name: shape(geojson) for city_name, geojson in json.load(f).items()
+        city_name: PreparedPolygon(shape(geojson), cell_size=0.01)
+        for city_name, geojson in json.load(f).items()
     }
 
 
 def bbox_inside_polygon(minx, miny, maxx, maxy, poly, threshold=0.75):
+    if isinstance(poly, PreparedPolygon):
+        return poly.covers_bbox(minx, miny, maxx, maxy, threshold)
     rect = box(minx, miny, maxx, maxy)
     return poly.intersection(rect).area / rect.area > threshold
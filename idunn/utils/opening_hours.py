@@ -1,11 +1,17 @@
 import os
 from datetime import date, datetime, time, timedelta
+from functools import lru_cache
 
 from py_mini_racer.py_mini_racer import MiniRacer, JSEvalException
 
+from idunn import settings
+from idunn.utils.opening_hours_rules import OpeningHoursRules, UnsupportedOpeningHours
+
 DIR = os.path.dirname(__file__)
 OPENING_HOURS_JS = os.path.join(DIR, "data/opening_hours.min.js")
 OPENING_HOURS_JS_WRAPPER = os.path.join(DIR, "data/opening_hours_wrapper.js")
+OPENING_HOURS_CACHE_SIZE = int(settings["OPENING_HOURS_CACHE_SIZE"])
+OPENING_HOURS_WEEKS_CACHE_SIZE = int(settings["OPENING_HOURS_WEEKS_CACHE_SIZE"])
 
 
 class OpeningHoursEngine:
@@ -35,27 +41,66 @@ class OpeningHoursEngine:
 engine = OpeningHoursEngine()
 
 
+def get_nmt_obj(country_code):
+    if country_code:
+        return {"address": {"country_code": country_code.lower()}}
+    return None
+
+
+@lru_cache(maxsize=OPENING_HOURS_CACHE_SIZE)
+def parse_rules(raw):
+    """
+    Parse an expression with the Python implementation, or return None if its
+    syntax is not supported (the JS engine is then used instead).
+
+    Parsed rules are shared and must not be mutated.
+    """
+    try:
+        return OpeningHoursRules(raw)
+    except UnsupportedOpeningHours:
+        return None
+
+
+@lru_cache(maxsize=OPENING_HOURS_CACHE_SIZE)
+def validate_with_engine(raw, country_code):
+    """
+    Check if an expression parses correctly with the JS engine.
+
+    :return: a tuple with the result, and the country code that should be
+        used to evaluate the expression (None if its holidays are not
+        supported)
+    """
+    try:
+        engine.call("validate", raw, get_nmt_obj(country_code))
+    except JSEvalException as exc:
+        if country_code and "no holidays" in str(exc):
+            # The OH library does not support public/school holidays in the current country
+            # Let's ignore the location-dependant holidays for the evaluation
+            return validate_with_engine(raw, None)
+        return False, country_code
+    return True, country_code
+
+
 class OpeningHours:
     def __init__(self, oh, tz, country_code):
         self.raw = oh
         self.tz = tz
-        if country_code:
-            self.nmt_obj = {"address": {"country_code": country_code.lower()}}
-        else:
-            self.nmt_obj = None
+        self.country_code = country_code
+        self.rules = parse_rules(oh)
+        self.nmt_obj = get_nmt_obj(country_code)
+
+    def to_local_naive(self, dt):
+        # Same precision as datetimes passed to the JS engine
+        return dt.astimezone(self.tz).replace(tzinfo=None, microsecond=0)
 
     def validate(self):
         """Check if an expression parses correctly"""
-        try:
-            engine.call("validate", self.raw, self.nmt_obj)
-        except JSEvalException as exc:
-            if self.nmt_obj is not None and "no holidays" in str(exc):
-                # The OH library does not support public/school holidays in the current country
-                # Let's ignore the location-dependant holidays for the evaluation
-                self.nmt_obj = None
-                return self.validate()
-            return False
-        return True
+        if self.rules is not None:
+            return True
+
+        is_valid, self.country_code = validate_with_engine(self.raw, self.country_code)
+        self.nmt_obj = get_nmt_obj(self.country_code)
+        return is_valid
 
     def is_24_7(self, dt):
         """Check if this is always open starting from a given date"""
@@ -65,6 +110,10 @@ class OpeningHours:
     def is_open(self, dt):
         """Check if open at a given time"""
         assert isinstance(dt, datetime)
+
+        if self.rules is not None:
+            return self.rules.is_open(self.to_local_naive(dt))
+
         return engine.call("wrapIsOpen", self.raw, self.nmt_obj, dt.astimezone(self.tz).isoformat())
 
     def is_open_at_date(self, d):
@@ -77,6 +126,14 @@ class OpeningHours:
     def next_change(self, dt):
         """Get datetime of next change of state"""
         assert isinstance(dt, datetime)
+
+        if self.rules is not None:
+            try:
+                naive_dt = self.rules.next_change(self.to_local_naive(dt))
+                return self.tz.localize(naive_dt) if naive_dt is not None else None
+            except UnsupportedOpeningHours:
+                pass
+
         naive_date = engine.call(
             "wrapNextChange", self.raw, self.nmt_obj, dt.astimezone(self.tz).isoformat()
         )
@@ -90,6 +147,15 @@ class OpeningHours:
         """Get opened intervals for a period of time"""
         assert isinstance(start, datetime)
         assert isinstance(end, datetime)
+
+        if self.rules is not None:
+            return [
+                (self.tz.localize(rg_start), self.tz.localize(rg_end), False, None)
+                for rg_start, rg_end in self.rules.get_open_intervals(
+                    self.to_local_naive(start), self.to_local_naive(end)
+                )
+            ]
+
         return [
             (
                 self.tz.localize(datetime.fromisoformat(start)),
@@ -117,6 +183,26 @@ class OpeningHours:
         start = self.tz.localize(datetime.combine(d, time(0, 0)))
         end = self.tz.localize(datetime.combine(d + timedelta(1), time(0, 0)))
 
+        # Query open intervals for previous and next day
+        intervals = self.get_open_intervals(start - timedelta(days=1), end + timedelta(days=1))
+        return self.filter_intervals_at_date(intervals, d, overlap_next_day)
+
+    def get_week_intervals(self, monday):
+        """
+        Get opening intervals of each day of the week starting at a given
+        date, as returned by `get_open_intervals_at_date` with
+        overlap_next_day set. Results are shared across instances.
+        """
+        return get_week_intervals(self.raw, self.country_code, self.tz, monday)
+
+    def filter_intervals_at_date(self, intervals, d, overlap_next_day=False):
+        """
+        Keep opening intervals belonging to a given date, see
+        `get_open_intervals_at_date`.
+        """
+        start = self.tz.localize(datetime.combine(d, time(0, 0)))
+        end = self.tz.localize(datetime.combine(d + timedelta(1), time(0, 0)))
+
         def map_interval(interval):
             rg_start, rg_end, unknown, comment = interval
 
@@ -142,6 +228,24 @@ class OpeningHours:
 
             return (rg_start, rg_end, unknown, comment)
 
-        # Query open intervals for previous and next day and use previously defined filter
-        intervals = self.get_open_intervals(start - timedelta(days=1), end + timedelta(days=1))
         return list(filter(None, map(map_interval, intervals)))
+
+
+@lru_cache(maxsize=OPENING_HOURS_WEEKS_CACHE_SIZE)
+def get_week_intervals(raw, country_code, tz, monday):
+    oh = OpeningHours(raw, tz, country_code)
+    oh.validate()
+
+    # Open intervals for the whole week are queried at once
+    start = tz.localize(datetime.combine(monday - timedelta(days=1), time(0, 0)))
+    end = tz.localize(datetime.combine(monday + timedelta(days=8), time(0, 0)))
+    intervals = oh.get_open_intervals(start, end)
+
+    return tuple(
+        tuple(
+            oh.filter_intervals_at_date(
+                intervals, monday + timedelta(days=i), overlap_next_day=True
+            )
+        )
+        for i in range(7)
+    )
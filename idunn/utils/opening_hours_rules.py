@@ -0,0 +1,371 @@
+"""
+Python evaluation of the most common subset of the OSM opening_hours syntax.
+
+The semantics follow the opening_hours.js library, which is still used by
+`idunn.utils.opening_hours` for expressions that are not supported here:
+https://github.com/opening-hours/opening_hours.js
+
+Supported syntax is made of rules separated by ";" (normal rules) or ","
+(additional rules), each rule being composed of:
+  - "24/7", or an optional list of months or dates ("Jan-Mar", "Dec 25",
+    "Nov 3-Apr 30", optionally followed by ":") and an optional list of
+    weekdays ("Mo-Fr,Su")
+  - an optional list of time ranges ("10:00-12:00,14:00-26:00")
+  - an optional "open", "closed" or "off" modifier
+
+Public holidays, sun events, years, weeks, comments or "unknown" states
+raise `UnsupportedOpeningHours`.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+FULL_DAY = (1 << MINUTES_PER_DAY) - 1
+
+WEEKDAYS = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+# Feb 29 is not supported
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+MODIFIERS = {"open": True, "closed": False, "off": False}
+
+# Without date selectors, an expression describes a weekly schedule: if its
+# state doesn't change for more than a week, it never changes.
+WEEKLY_HORIZON = 8
+# Dates from selectors all occur in a year (ignoring leap days).
+YEARLY_HORIZON = 367 + WEEKLY_HORIZON
+
+TOKENS_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<rule_24_7>24/7)"
+    r"|(?P<time>\d\d:\d\d)"
+    r"|(?P<number>\d{1,2})(?!\d)"
+    r"|(?P<weekday>Mo|Tu|We|Th|Fr|Sa|Su)\b"
+    r"|(?P<month>Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\b"
+    r"|(?P<modifier>open|closed|off)\b"
+    r"|(?P<symbol>[-,;:])"
+    r")\s*"
+)
+
+
+class UnsupportedOpeningHours(ValueError):
+    pass
+
+
+def tokenize(raw: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    while pos < len(raw):
+        match = TOKENS_RE.match(raw, pos)
+        if match is None or match.end() == pos:
+            raise UnsupportedOpeningHours(f"Unexpected syntax at position {pos}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "symbol":
+            kind = value
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+@dataclass
+class Rule:
+    is_additional: bool
+    is_open: bool
+    # Inclusive ranges of (month, day), possibly wrapping over the year
+    date_ranges: Optional[List[Tuple[Tuple[int, int], Tuple[int, int]]]]
+    # Indexes of the matching weekdays
+    weekdays: Optional[frozenset]
+    # Ranges of minutes since the beginning of the day, ending at 48:00 at most
+    times: Optional[List[Tuple[int, int]]]
+    # Whether this rule resets the state of the days it matches
+    overrides: bool = False
+
+    @property
+    def has_day_selectors(self) -> bool:
+        return self.date_ranges is not None or self.weekdays is not None
+
+    def matches(self, day: date) -> bool:
+        if self.weekdays is not None and day.weekday() not in self.weekdays:
+            return False
+        if self.date_ranges is not None:
+            month_day = (day.month, day.day)
+            return any(
+                (start <= month_day <= end)
+                if start <= end
+                else (month_day >= start or month_day <= end)
+                for start, end in self.date_ranges
+            )
+        return True
+
+
+class Parser:
+    def __init__(self, raw: str):
+        self.tokens = tokenize(raw)
+        self.pos = 0
+
+    def peek(self, offset=0):
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset][0]
+        return None
+
+    def take(self, kind):
+        token_kind, value = self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+        if token_kind != kind:
+            raise UnsupportedOpeningHours(f"Expected {kind}, got {token_kind}")
+        self.pos += 1
+        return value
+
+    def parse(self) -> List[Rule]:
+        rules = [self.parse_rule(is_additional=False)]
+        while self.peek() is not None:
+            separator = self.take(self.peek())
+            if separator not in (";", ","):
+                raise UnsupportedOpeningHours(f"Unexpected token '{separator}'")
+            if (
+                separator == ","
+                and rules[-1].times is None
+                and self.tokens[self.pos - 2][0] != "modifier"
+            ):
+                # Rejected by opening_hours.js
+                raise UnsupportedOpeningHours("Unexpected additional rule")
+            rules.append(self.parse_rule(is_additional=separator == ","))
+
+        # Like in opening_hours.js, a normal rule without day selectors only
+        # overrides previous rules if the previous one doesn't select days
+        # either.
+        for prev, rule in zip([None] + rules, rules):
+            rule.overrides = (
+                rule.is_open
+                and not rule.is_additional
+                and (rule.has_day_selectors or (prev is not None and not prev.has_day_selectors))
+            )
+
+        return rules
+
+    def parse_rule(self, is_additional) -> Rule:
+        date_ranges = weekdays = times = None
+        start = self.pos
+
+        if self.peek() == "rule_24_7":
+            self.take("rule_24_7")
+        else:
+            if self.peek() == "month":
+                date_ranges = self.parse_list(self.parse_date_range, "month")
+                if len({is_month for _, _, is_month in date_ranges}) > 1:
+                    raise UnsupportedOpeningHours("Mixed months and dates")
+                date_ranges = [(start, end) for start, end, _ in date_ranges]
+                if self.peek() == ":":
+                    self.take(":")
+                    if self.peek() in (None, ";", ","):
+                        raise UnsupportedOpeningHours("Empty rule after ':'")
+            if self.peek() == "weekday":
+                weekdays = frozenset().union(*self.parse_list(self.parse_weekday_range, "weekday"))
+            if self.peek() == "time":
+                times = self.parse_list(self.parse_time_range, "time")
+
+        is_open = True
+        if self.peek() == "modifier":
+            is_open = MODIFIERS[self.take("modifier")]
+
+        if self.pos == start:
+            raise UnsupportedOpeningHours("Empty rule")
+        if self.peek() not in (None, ";", ","):
+            raise UnsupportedOpeningHours(f"Unexpected token '{self.peek()}'")
+
+        return Rule(
+            is_additional=is_additional,
+            is_open=is_open,
+            date_ranges=date_ranges,
+            weekdays=weekdays,
+            times=times,
+        )
+
+    def parse_list(self, parse_item, kind):
+        items = [parse_item()]
+        while self.peek() == "," and self.peek(1) == kind:
+            self.take(",")
+            items.append(parse_item())
+        return items
+
+    def parse_month_day(self):
+        month = MONTHS.index(self.take("month")) + 1
+        if self.peek() != "number":
+            return month, None
+        day = int(self.take("number"))
+        if not 1 <= day <= DAYS_IN_MONTH[month - 1]:
+            raise UnsupportedOpeningHours(f"Invalid day {day} in month {month}")
+        return month, day
+
+    def parse_date_range(self):
+        start_month, start_day = self.parse_month_day()
+        end_month, end_day = start_month, start_day
+
+        if self.peek() == "-":
+            self.take("-")
+            if start_day is not None and self.peek() == "number":
+                end_day = int(self.take("number"))
+                if not start_day <= end_day <= DAYS_IN_MONTH[start_month - 1]:
+                    raise UnsupportedOpeningHours(f"Invalid day {end_day}")
+                if (start_month, end_day) == (2, 28):
+                    # Never matched by opening_hours.js
+                    raise UnsupportedOpeningHours("Unsupported range ending on Feb 28")
+            else:
+                end_month, end_day = self.parse_month_day()
+                if (start_day is None) != (end_day is None):
+                    raise UnsupportedOpeningHours("Mixed month and date in range")
+                if start_month == end_month and (start_day or 0) > (end_day or 0):
+                    raise UnsupportedOpeningHours("Unsupported range wrapping over a month")
+
+        if start_day is None:
+            return (start_month, 1), (end_month, 31), True
+        return (start_month, start_day), (end_month, end_day), False
+
+    def parse_weekday_range(self):
+        start = WEEKDAYS.index(self.take("weekday"))
+        end = start
+        if self.peek() == "-":
+            self.take("-")
+            end = WEEKDAYS.index(self.take("weekday"))
+        return {(start + i) % 7 for i in range((end - start) % 7 + 1)}
+
+    def parse_time_range(self):
+        start = self.parse_time(self.take("time"))
+        self.take("-")
+        end = self.parse_time(self.take("time"))
+
+        if start >= MINUTES_PER_DAY or end > 2 * MINUTES_PER_DAY or start == end:
+            raise UnsupportedOpeningHours("Unsupported time range")
+        if end < start:
+            end += MINUTES_PER_DAY
+        if end > 2 * MINUTES_PER_DAY:
+            raise UnsupportedOpeningHours("Unsupported time range")
+        return start, end
+
+    @staticmethod
+    def parse_time(value):
+        hours, minutes = map(int, value.split(":"))
+        if minutes >= 60:
+            raise UnsupportedOpeningHours(f"Invalid time {value}")
+        return hours * 60 + minutes
+
+
+def minutes_mask(start, end):
+    return ((1 << (end - start)) - 1) << start
+
+
+def iter_mask_ranges(mask):
+    """
+    Iterate over the ranges of consecutive bits set in a mask
+    """
+    offset = 0
+    while mask:
+        skip = (mask & -mask).bit_length() - 1
+        mask >>= skip
+        offset += skip
+        length = (~mask & (mask + 1)).bit_length() - 1
+        yield offset, offset + length
+        mask >>= length
+        offset += length
+
+
+class OpeningHoursRules:
+    def __init__(self, raw: str):
+        self.rules = Parser(raw).parse()
+        self.horizon = (
+            YEARLY_HORIZON
+            if any(rule.date_ranges is not None for rule in self.rules)
+            else WEEKLY_HORIZON
+        )
+
+    def get_day_masks(self, first_day: date, nb_days: int) -> List[int]:
+        """
+        Compute the opened minutes of consecutive days, as a bit mask for each
+        day.
+        """
+        # Rules matching the day before may overlap over the first day
+        days = [first_day + timedelta(days=i - 1) for i in range(nb_days + 1)]
+        masks = [0] * len(days)
+
+        for rule in self.rules:
+            matching = [i for i, day in enumerate(days) if rule.matches(day)]
+
+            if rule.times is None or rule.overrides:
+                for i in matching:
+                    masks[i] = 0
+
+            if rule.times is None:
+                if rule.is_open:
+                    for i in matching:
+                        masks[i] = FULL_DAY
+                continue
+
+            for i in matching:
+                for start, end in rule.times:
+                    self.apply(masks, i, minutes_mask(start, min(end, MINUTES_PER_DAY)), rule)
+                    if end > MINUTES_PER_DAY and i + 1 < len(masks):
+                        self.apply(masks, i + 1, minutes_mask(0, end - MINUTES_PER_DAY), rule)
+
+        return masks[1:]
+
+    @staticmethod
+    def apply(masks, i, mask, rule):
+        if rule.is_open:
+            masks[i] |= mask
+        else:
+            masks[i] &= ~mask
+
+    def iter_intervals(self, first_day: date, nb_days: int):
+        """
+        Iterate over merged opened intervals of consecutive days
+        """
+        current_start, current_end = None, None
+        for i, mask in enumerate(self.get_day_masks(first_day, nb_days)):
+            day_start = datetime.combine(first_day + timedelta(days=i), time(0, 0))
+            for start, end in iter_mask_ranges(mask):
+                start = day_start + timedelta(minutes=start)
+                end = day_start + timedelta(minutes=end)
+                if current_end == start:
+                    current_end = end
+                    continue
+                if current_start is not None:
+                    yield current_start, current_end
+                current_start, current_end = start, end
+        if current_start is not None:
+            yield current_start, current_end
+
+    def get_open_intervals(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """
+        Get opened intervals between two naive local datetimes
+        """
+        nb_days = (end.date() - start.date()).days + 1
+        return [
+            (max(rg_start, start), min(rg_end, end))
+            for rg_start, rg_end in self.iter_intervals(start.date(), nb_days)
+            if rg_start < end and rg_end > start
+        ]
+
+    def is_open(self, dt: datetime) -> bool:
+        return any(start <= dt < end for start, end in self.iter_intervals(dt.date(), 1))
+
+    def next_change(self, dt: datetime) -> Optional[datetime]:
+        """
+        Get the next change of state after a naive local datetime. Raises
+        `UnsupportedOpeningHours` if no change could be found in a year
+        although some rules depend on dates, as the state could still
+        change later.
+        """
+        horizon = datetime.combine(dt.date() + timedelta(days=self.horizon), time(0, 0))
+
+        for start, end in self.iter_intervals(dt.date(), self.horizon):
+            if end <= dt:
+                continue
+            change = start if start > dt else end
+            if change < horizon:
+                return change
+            break
+
+        if self.horizon == YEARLY_HORIZON:
+            raise UnsupportedOpeningHours("No change of state in the next year")
+        return None
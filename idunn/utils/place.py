@@ -1,5 +1,12 @@
-from idunn.datasources.mimirsbrunn import fetch_es_place, get_es_place_type
-from idunn.utils.es_wrapper import get_mimir_elasticsearch
+import asyncio
+
+from idunn.datasources.mimirsbrunn import (
+    fetch_es_place,
+    fetch_es_place_async,
+    fetch_es_places_async,
+    get_es_place_type,
+)
+from idunn.utils.es_wrapper import get_mimir_elasticsearch, get_mimir_elasticsearch_async
 from idunn.utils import prometheus
 
 from ..datasources.pages_jaunes import pj_source
@@ -8,6 +15,49 @@ from ..places.exceptions import InvalidPlaceId, PlaceNotFound, RedirectToPlaceId
 from ..places.poi import POI, PoiFactory
 
 
+def split_place_id(id: str):
+    try:
+        namespace, suffix = id.split(":", 1)
+    except ValueError as exc:
+        raise InvalidPlaceId(id) from exc
+    return namespace, suffix
+
+
+def get_substitute_latlon_id(namespace, suffix):
+    """
+    A Latlon place can be used as a substitute for a "addr:<lon>;<lat>" id
+    that is not present in the database anymore.
+    """
+    if namespace != "addr":
+        return None
+    try:
+        lon, lat = suffix.split(":", 1)[0].split(";")
+        return Latlon(lat=lat, lon=lon).get_id()
+    except ValueError:
+        return None
+
+
+def place_from_es(id: str, es_place, lang: str):
+    places = {
+        "admin": Admin,
+        "street": Street,
+        "addr": Address,
+        "poi": POI,
+        "poi_tripadvisor": POI,
+    }
+
+    place_type = get_es_place_type(es_place)
+    loader = places.get(place_type)
+
+    if loader is None:
+        prometheus.exception("FoundPlaceWithWrongType")
+        raise Exception(f"Place with id '{id}' has a wrong type: '{place_type}'")
+
+    if loader is POI:
+        return PoiFactory().get_poi(es_place["_source"], lang=lang)
+    return loader(es_place["_source"])
+
+
 def place_from_id(id: str, lang: str, type=None, follow_redirect=False):
     """
     :param id: place id
@@ -15,10 +65,7 @@ def place_from_id(id: str, lang: str, type=None, follow_redirect=False):
     :param follow_redirect: if false, RedirectToPlaceId may be raised
     :return: Place
     """
-    try:
-        namespace, suffix = id.split(":", 1)
-    except ValueError as exc:
-        raise InvalidPlaceId(id) from exc
+    namespace, suffix = split_place_id(id)
 
     # Handle place from "pages jaunes"
     if namespace == pj_source.PLACE_ID_NAMESPACE:
@@ -37,35 +84,64 @@ def place_from_id(id: str, lang: str, type=None, follow_redirect=False):
     try:
         es_place = fetch_es_place(id, es, type)
     except PlaceNotFound as exc:
-        if namespace == "addr":
-            # A Latlon place can be used as a substitute for a "addr:<lon>;<lat>" id
-            # that is not present in the database anymore
-            try:
-                lon, lat = suffix.split(":", 1)[0].split(";")
-                latlon_id = Latlon(lat=lat, lon=lon).get_id()
-            except ValueError:
-                pass
-            else:
-                if not follow_redirect:
-                    raise RedirectToPlaceId(latlon_id) from exc
-                return place_from_id(latlon_id, lang, follow_redirect=False)
+        latlon_id = get_substitute_latlon_id(namespace, suffix)
+        if latlon_id is not None:
+            if not follow_redirect:
+                raise RedirectToPlaceId(latlon_id) from exc
+            return place_from_id(latlon_id, lang, follow_redirect=False)
         raise
 
-    places = {
-        "admin": Admin,
-        "street": Street,
-        "addr": Address,
-        "poi": POI,
-        "poi_tripadvisor": POI,
-    }
+    return place_from_es(id, es_place, lang)
 
-    place_type = get_es_place_type(es_place)
-    loader = places.get(place_type)
 
-    if loader is None:
-        prometheus.exception("FoundPlaceWithWrongType")
-        raise Exception(f"Place with id '{id}' has a wrong type: '{place_type}'")
+async def place_from_id_async(id: str, lang: str, type=None, follow_redirect=False):
+    """
+    Same as `place_from_id`, without blocking the event loop while waiting
+    for Elasticsearch.
+    """
+    namespace, suffix = split_place_id(id)
 
-    if loader is POI:
-        return PoiFactory().get_poi(es_place["_source"], lang=lang)
-    return loader(es_place["_source"])
+    # Handle place from "pages jaunes"
+    if namespace == pj_source.PLACE_ID_NAMESPACE:
+        return await pj_source.get_place_async(id)
+
+    # Handle place from tripadvisor
+    if namespace == "ta":
+        type = "poi_tripadvisor"
+
+    # Simple latlon place id
+    if namespace == Latlon.PLACE_ID_NAMESPACE:
+        return Latlon.from_id(id)
+
+    # Otherwise handle places from the ES db
+    es = get_mimir_elasticsearch_async()
+    try:
+        es_place = await fetch_es_place_async(id, es, type)
+    except PlaceNotFound as exc:
+        latlon_id = get_substitute_latlon_id(namespace, suffix)
+        if latlon_id is not None:
+            if not follow_redirect:
+                raise RedirectToPlaceId(latlon_id) from exc
+            return Latlon.from_id(latlon_id)
+        raise
+
+    return place_from_es(id, es_place, lang)
+
+
+async def places_from_ids_async(ids, lang: str, follow_redirect=False) -> dict:
+    """
+    Fetch several places at once. Places stored in Mimir are fetched with a
+    single request when possible, others are fetched concurrently with
+    `place_from_id_async`.
+
+    :return: a dict with the place or the exception raised for each id
+    """
+    es_places = await fetch_es_places_async(ids, get_mimir_elasticsearch_async())
+
+    async def get_place(id):
+        if id in es_places:
+            return place_from_es(id, es_places[id], lang)
+        return await place_from_id_async(id, lang, follow_redirect=follow_redirect)
+
+    places = await asyncio.gather(*(get_place(id) for id in ids), return_exceptions=True)
+    return dict(zip(ids, places))
@@ -30,6 +30,50 @@ IDUNN_EXCEPTIONS_COUNT = Counter(
     ["exception_type"],
 )
 
+IDUNN_LOCAL_CACHE_REQUESTS_COUNT = Counter(
+    "idunn_local_cache_requests_count",
+    "Number of lookups in the in-process cache in front of Redis",
+    ["prefix", "result"],
+)
+
+IDUNN_CACHE_REFRESH_COUNT = Counter(
+    "idunn_cache_refresh_count",
+    "Number of background refreshes of values cached in Redis",
+    ["prefix", "reason"],
+)
+
+IDUNN_NLU_CACHE_REQUESTS_COUNT = Counter(
+    "idunn_nlu_cache_requests_count",
+    "Number of requests to NLU services and geocoder which were skipped or not by the cache of"
+    " intentions",
+    ["stage", "result"],
+)
+
+IDUNN_COALESCED_REQUESTS_COUNT = Counter(
+    "idunn_coalesced_requests_count",
+    "Number of requests to upstream services which awaited an identical request in flight",
+    ["client"],
+)
+
+IDUNN_HEDGED_REQUESTS_COUNT = Counter(
+    "idunn_hedged_requests_count",
+    "Number of requests to upstream services by hedging outcome (not_hedged, budget_exhausted,"
+    " primary_won, hedge_won)",
+    ["client", "result"],
+)
+
+IDUNN_AUTH_TOKEN_AGE = Gauge(
+    "idunn_auth_token_age_seconds",
+    "Age of the authentication token used by a session when sending a request",
+    ["session"],
+)
+
+IDUNN_AUTH_TOKEN_REFRESH_DURATION = Histogram(
+    "idunn_auth_token_refresh_duration_seconds",
+    "Time spent querying a new authentication token, in the background or during a request",
+    ["session", "trigger"],
+)
+
 IDUNN_ASYNC_TASKS_COUNT = Gauge(
     "idunn_async_tasks_count",
     "Number of async tasks currently running",
@@ -43,10 +87,40 @@ def wiki_request_duration(target, handler):
         yield
 
 
+@contextlib.contextmanager
+def auth_token_refresh_duration(session, trigger):
+    with IDUNN_AUTH_TOKEN_REFRESH_DURATION.labels(session, trigger).time():
+        yield
+
+
+def auth_token_age(session, age):
+    IDUNN_AUTH_TOKEN_AGE.labels(session).set(age)
+
+
 def exception(exception_type):
     IDUNN_EXCEPTIONS_COUNT.labels(exception_type).inc()
 
 
+def local_cache_request(prefix, hit: bool):
+    IDUNN_LOCAL_CACHE_REQUESTS_COUNT.labels(prefix, "hit" if hit else "miss").inc()
+
+
+def cache_refresh(prefix, reason):
+    IDUNN_CACHE_REFRESH_COUNT.labels(prefix, reason).inc()
+
+
+def nlu_cache_request(stage, result):
+    IDUNN_NLU_CACHE_REQUESTS_COUNT.labels(stage, result).inc()
+
+
+def coalesced_request(client):
+    IDUNN_COALESCED_REQUESTS_COUNT.labels(client).inc()
+
+
+def hedged_request(client, result):
+    IDUNN_HEDGED_REQUESTS_COUNT.labels(client, result).inc()
+
+
 # code from apistar_prometheus
 _HEADERS = {"content-type": CONTENT_TYPE_LATEST}
 
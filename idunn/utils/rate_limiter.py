@@ -43,7 +43,11 @@ class IdunnRateLimiter:
         else:
             self._limiter = None
 
-    def limit(self, client, ignore_redis_error=False):
+    def limit(self, client, ignore_redis_error=False, cost=1):
+        """
+        Count `cost` requests of the client, which can't exceed the maximum
+        number of requests.
+        """
         # Handle lazy initialization of the redis pool for test context
         if (redis_pool is None) ^ (self._limiter is None):
             self._init_limiter()
@@ -54,8 +58,8 @@ class IdunnRateLimiter:
         @contextmanager
         def limit():
             try:
-                with self._limiter.limit(client):
-                    yield
+                self._limiter.limit(client).increment_usage(min(cost, self.max_requests))
+                yield
             except RedisError:
                 if ignore_redis_error:
                     logger.warning(
@@ -69,7 +73,7 @@ class IdunnRateLimiter:
 
         return limit()
 
-    def check_limit_per_client(self, request):
+    def check_limit_per_client(self, request, cost=1):
         client_id = request.headers.get("x-client-hash")
 
         if client_id is None:
@@ -77,16 +81,21 @@ class IdunnRateLimiter:
             return
 
         try:
-            with self.limit(client=client_id, ignore_redis_error=True):
+            with self.limit(client=client_id, ignore_redis_error=True, cost=cost):
                 pass
         except TooManyRequestsException as exc:
             raise HTTPException(status_code=429, detail="Too Many Requests") from exc
 
 
-def rate_limiter_dependency(**kwargs):
+def rate_limiter_dependency(request_cost=None, **kwargs):
+    """
+    Rate limit the requests per client. A request counts as `request_cost(request)`
+    requests if this function is provided.
+    """
     rate_limiter = IdunnRateLimiter(**kwargs)
 
     def dependency(request: Request):
-        rate_limiter.check_limit_per_client(request)
+        cost = request_cost(request) if request_cost else 1
+        rate_limiter.check_limit_per_client(request, cost=cost)
 
     return Depends(dependency)
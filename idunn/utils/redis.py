@@ -1,20 +1,53 @@
-import json
+import asyncio
 import logging
+import math
+import random
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Tuple
+
 from redis import Redis, ConnectionPool, RedisError
+from redis.asyncio import Redis as AsyncRedis, ConnectionPool as AsyncConnectionPool
+from redis.exceptions import LockError
 from idunn import settings
 from idunn.utils import prometheus
+from idunn.utils.cache import SingleFlight, SizedTimedLRUCache
+from idunn.utils.redis_codec import (
+    InvalidCacheValue,
+    decode_value,
+    decode_value_with_size,
+    encode_value_with_size,
+)
 
 logger = logging.getLogger(__name__)
 REDIS_TIMEOUT = float(settings["REDIS_TIMEOUT"])
+REDIS_CACHE_STALE_TTL = int(settings["REDIS_CACHE_STALE_TTL"])
+REDIS_CACHE_EARLY_REFRESH = float(settings["REDIS_CACHE_EARLY_REFRESH"])
+REDIS_CACHE_LEASE_TIMEOUT = float(settings["REDIS_CACHE_LEASE_TIMEOUT"])
+REDIS_CACHE_LEASE_WAIT = float(settings["REDIS_CACHE_LEASE_WAIT"])
+
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=int(settings["REDIS_CACHE_REFRESH_WORKERS"]), thread_name_prefix="cache_refresh"
+)
 
 DISABLED_STATE = object()  # Used to flag cache as disabled by settings
 
+# Values and TTLs fetched in advance for the current request, which are read
+# instead of querying Redis again (see `RedisWrapper.use_prefetched_values`)
+_prefetched_values: ContextVar[Optional[Dict[str, Tuple[Optional[bytes], int]]]] = ContextVar(
+    "prefetched_redis_values", default=None
+)
+
 
 class RedisNotConfigured(RedisError):
     pass
 
 
-def get_redis_pool(db):
+def get_redis_url():
     redis_url = settings["REDIS_URL"]
     if redis_url is None:
         # Fallback to old setting name
@@ -27,7 +60,15 @@ def get_redis_pool(db):
 
     if not redis_url.startswith("redis://"):
         redis_url = "redis://" + redis_url
-    return ConnectionPool.from_url(url=redis_url, socket_timeout=REDIS_TIMEOUT, db=db)
+    return redis_url
+
+
+def get_redis_pool(db):
+    return ConnectionPool.from_url(url=get_redis_url(), socket_timeout=REDIS_TIMEOUT, db=db)
+
+
+def get_async_redis_pool(db):
+    return AsyncConnectionPool.from_url(url=get_redis_url(), socket_timeout=REDIS_TIMEOUT, db=db)
 
 
 class CacheNotAvailable(Exception):
@@ -37,6 +78,19 @@ class CacheNotAvailable(Exception):
 class RedisWrapper:
     _connection = None
 
+    # In-process cache of decoded values, which avoids a round trip to Redis
+    # for the hottest keys. Cached values are shared and must not be mutated.
+    # Their size is the one of their serialization before compression.
+    _local_cache = SizedTimedLRUCache(
+        maxsize=int(settings["REDIS_LOCAL_CACHE_MAX_ENTRIES"]),
+        maxbytes=int(settings["REDIS_LOCAL_CACHE_MAX_BYTES"]),
+        seconds=float(settings["REDIS_LOCAL_CACHE_TTL"]),
+    )
+
+    _single_flight = SingleFlight()
+    _refreshing = set()
+    _refreshing_lock = Lock()
+
     @classmethod
     def _set_value(cls, key, value, expire=settings["WIKI_CACHE_TIMEOUT"], raise_on_error=False):
         try:
@@ -49,6 +103,10 @@ class RedisWrapper:
 
     @classmethod
     def _get_value(cls, key):
+        prefetched = _prefetched_values.get()
+        if prefetched is not None and key in prefetched:
+            return prefetched[key][0]
+
         try:
             value_stored = cls._connection.get(key)
             return value_stored
@@ -60,13 +118,27 @@ class RedisWrapper:
     def get_json(cls, key):
         value = cls._get_value(key)
         if value is not None:
-            value = json.loads(value)
+            try:
+                value = decode_value(value)
+            except InvalidCacheValue:
+                cls._report_invalid_value(key)
+                return None
         return value
 
+    @staticmethod
+    def _report_invalid_value(key):
+        """
+        Values that can't be decoded are handled as missing, so that they
+        are computed again and overwritten.
+        """
+        prometheus.exception("InvalidCacheValue")
+        logger.warning("Failed to decode cached value for %s", key, exc_info=True)
+
     @classmethod
     def init_cache(cls):
         if cls._connection is not None:
             return cls._connection is not DISABLED_STATE
+        cls._local_cache.clear()
         redis_db = settings["WIKI_CACHE_REDIS_DB"]
         try:
             redis_pool = get_redis_pool(db=redis_db)
@@ -79,11 +151,157 @@ class RedisWrapper:
             return True
 
     @classmethod
-    def cache_it(cls, key, f, expire=settings["WIKI_CACHE_TIMEOUT"]):
+    def _get_value_with_ttl(cls, key):
+        """
+        Returns the stored value and its remaining time to live in
+        milliseconds (negative if it has no expiration).
+        """
+        prefetched = _prefetched_values.get()
+        if prefetched is not None and key in prefetched:
+            return prefetched[key]
+
+        try:
+            pipe = cls._connection.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            value_stored, ttl = pipe.execute()
+            return value_stored, ttl
+        except RedisError as exc:
+            prometheus.exception("RedisError")
+            raise CacheNotAvailable from exc
+
+    @classmethod
+    def _acquire_lease(cls, key):
+        """
+        Try to acquire a short lock on a key that is about to be computed,
+        shared by all processes. Returns None if it is held by someone else.
+        """
+        lease = cls._connection.lock(f"lease_{key}", timeout=REDIS_CACHE_LEASE_TIMEOUT)
+        try:
+            if lease.acquire(blocking=False):
+                return lease
+            return None
+        except RedisError:
+            prometheus.exception("RedisError")
+            logger.warning("Failed to acquire lease for %s", key, exc_info=True)
+            return None
+
+    @staticmethod
+    def _release_lease(lease):
+        try:
+            lease.release()
+        except (LockError, RedisError):
+            logger.warning("Failed to release lease %s", lease.name, exc_info=True)
+
+    @staticmethod
+    def _forget_prefetched(key):
+        """Read the value of `key` from Redis again in the current context"""
+        prefetched = _prefetched_values.get()
+        if prefetched is not None:
+            prefetched.pop(key, None)
+
+    @classmethod
+    def _store(cls, key, result, expire):
+        cls._forget_prefetched(key)
+        encoded_result, size = encode_value_with_size(result)
+        cls._set_value(key, encoded_result, int(expire) + REDIS_CACHE_STALE_TTL)
+        cls._local_cache.put(key, result, size, expire)
+
+    @classmethod
+    def _compute(cls, key, f, args, kwargs, expire):
+        """
+        Compute a missing value. If another process is already computing it,
+        wait for a short while for its result.
+        """
+        lease = cls._acquire_lease(key)
+
+        if lease is None:
+            # The prefetched miss can't reflect the value being stored by the
+            # holder of the lease
+            cls._forget_prefetched(key)
+            deadline = monotonic() + REDIS_CACHE_LEASE_WAIT
+            while monotonic() < deadline:
+                sleep(0.05)
+                try:
+                    value_stored = cls._get_value(key)
+                except CacheNotAvailable:
+                    break
+                if value_stored is not None:
+                    try:
+                        return decode_value(value_stored)
+                    except InvalidCacheValue:
+                        # The invalid value is still there, until the holder
+                        # of the lease overwrites it
+                        pass
+
+        try:
+            result = f(*args, **kwargs)
+            cls._store(key, result, expire)
+            return result
+        finally:
+            if lease is not None:
+                cls._release_lease(lease)
+
+    @classmethod
+    def _refresh(cls, key, f, args, kwargs, expire):
+        lease = cls._acquire_lease(key)
+        if lease is None:
+            # Another process is already refreshing this value
+            return
+
+        try:
+            result = f(*args, **kwargs)
+            # Keep serving the previous value if the remote source fails
+            if result is not None:
+                cls._store(key, result, expire)
+        except Exception:
+            logger.warning("Failed to refresh cached value for %s", key, exc_info=True)
+        finally:
+            cls._release_lease(lease)
+
+    @classmethod
+    def _refresh_in_background(cls, key, f, args, kwargs, expire, prefix, reason):
+        with cls._refreshing_lock:
+            if key in cls._refreshing or cls._single_flight.is_running(key):
+                return
+            cls._refreshing.add(key)
+
+        def refresh():
+            try:
+                cls._refresh(key, f, args, kwargs, expire)
+            finally:
+                with cls._refreshing_lock:
+                    cls._refreshing.discard(key)
+
+        prometheus.cache_refresh(prefix, reason)
+        _refresh_executor.submit(refresh)
+
+    @staticmethod
+    def _should_refresh_early(fresh_ms):
+        """
+        Probabilistic early expiration ("XFetch"): the probability to refresh
+        a value grows exponentially as it gets closer to its expiration.
+        """
+        if REDIS_CACHE_EARLY_REFRESH <= 0:
+            return False
+        return fresh_ms / 1000 < -REDIS_CACHE_EARLY_REFRESH * math.log(1 - random.random())
+
+    @classmethod
+    def cache_it(cls, key, f, expire=settings["WIKI_CACHE_TIMEOUT"], prefix=None):
         """
         Takes function f and put its result in a redis cache.
         It requires a prefix string to identify the name
         of the function cached.
+
+        Values are also kept in an in-process cache, for at most
+        REDIS_LOCAL_CACHE_TTL seconds. The optional `prefix` is only used to
+        label the metrics of the cache.
+
+        A missing value is computed only once at a time, by a single thread
+        holding a Redis lease for the key. Expired values are kept for
+        REDIS_CACHE_STALE_TTL more seconds in Redis: they are still returned
+        while they get refreshed in background, which also happens randomly
+        shortly before expiration.
         """
         if cls._connection is None:
             cls.init_cache()
@@ -95,25 +313,76 @@ class RedisWrapper:
             """
             if cls._connection is not DISABLED_STATE:
                 try:
-                    value_stored = cls._get_value(key)
+                    value = cls._local_cache.get(key)
+                except IndexError:
+                    prometheus.local_cache_request(prefix, hit=False)
+                else:
+                    prometheus.local_cache_request(prefix, hit=True)
+                    return value
+
+                try:
+                    value_stored, ttl = cls._get_value_with_ttl(key)
                 except CacheNotAvailable:
                     # Cache is not reachable: we don't want to execute 'f'
                     # (and fetch remote content, possibly very often)
                     logger.warning("Failed to get cached value for %s", key, exc_info=True)
                     return None
+
                 if value_stored is not None:
-                    return json.loads(value_stored.decode("utf-8"))
-                result = f(*args, **kwargs)
-                json_result = json.dumps(result)
-                cls._set_value(key, json_result, expire)
+                    try:
+                        result, size = decode_value_with_size(value_stored)
+                    except InvalidCacheValue:
+                        cls._report_invalid_value(key)
+                        value_stored = None
+
+                if value_stored is None:
+                    return cls._single_flight.do(
+                        key,
+                        cls._compute,
+                        key,
+                        f,
+                        args,
+                        kwargs,
+                        expire,
+                        timeout=REDIS_CACHE_LEASE_TIMEOUT,
+                    )
+
+                if ttl < 0:
+                    # The value has no expiration
+                    cls._local_cache.put(key, result, size, expire)
+                    return result
+
+                fresh_ms = ttl - REDIS_CACHE_STALE_TTL * 1000
+                if fresh_ms <= 0:
+                    cls._refresh_in_background(key, f, args, kwargs, expire, prefix, "stale")
+                else:
+                    cls._local_cache.put(key, result, size, fresh_ms / 1000)
+                    if cls._should_refresh_early(fresh_ms):
+                        cls._refresh_in_background(key, f, args, kwargs, expire, prefix, "early")
+
                 return result
             return f(*args, **kwargs)
 
         return with_cache
 
+    @staticmethod
+    @contextmanager
+    def use_prefetched_values(values: Dict[str, Tuple[Optional[bytes], int]]):
+        """
+        Serve the values fetched with `AsyncRedisWrapper.get_many_with_ttl`
+        to the reads of the current context (which is inherited by the tasks
+        and threads it starts).
+        """
+        token = _prefetched_values.set(values)
+        try:
+            yield
+        finally:
+            _prefetched_values.reset(token)
+
     @classmethod
     def disable(cls):
         cls._connection = DISABLED_STATE
+        cls._local_cache.clear()
 
     @classmethod
     def enable(cls):
@@ -121,9 +390,90 @@ class RedisWrapper:
         cls.init_cache()
 
 
+class AsyncRedisWrapper:
+    """
+    Async access to the cache used by `RedisWrapper`, providing batched reads
+    and writes in a single round trip.
+    """
+
+    # Connections can't be shared across event loops, so a client is kept
+    # for each running loop (the server runs a single one).
+    _clients = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_client(cls) -> Optional[AsyncRedis]:
+        """
+        Returns None if the cache is disabled.
+        """
+        if not RedisWrapper.init_cache():
+            return None
+
+        loop = asyncio.get_running_loop()
+        client = cls._clients.get(loop)
+
+        if client is None:
+            redis_pool = get_async_redis_pool(db=settings["WIKI_CACHE_REDIS_DB"])
+            client = AsyncRedis(connection_pool=redis_pool)
+            cls._clients[loop] = client
+
+        return client
+
+    @classmethod
+    async def get_many(cls, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+
+        client = cls.get_client()
+        if client is None:
+            return [None] * len(keys)
+
+        try:
+            return await client.mget(keys)
+        except RedisError as exc:
+            prometheus.exception("RedisError")
+            raise CacheNotAvailable from exc
+
+    @classmethod
+    async def get_many_with_ttl(cls, keys: List[str]) -> Dict[str, Tuple[Optional[bytes], int]]:
+        """
+        Returns the stored value and the remaining time to live in
+        milliseconds of each key, or an empty dict if the cache is disabled.
+        """
+        client = cls.get_client()
+        if client is None or not keys:
+            return {}
+
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(key)
+                    pipe.pttl(key)
+                results = await pipe.execute()
+        except RedisError as exc:
+            prometheus.exception("RedisError")
+            raise CacheNotAvailable from exc
+
+        return {key: (results[2 * i], results[2 * i + 1]) for i, key in enumerate(keys)}
+
+    @classmethod
+    async def set_many(cls, values: Dict[str, bytes], expire=settings["WIKI_CACHE_TIMEOUT"]):
+        client = cls.get_client()
+        if client is None or not values:
+            return
+
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.set(key, value, ex=expire)
+                await pipe.execute()
+        except RedisError:
+            prometheus.exception("RedisError")
+            logger.exception("Got a RedisError")
+
+
 class RedisWrapperWeather(RedisWrapper):
     _redis = RedisWrapper
 
     @classmethod
-    def cache_it(cls, key, f, expire=settings["WEATHER_CACHE_TIMEOUT"]):
-        return cls._redis.cache_it(key, f, expire)
+    def cache_it(cls, key, f, expire=settings["WEATHER_CACHE_TIMEOUT"], prefix="weather"):
+        return cls._redis.cache_it(key, f, expire, prefix)
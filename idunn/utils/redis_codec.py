@@ -0,0 +1,108 @@
+"""
+Serialization of the values stored in Redis.
+
+Encoded values start with a version byte identifying their format. Values
+written as plain JSON by previous versions of Idunn don't have one and can
+still be decoded, so that all formats can coexist in the cache during a
+rollout. Version bytes are control characters which can't start a JSON
+document, JSON whitespace excluded.
+"""
+import json
+import zlib
+from typing import Any, Tuple
+
+import orjson
+
+from idunn import settings
+
+FORMAT_ORJSON = b"\x01"
+FORMAT_ORJSON_ZLIB = b"\x02"
+
+# Bytes reserved for formats, including future ones
+FORMAT_BYTES = {bytes([c]) for c in range(0x20)} - {b"\t", b"\n", b"\r"}
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class InvalidCacheValue(ValueError):
+    """A cached value that can't be decoded"""
+
+
+class UnknownCacheFormat(InvalidCacheValue):
+    pass
+
+
+def get_write_format():
+    codec = settings["REDIS_CACHE_CODEC"]
+    if codec not in ("json", "orjson"):
+        raise ValueError(f"Invalid REDIS_CACHE_CODEC: '{codec}'")
+    return codec
+
+
+REDIS_CACHE_CODEC = get_write_format()
+REDIS_CACHE_COMPRESSION_THRESHOLD = int(settings["REDIS_CACHE_COMPRESSION_THRESHOLD"])
+REDIS_CACHE_COMPRESSION_LEVEL = int(settings["REDIS_CACHE_COMPRESSION_LEVEL"])
+
+
+def encode_value(value, codec=None) -> bytes:
+    """
+    Serialize a value with the format set by REDIS_CACHE_CODEC. With the
+    "orjson" codec, payloads larger than REDIS_CACHE_COMPRESSION_THRESHOLD
+    bytes are compressed.
+    """
+    return encode_value_with_size(value, codec)[0]
+
+
+def encode_value_with_size(value, codec=None) -> Tuple[bytes, int]:
+    """
+    Same as `encode_value`, also returning the size of the payload before
+    compression.
+    """
+    codec = codec or REDIS_CACHE_CODEC
+
+    if codec == "json":
+        # Legacy format, readable by all versions of Idunn
+        data = json.dumps(value).encode("utf-8")
+        return data, len(data)
+
+    data = orjson.dumps(value, option=ORJSON_OPTIONS)
+    if 0 < REDIS_CACHE_COMPRESSION_THRESHOLD <= len(data):
+        compressed = zlib.compress(data, REDIS_CACHE_COMPRESSION_LEVEL)
+        return FORMAT_ORJSON_ZLIB + compressed, len(data)
+    return FORMAT_ORJSON + data, len(data)
+
+
+def decode_value(data: bytes):
+    """
+    Deserialize a value written by `encode_value` in any of the supported
+    formats. Raises InvalidCacheValue if the value is corrupt or its format
+    is unknown.
+    """
+    return decode_value_with_size(data)[0]
+
+
+def decode_value_with_size(data: bytes) -> Tuple[Any, int]:
+    """
+    Same as `decode_value`, also returning the size of the payload after
+    decompression.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    if not data:
+        raise UnknownCacheFormat("Empty cached value")
+
+    version = data[:1]
+    if version in FORMAT_BYTES - {FORMAT_ORJSON, FORMAT_ORJSON_ZLIB}:
+        raise UnknownCacheFormat(f"Unknown format of cached value: {version!r}")
+
+    try:
+        if version == FORMAT_ORJSON:
+            return orjson.loads(data[1:]), len(data) - 1
+        if version == FORMAT_ORJSON_ZLIB:
+            payload = zlib.decompress(data[1:])
+            return orjson.loads(payload), len(payload)
+        # Plain JSON, which may contain values such as NaN that orjson rejects
+        return json.loads(data), len(data)
+    except (ValueError, zlib.error) as exc:
+        raise InvalidCacheValue(f"Corrupt cached value: {exc}") from exc
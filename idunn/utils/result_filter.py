@@ -1,10 +1,9 @@
 import logging
 import re
 from functools import lru_cache
-from typing import Callable, List, Optional, TypeVar
+from typing import Callable, Dict, FrozenSet, List, Optional, TypeVar
 from unidecode import unidecode
 from itertools import chain
-from jellyfish import damerau_levenshtein_distance
 
 from idunn.places.base import BasePlace
 
@@ -14,6 +13,73 @@ T = TypeVar("T")
 logger = logging.getLogger(__name__)
 
 
+def within_one_edit(word_1: str, word_2: str) -> bool:
+    """
+    Check if the Damerau-Levenshtein distance between two words is at most 1,
+    in linear time.
+
+    >>> assert within_one_edit("eiffel", "eiffel")
+    >>> assert within_one_edit("eiffel", "ieffel")
+    >>> assert within_one_edit("eiffel", "eifel")
+    >>> assert within_one_edit("eiffel", "eiffels")
+    >>> assert within_one_edit("eiffel", "eiffal")
+    >>> assert not within_one_edit("eiffel", "ifefel")
+    >>> assert not within_one_edit("eiffel", "eifl")
+    """
+    if len(word_1) > len(word_2):
+        word_1, word_2 = word_2, word_1
+
+    if len(word_2) - len(word_1) > 1:
+        return False
+
+    # Skip the common prefix, the remaining must differ by a single edit
+    i = 0
+    while i < len(word_1) and word_1[i] == word_2[i]:
+        i += 1
+
+    if len(word_1) < len(word_2):
+        return word_1[i:] == word_2[i + 1 :]
+
+    return (
+        i == len(word_1)
+        or word_1[i + 1 :] == word_2[i + 1 :]
+        or (word_1[i : i + 2] == word_2[i : i + 2][::-1] and word_1[i + 2 :] == word_2[i + 2 :])
+    )
+
+
+class QueryMatcher:
+    """
+    Words of a query and the words of results they match.
+
+    Matches are memoized, so that each distinct word of a batch of results is
+    only compared once with the words of the query.
+    """
+
+    def __init__(self, result_filter: "ResultFilter", words: List[str]):
+        self.result_filter = result_filter
+        self.words = words
+        self.matches: Dict[str, FrozenSet[str]] = {}
+
+    def matched_by(self, label_word: str) -> FrozenSet[str]:
+        """
+        Words of the query that match a word of the result.
+        """
+        matched = self.matches.get(label_word)
+
+        if matched is None:
+            matched = frozenset(
+                query_word
+                for query_word in self.words
+                if self.result_filter.word_matches(query_word, label_word)
+            )
+            self.matches[label_word] = matched
+
+        return matched
+
+    def matched_by_any(self, label_words: List[str]) -> FrozenSet[str]:
+        return frozenset().union(*map(self.matched_by, label_words))
+
+
 class ResultFilter:
     # Typical suffixes found after numbers such as "4bis", "4th", ...
     NUM_SUFFIXES = ["bis", "ter", "quad", "e", "è", "eme", "ème", "er", "st", "nd", "rd", "th"]
@@ -63,6 +129,7 @@ class ResultFilter:
         return [word for word in cls.WORD_SEPARATORS.split(text) if word]
 
     @classmethod
+    @lru_cache(10000)
     def word_as_number(cls, word):
         """
         Attempt to intepret the word as a number, potentialy triming a suffix.
@@ -137,16 +204,13 @@ class ResultFilter:
         # The label can be matched with or without accent
         label_variants = {label_word, unidecode(label_word)}
 
-        return (
-            # This first check is redundant with the third one but is less expensive to compute
-            any(query_word == s for s in label_variants)
-            or (self.match_word_prefix and any(s.startswith(query_word) for s in label_variants))
-            or any(
-                damerau_levenshtein_distance(query_word, s) <= 1
-                for s in label_variants
-                if len(s) > 2
-            )
-            or any(self.word_matches_abreviation(query_word, s) for s in label_variants)
+        return any(
+            # The first check is redundant with the third one but is less expensive to compute
+            query_word == s
+            or (self.match_word_prefix and s.startswith(query_word))
+            or (len(s) > 2 and within_one_edit(query_word, s))
+            or self.word_matches_abreviation(query_word, s)
+            for s in label_variants
         )
 
     def postcode_matches(self, query_word, postcode):
@@ -156,7 +220,9 @@ class ResultFilter:
             return False
         return postcode.startswith(query_word)
 
-    def count_adj_in_same_block(self, terms: List[str], blocks: List[List[str]]) -> int:
+    def count_adj_in_same_block(
+        self, terms: List[str], blocks: List[List[str]], matcher: Optional[QueryMatcher] = None
+    ) -> int:
         """
         Count the number of consecutive terms that both match a word in a same
         block.
@@ -174,14 +240,26 @@ class ResultFilter:
         1
         """
 
-        def contains(word: str, block: List[str]) -> bool:
-            return any(self.word_matches(word, block_word) for block_word in block)
+        matcher = matcher or QueryMatcher(self, terms)
+        blocks_matches = [matcher.matched_by_any(block) for block in blocks]
 
         return sum(
-            any(contains(word_1, block) and contains(word_2, block) for block in blocks)
+            any(word_1 in matches and word_2 in matches for matches in blocks_matches)
             for word_1, word_2 in zip(terms[:-1], terms[1:])
         )
 
+    def query_matcher(self, query: str, place_type: str) -> QueryMatcher:
+        """
+        Normalize the words of a query, which can then be matched against
+        results of type `place_type`.
+        """
+        query_words = self.words(query.lower())
+
+        if place_type == "house":
+            query_words = [word for word in query_words if word not in self.NUM_SUFFIXES]
+
+        return QueryMatcher(self, query_words)
+
     def check(
         self,
         query: str,
@@ -189,18 +267,20 @@ class ResultFilter:
         place_type: str,
         admins: List[str] = [],
         postcodes: List[str] = [],
+        matcher: Optional[QueryMatcher] = None,
     ) -> bool:
         """
         Filter a feature from bragi responses, please provide the field
         bragi_response["features"][..]["properties"]["geocoding"].
+
+        A matcher built by `query_matcher` can be shared by calls for a same
+        query to reuse its normalization and word matches.
         """
-        query_words = self.words(query.lower())
+        matcher = matcher or self.query_matcher(query, place_type)
+        query_words = matcher.words
         names = list(map(str.lower, names))
         admins = list(map(str.lower, admins))
 
-        if place_type == "house":
-            query_words = [word for word in query_words if word not in self.NUM_SUFFIXES]
-
         # Check if all words of the query match a word in the result
         full_label = [
             *(w for name in names for w in self.words(name)),
@@ -240,10 +320,7 @@ class ResultFilter:
         def coverage(terms):
             if len(terms) == 0:
                 return 0.0
-            return sum(
-                any(self.word_matches(query_word, term) for query_word in query_words)
-                for term in terms
-            ) / len(terms)
+            return sum(bool(matcher.matched_by(term)) for term in terms) / len(terms)
 
         candidate_terms_to_cover = (
             terms
@@ -278,11 +355,10 @@ class ResultFilter:
         place_type: str,
         admins: List[str] = [],
         postcodes: List[str] = [],  # pylint: disable = unused-argument
+        matcher: Optional[QueryMatcher] = None,
     ) -> float:
-        query_words = self.words(query.lower())
-
-        if place_type == "house":
-            query_words = [word for word in query_words if word not in self.NUM_SUFFIXES]
+        matcher = matcher or self.query_matcher(query, place_type)
+        query_words = matcher.words
 
         if place_type in ["street", "house"] and len(query_words) > 1:
             # Count the number of adjacent words from the query which are both
@@ -292,6 +368,7 @@ class ResultFilter:
             rank_val = self.count_adj_in_same_block(
                 query_words,
                 [*map(self.words, names), *map(self.words, admins)],
+                matcher,
             ) / (len(query_words) - 1)
         else:
             rank_val = 1.0
@@ -302,11 +379,24 @@ class ResultFilter:
         """
         Filter relevent results from input list of places and return them
         sorted by relevance.
+
+        The query is normalized once for the whole batch, and matches of the
+        words of results are shared between all places.
         """
-        return sorted(
-            (place for place in places if self.check(**build_params(place))),
-            key=lambda place: -self.rank(**build_params(place)),
-        )
+        matchers = {}
+        ranked = []
+
+        for place in places:
+            params = build_params(place)
+            key = (params["query"], params["place_type"] == "house")
+
+            if key not in matchers:
+                matchers[key] = self.query_matcher(params["query"], params["place_type"])
+
+            if self.check(**params, matcher=matchers[key]):
+                ranked.append((self.rank(**params, matcher=matchers[key]), place))
+
+        return [place for _, place in sorted(ranked, key=lambda item: -item[0])]
 
     def filter_bragi_features(self, query: str, bragi_responses: List[dict]) -> List[dict]:
         return self.filter(
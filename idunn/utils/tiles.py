@@ -0,0 +1,57 @@
+"""Slippy map tiles, in Web Mercator projection as used by OSM and map clients."""
+
+import math
+from typing import List, Tuple
+
+MAX_ZOOM = 18
+MAX_LATITUDE = 85.0511287798  # limit of the Web Mercator projection
+
+
+def lonlat_to_tile(lon: float, lat: float, zoom: int) -> Tuple[int, int]:
+    """
+    >>> lonlat_to_tile(2.35, 48.85, 10)
+    (518, 352)
+    >>> lonlat_to_tile(180, -90, 2)
+    (3, 3)
+    """
+    n = 2**zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bbox(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    >>> [round(v, 4) for v in tile_bbox(10, 518, 352)]
+    [2.1094, 48.691, 2.4609, 48.9225]
+    """
+    n = 2**zoom
+
+    def tile_lat(y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+
+    return x / n * 360 - 180, tile_lat(y + 1), (x + 1) / n * 360 - 180, tile_lat(y)
+
+
+def tiles_covering(bbox, max_tiles: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Tiles covering a bbox, at the highest zoom where tiles are larger than
+    half of the bbox and where there are at most `max_tiles` of them.
+
+    >>> tiles_covering((2.29, 48.84, 2.39, 48.88), max_tiles=16)
+    (12, [(2074, 1408), (2074, 1409), (2075, 1408), (2075, 1409)])
+    """
+    left, bot, right, top = bbox
+    span = max(right - left, top - bot, 360 / 2**MAX_ZOOM)
+    zoom = min(MAX_ZOOM, math.floor(math.log2(360 / span)) + 1)
+
+    while True:
+        min_x, min_y = lonlat_to_tile(left, top, zoom)
+        max_x, max_y = lonlat_to_tile(right, bot, zoom)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) <= max_tiles or zoom == 0:
+            break
+        zoom -= 1
+
+    tiles = [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+    return zoom, tiles
@@ -0,0 +1,248 @@
+"""Wrappers around httpx transports shared by clients of upstream services."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from idunn import settings
+from idunn.utils import prometheus
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingTransport(httpx.AsyncBaseTransport):
+    """
+    Send a single upstream request for identical requests issued concurrently.
+
+    While a request is in flight, any identical request (same method, URL,
+    headers, body and timeout) awaits the response of the first one instead
+    of being sent again. Nothing is kept once the response has been received,
+    so this is not a cache and never serves stale data.
+
+    Only requests with one of `methods` are coalesced, which must be
+    idempotent for the upstream service. Query parameters listed in
+    `ignored_params` don't change the response, they are not compared.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        name: str,
+        methods: Iterable[str] = ("GET", "HEAD"),
+        ignored_params: Iterable[str] = (),
+    ):
+        self.transport = transport
+        self.name = name
+        self.methods = {method.upper() for method in methods}
+        self.ignored_params = set(ignored_params)
+        self.in_flight: Dict[tuple, asyncio.Future] = {}
+
+    def request_key(self, request: httpx.Request) -> Optional[tuple]:
+        if request.method not in self.methods:
+            return None
+        try:
+            content = request.content
+        except httpx.RequestNotRead:
+            # Streamed bodies can't be compared
+            return None
+        timeout = request.extensions.get("timeout", {})
+        url = request.url
+        for param in self.ignored_params:
+            url = url.copy_remove_param(param)
+        return (
+            request.method,
+            str(url),
+            tuple(request.headers.raw),
+            content,
+            tuple(sorted(timeout.items())),
+        )
+
+    async def fetch(self, request: httpx.Request) -> Tuple[int, list, bytes, dict]:
+        response = await self.transport.handle_async_request(request)
+        try:
+            # The raw body is kept, decoding is left to each client
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        extensions = {
+            key: value
+            for key, value in response.extensions.items()
+            if key in ("http_version", "reason_phrase")
+        }
+        return response.status_code, response.headers.raw, content, extensions
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = self.request_key(request)
+
+        if key is None:
+            return await self.transport.handle_async_request(request)
+
+        task = self.in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(self.fetch(request))
+            self.in_flight[key] = task
+
+            def on_done(_):
+                if self.in_flight.get(key) is task:
+                    del self.in_flight[key]
+                if not task.cancelled():
+                    # Mark the exception as retrieved if all callers gave up
+                    task.exception()
+
+            task.add_done_callback(on_done)
+        else:
+            prometheus.coalesced_request(self.name)
+
+        # A caller being cancelled must not cancel the request of others
+        status_code, headers, content, extensions = await asyncio.shield(task)
+        return httpx.Response(
+            status_code,
+            headers=headers,
+            stream=httpx.ByteStream(content),
+            extensions=extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class HedgingTransport(httpx.AsyncBaseTransport):
+    """
+    Send a duplicate of a request which takes longer than usual to answer and
+    keep the response which comes first.
+
+    The hedging delay is the `percentile` of the latencies observed for the
+    last `window` primary requests. The extra load is capped by a budget: each
+    request earns `budget` hedge (eg. 0.05 for at most 5% of extra requests).
+
+    The request which loses is not cancelled, as cancelling a request while
+    it is connecting leaks a connection of the pool of httpx (see
+    encode/httpx#2139): its response is closed once received. This also
+    measures the latency of a primary request which loses against its hedge,
+    otherwise the delay would drift down as hedging hides slow responses.
+
+    Only requests with one of `methods` are hedged, which must be idempotent
+    for the upstream service.
+    """
+
+    # Number of latencies required before hedging any request
+    MIN_SAMPLES = 100
+    # Number of new latencies between two updates of the delay
+    UPDATE_INTERVAL = 10
+    # Maximum number of hedges that can be saved up during calm periods
+    MAX_BUDGET = 10
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        name: str,
+        percentile: float = 95,
+        min_delay: float = 0,
+        budget: float = 0.05,
+        methods: Iterable[str] = ("GET", "HEAD"),
+        window: int = 1000,
+    ):
+        self.transport = transport
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget = budget
+        self.methods = {method.upper() for method in methods}
+        self.latencies = deque(maxlen=window)
+        self.new_samples = 0
+        self.delay: Optional[float] = None
+        self.available_hedges = 0.0
+
+    @classmethod
+    def from_settings(cls, transport: httpx.AsyncBaseTransport, name: str, **kwargs):
+        return cls(
+            transport,
+            name,
+            percentile=float(settings["HEDGING_DELAY_PERCENTILE"]),
+            min_delay=float(settings["HEDGING_MIN_DELAY"]),
+            budget=float(settings["HEDGING_BUDGET"]),
+            **kwargs,
+        )
+
+    def record_latency(self, latency: float):
+        self.latencies.append(latency)
+        self.new_samples += 1
+
+        if self.new_samples >= self.UPDATE_INTERVAL and len(self.latencies) >= self.MIN_SAMPLES:
+            self.new_samples = 0
+            latencies = sorted(self.latencies)
+            index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+            self.delay = max(self.min_delay, latencies[index])
+
+    def acquire_hedge(self) -> bool:
+        if self.available_hedges >= 1:
+            self.available_hedges -= 1
+            return True
+        return False
+
+    @staticmethod
+    def discard(task: asyncio.Future):
+        """Close the response of a finished request which isn't used"""
+        if not task.cancelled() and task.exception() is None:
+            asyncio.ensure_future(task.result().aclose())
+
+    async def first_response(self, tasks) -> Tuple[httpx.Response, asyncio.Future]:
+        """
+        Wait for the first successful response among tasks, or raise the
+        error of the first task if all of them failed.
+        """
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                if task in done and task.exception() is None:
+                    return task.result(), task
+        return tasks[0].result(), tasks[0]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method not in self.methods:
+            return await self.transport.handle_async_request(request)
+
+        self.available_hedges = min(self.MAX_BUDGET, self.available_hedges + self.budget)
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self.transport.handle_async_request(request))
+
+        def record_primary_latency(_):
+            if not primary.cancelled() and primary.exception() is None:
+                self.record_latency(time.monotonic() - start)
+
+        primary.add_done_callback(record_primary_latency)
+        tasks = [primary]
+        winner = None
+        result = "not_hedged"
+
+        try:
+            if self.delay is not None:
+                await asyncio.wait(tasks, timeout=self.delay)
+                if not tasks[0].done():
+                    if self.acquire_hedge():
+                        tasks.append(
+                            asyncio.ensure_future(self.transport.handle_async_request(request))
+                        )
+                    else:
+                        result = "budget_exhausted"
+
+            response, winner = await self.first_response(tasks)
+        finally:
+            for task in tasks:
+                if task is not winner:
+                    task.add_done_callback(self.discard)
+
+        if len(tasks) > 1:
+            result = "primary_won" if winner is primary else "hedge_won"
+
+        prometheus.hedged_request(self.name, result)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,326 @@
+"""
+Timezone lookup from coordinates, in a precomputed index.
+
+The index is built from the polygons shipped with tzwhere, by running:
+
+    python -m idunn.utils.tz_index [PATH]
+
+It is made of a grid of timezone ids with RESOLUTION cells per degree, and of
+the timezone polygons clipped to tiles of one degree. Most lookups are
+answered by the grid, polygons are only tested for cells crossed by a border
+or a coastline. All arrays are memory-mapped, so that the index loads
+instantly and is shared by all workers through the page cache.
+
+Points outside of any polygon get the timezone that tzwhere would return with
+its `forceTZ` option for the center of their cell.
+"""
+import json
+import logging
+import math
+import os
+import sys
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+
+from idunn import settings
+
+logger = logging.getLogger(__name__)
+
+DIR = os.path.dirname(__file__)
+DEFAULT_TZ_INDEX_PATH = os.path.join(DIR, "data/tz_index")
+
+RESOLUTION = 8  # cells per degree
+NO_TIMEZONE = 0
+# Flag of cells crossed by a polygon outline, the remaining bits hold the
+# timezone of points of the cell that are outside of all polygons
+BORDER = 0x8000
+NB_TILES = 180 * 360
+
+
+def get_tile(lat: float, lon: float) -> int:
+    row = min(max(math.floor(lat) + 90, 0), 179)
+    col = min(max(math.floor(lon) + 180, 0), 359)
+    return row * 360 + col
+
+
+class TimezoneIndex:
+    def __init__(self, path: str):
+        with open(os.path.join(path, "names.json")) as f:
+            self.names = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.grid = load("grid")
+        self.tile_polygons = load("tile_polygons")
+        self.polygon_timezones = load("polygon_timezones")
+        self.polygon_rings = load("polygon_rings")
+        self.ring_vertices = load("ring_vertices")
+        self.vertices = load("vertices")
+
+    def get_rings(self, polygon):
+        for ring in range(self.polygon_rings[polygon], self.polygon_rings[polygon + 1]):
+            yield self.vertices[self.ring_vertices[ring] : self.ring_vertices[ring + 1]]
+
+    def contains(self, polygon, lat, lon) -> bool:
+        """
+        Even-odd rule test of a point in a polygon
+        """
+        crossings = 0
+        for ring in self.get_rings(polygon):
+            xa, ya = ring[:-1, 0], ring[:-1, 1]
+            xb, yb = ring[1:, 0], ring[1:, 1]
+            crosses = (ya > lat) != (yb > lat)
+            xa, ya, xb, yb = xa[crosses], ya[crosses], xb[crosses], yb[crosses]
+            crossings += np.count_nonzero(lon < xa + (lat - ya) * (xb - xa) / (yb - ya))
+        return crossings % 2 == 1
+
+    def get_polygons(self, tile):
+        return range(self.tile_polygons[tile], self.tile_polygons[tile + 1])
+
+    def tz_name_at(self, lat: float, lon: float) -> Optional[str]:
+        row = min(max(int((lat + 90) * RESOLUTION), 0), 180 * RESOLUTION - 1)
+        col = min(max(int((lon + 180) * RESOLUTION), 0), 360 * RESOLUTION - 1)
+        value = int(self.grid[row, col])
+
+        if value & BORDER:
+            for polygon in self.get_polygons(get_tile(lat, lon)):
+                if self.contains(polygon, lat, lon):
+                    return self.names[self.polygon_timezones[polygon] - 1]
+            value &= ~BORDER
+
+        if value == NO_TIMEZONE:
+            return None
+        return self.names[value - 1]
+
+
+class TimezoneFinder:
+    """
+    Lookup timezones in the precomputed index if it has been built, or with
+    tzwhere otherwise (which is slow to load and requires a lot of memory).
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings["TZ_INDEX_PATH"] or DEFAULT_TZ_INDEX_PATH
+        self.index = None
+        self.tzwhere = None
+        self.lock = Lock()
+
+        if os.path.exists(self.path):
+            self.index = TimezoneIndex(self.path)
+        else:
+            logger.warning(
+                "Timezone index not found in '%s', tzwhere will be used instead", self.path
+            )
+
+    def get_tzwhere(self):
+        with self.lock:
+            if self.tzwhere is None:
+                from tzwhere import tzwhere  # pylint: disable = import-outside-toplevel
+
+                self.tzwhere = tzwhere.tzwhere(forceTZ=True)
+        return self.tzwhere
+
+    def tz_name_at(self, lat: float, lon: float) -> Optional[str]:
+        if self.index is not None:
+            return self.index.tz_name_at(lat, lon)
+        return self.get_tzwhere().tzNameAt(latitude=lat, longitude=lon, forceTZ=True)
+
+
+def _clip(geom, box):
+    """Parts of a polygon inside of a box"""
+    # pylint: disable = import-outside-toplevel
+    from shapely.errors import TopologicalError
+
+    try:
+        result = geom.intersection(box)
+    except TopologicalError:
+        result = geom.buffer(0).intersection(box)
+    return [
+        g for g in getattr(result, "geoms", [result]) if g.geom_type == "Polygon" and not g.is_empty
+    ]
+
+
+def _fill_tiles(polygons, name_ids, bbox):
+    """
+    Clip polygons to tiles of one degree, by splitting them recursively.
+    Returns the list of (timezone id, polygon) of each tile.
+    """
+    # pylint: disable = import-outside-toplevel
+    from shapely import geometry
+
+    min_lon, min_lat, max_lon, max_lat = bbox
+    tiles = [[] for _ in range(NB_TILES)]
+
+    for name, polygon in polygons:
+        x0, y0, x1, y1 = polygon.bounds
+        x0, y0 = max(math.floor(x0), min_lon), max(math.floor(y0), min_lat)
+        x1, y1 = min(math.floor(x1) + 1, max_lon), min(math.floor(y1) + 1, max_lat)
+        stack = [(polygon, x0, y0, x1, y1)] if x0 < x1 and y0 < y1 else []
+
+        while stack:
+            geom, x0, y0, x1, y1 = stack.pop()
+            if x1 - x0 == 1 and y1 - y0 == 1:
+                tiles[get_tile(y0, x0)].extend(
+                    (name_ids[name], part) for part in _clip(geom, geometry.box(x0, y0, x1, y1))
+                )
+            elif x1 - x0 >= y1 - y0:
+                mid = (x0 + x1) // 2
+                for part in _clip(geom, geometry.box(x0, y0, mid, y1)):
+                    stack.append((part, x0, y0, mid, y1))
+                for part in _clip(geom, geometry.box(mid, y0, x1, y1)):
+                    stack.append((part, mid, y0, x1, y1))
+            else:
+                mid = (y0 + y1) // 2
+                for part in _clip(geom, geometry.box(x0, y0, x1, mid)):
+                    stack.append((part, x0, y0, x1, mid))
+                for part in _clip(geom, geometry.box(x0, mid, x1, y1)):
+                    stack.append((part, x0, mid, x1, y1))
+
+    return tiles
+
+
+def _rasterize_tile(cells, lat, lon, tile_polygons, get_outside_timezone):
+    """
+    Fill the cells of a tile with the timezone of the polygon containing
+    them, or flag them as crossed by a polygon outline.
+    """
+    # pylint: disable = import-outside-toplevel
+    from shapely import geometry, prepared
+
+    covering = [tz_id for tz_id, part in tile_polygons if part.area >= 1 - 1e-9]
+    if covering:
+        cells[:] = covering[0]
+        return
+
+    prepared_polygons = [(tz_id, prepared.prep(part)) for tz_id, part in tile_polygons]
+
+    for i in range(RESOLUTION):
+        for j in range(RESOLUTION):
+            cell_lat, cell_lon = lat + i / RESOLUTION, lon + j / RESOLUTION
+            cell = geometry.box(
+                cell_lon, cell_lat, cell_lon + 1 / RESOLUTION, cell_lat + 1 / RESOLUTION
+            )
+            is_border = False
+            for tz_id, part in prepared_polygons:
+                if part.contains(cell):
+                    cells[i, j] = tz_id
+                    break
+                is_border = is_border or part.intersects(cell)
+            else:
+                outside = get_outside_timezone(
+                    cell_lat + 0.5 / RESOLUTION, cell_lon + 0.5 / RESOLUTION
+                )
+                cells[i, j] = outside | BORDER if is_border else outside
+
+
+def _rasterize(tiles, polygons_by_name, name_ids, bbox):
+    """
+    Build the grid of timezone ids, with RESOLUTION cells per degree
+    """
+    # pylint: disable = import-outside-toplevel
+    from shapely import geometry
+    from tzwhere import tzwhere
+
+    min_lon, min_lat, max_lon, max_lat = bbox
+
+    with open(tzwhere.tzwhere.DEFAULT_SHORTCUTS) as f:
+        lng_shortcuts, lat_shortcuts = json.load(f)
+
+    def get_tzwhere_candidates(lat, lon):
+        lat_options = lat_shortcuts.get(str(float(lat)), {})
+        lng_options = lng_shortcuts.get(str(float(lon)), {})
+        return {
+            name: set(lat_options[name]) & set(lng_options[name])
+            for name in set(lat_options) & set(lng_options)
+        }
+
+    def get_closest_timezone(lat, lon, candidates):
+        point = geometry.Point(lon, lat)
+        distances = [
+            (polygons_by_name[name][i].distance(point), name)
+            for name, indices in candidates.items()
+            for i in indices
+        ]
+        return name_ids[min(distances)[1]] if distances else NO_TIMEZONE
+
+    grid = np.full((180 * RESOLUTION, 360 * RESOLUTION), NO_TIMEZONE, dtype=np.uint16)
+
+    for lat in range(min_lat, max_lat):
+        for lon in range(min_lon, max_lon):
+            candidates = get_tzwhere_candidates(lat, lon)
+
+            def get_outside_timezone(point_lat, point_lon, candidates=candidates):
+                # Points outside of all polygons, with forceTZ: the only
+                # candidate, or the closest one from the point
+                if len(candidates) <= 1:
+                    return name_ids[next(iter(candidates))] if candidates else NO_TIMEZONE
+                return get_closest_timezone(point_lat, point_lon, candidates)
+
+            cells = grid[
+                (lat + 90) * RESOLUTION : (lat + 91) * RESOLUTION,
+                (lon + 180) * RESOLUTION : (lon + 181) * RESOLUTION,
+            ]
+            _rasterize_tile(cells, lat, lon, tiles[get_tile(lat, lon)], get_outside_timezone)
+
+    return grid
+
+
+def _write_tz_index(path, names, grid, tiles):
+    tile_offsets = [0]
+    polygon_timezones, polygon_rings, ring_vertices, vertices = [], [0], [0], []
+
+    for tile_polygons in tiles:
+        for tz_id, part in tile_polygons:
+            polygon_timezones.append(tz_id)
+            for ring in [part.exterior, *part.interiors]:
+                vertices.extend(ring.coords)
+                ring_vertices.append(len(vertices))
+            polygon_rings.append(len(ring_vertices) - 1)
+        tile_offsets.append(len(polygon_timezones))
+
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "names.json"), "w") as f:
+        json.dump(names, f)
+
+    np.save(os.path.join(path, "grid.npy"), grid)
+    np.save(os.path.join(path, "tile_polygons.npy"), np.array(tile_offsets, dtype=np.int64))
+    np.save(os.path.join(path, "polygon_timezones.npy"), np.array(polygon_timezones, np.uint16))
+    np.save(os.path.join(path, "polygon_rings.npy"), np.array(polygon_rings, dtype=np.int64))
+    np.save(os.path.join(path, "ring_vertices.npy"), np.array(ring_vertices, dtype=np.int64))
+    np.save(os.path.join(path, "vertices.npy"), np.array(vertices, dtype=np.float64).reshape(-1, 2))
+
+
+def build_tz_index(path: str, bbox=None):
+    """
+    Build the index from tzwhere polygons. An optional bbox (in the form
+    [min_lon, min_lat, max_lon, max_lat], aligned on degrees) restricts the
+    tiles that are indexed.
+    """
+    # pylint: disable = import-outside-toplevel
+    from shapely import geometry
+    from tzwhere import tzwhere
+
+    bbox = bbox or (-180, -90, 180, 90)
+
+    polygons = []
+    for name, (exterior, interiors) in tzwhere.feature_collection_polygons(
+        tzwhere.read_tzworld(tzwhere.tzwhere.DEFAULT_POLYGONS)
+    ):
+        polygons.append((name, geometry.Polygon(exterior, interiors)))
+
+    names = sorted({name for name, _ in polygons})
+    name_ids = {name: i + 1 for i, name in enumerate(names)}
+    polygons_by_name = {}
+    for name, polygon in polygons:
+        polygons_by_name.setdefault(name, []).append(polygon)
+
+    tiles = _fill_tiles(polygons, name_ids, bbox)
+    grid = _rasterize(tiles, polygons_by_name, name_ids, bbox)
+    _write_tz_index(path, names, grid, tiles)
+
+
+if __name__ == "__main__":
+    build_tz_index(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TZ_INDEX_PATH)
@@ -1,5 +1,8 @@
+import asyncio
+import logging
 from enum import Enum
 
+from idunn import settings
 from idunn.blocks import (
     Weather,
     ContactBlock,
@@ -20,6 +23,12 @@ from idunn.blocks import (
     DeliveryBlock,
     StarsBlock,
 )
+from idunn.utils import prometheus
+from idunn.utils.redis import AsyncRedisWrapper, CacheNotAvailable, RedisWrapper
+
+logger = logging.getLogger(__name__)
+
+BLOCKS_IO_TIMEOUT = float(settings["BLOCKS_IO_TIMEOUT"])
 
 
 class Verbosity(str, Enum):
@@ -93,3 +102,67 @@ def build_blocks(es_poi, lang, verbosity):
         if block is not None:
             blocks.append(block)
     return blocks
+
+
+async def build_block_with_budget(block_class, es_poi, lang):
+    """
+    Build a block asynchronously, giving up if it takes more than
+    BLOCKS_IO_TIMEOUT seconds.
+
+    The budget only bounds the latency of the response: a block built in the
+    threadpool keeps running until it completes after a timeout, and holds a
+    worker thread meanwhile.
+    """
+    try:
+        return await asyncio.wait_for(
+            block_class.from_es_async(es_poi, lang), timeout=BLOCKS_IO_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        prometheus.exception("BlockTimeout")
+        logger.warning(
+            "Block %s exceeded its latency budget for %s",
+            block_class.__name__,
+            es_poi.get_id(),
+        )
+        return None
+
+
+async def prefetch_cached_values(es_poi, lang, block_classes):
+    """
+    Fetch in a single round trip the values of the Redis cache that the
+    blocks are expected to read.
+    """
+    keys = list(dict.fromkeys(key for c in block_classes for key in c.get_cache_keys(es_poi, lang)))
+
+    try:
+        return await AsyncRedisWrapper.get_many_with_ttl(keys)
+    except CacheNotAvailable:
+        logger.warning("Failed to prefetch cached values for %s", es_poi.get_id(), exc_info=True)
+        return {}
+
+
+async def build_blocks_async(es_poi, lang, verbosity):
+    """Returns the same list of blocks as `build_blocks`.
+
+    Blocks performing network I/O are built concurrently, so that the total
+    latency depends on the slowest of them instead of the sum. The cached
+    values they need are fetched beforehand in a single round trip.
+    """
+    block_classes = [c for c in BLOCKS_BY_VERBOSITY[verbosity] if c.is_enabled()]
+    io_classes = [c for c in block_classes if c.HAS_IO]
+    prefetched_values = await prefetch_cached_values(es_poi, lang, io_classes)
+
+    with RedisWrapper.use_prefetched_values(prefetched_values):
+        io_blocks = asyncio.ensure_future(
+            asyncio.gather(*(build_block_with_budget(c, es_poi, lang) for c in io_classes))
+        )
+
+        try:
+            built = {c: c.from_es(es_poi, lang) for c in block_classes if not c.HAS_IO}
+        except Exception:
+            io_blocks.cancel()
+            raise
+
+        built.update(zip(io_classes, await io_blocks))
+
+    return [built[c] for c in block_classes if built[c] is not None]
@@ -5,6 +5,11 @@ import respx
 from elasticsearch import Elasticsearch as Elasticsearch7
 from elasticsearch2 import Elasticsearch as Elasticsearch2
 
+from idunn import settings
+from idunn.geocoder.nlu_client import nlu_client
+from idunn.geocoder.bragi_client import bragi_client
+from idunn.api.instant_answer import ia_cache
+
 from .utils import init_wiki_es, override_settings
 
 
@@ -257,6 +262,13 @@ def load_all(mimir_client, init_indices):
 
 @pytest.fixture
 def httpx_mock():
+    # Responses obtained with the mocks of a previous test must not be reused
+    bragi_client.clear_cache()
+    nlu_client.clear_cache()
+    ia_cache.clear()
+
     # pylint: disable = not-context-manager
     with respx.mock(assert_all_called=False) as rsps:
+        # Requests to Mimir are sent to the test database
+        rsps.route(url__startswith=settings["MIMIR_ES"].rstrip("/")).pass_through()
         yield rsps
@@ -1,5 +1,6 @@
 import json
 import os
+from contextlib import contextmanager
 from unittest import mock
 
 import pytest
@@ -10,17 +11,25 @@ from idunn.api import status
 from tests.utils import init_pj_source, override_settings
 
 
+@contextmanager
+def mock_get_from_params(pj_source, api_result):
+    """Mock both the synchronous and asynchronous calls to PJ API"""
+
+    async def get_from_params_async(*_args, **_kwargs):
+        return api_result
+
+    with mock.patch.object(
+        pj_source, "get_from_params", new=lambda *x, **y: api_result
+    ), mock.patch.object(pj_source, "get_from_params_async", new=get_from_params_async):
+        yield
+
+
 def mock_pj_status(filename: str):
     api_result = json.load(open(os.path.join(os.path.dirname(__file__), filename)))
     updated_settings = {}
     source_type = PagesJaunes
     with override_settings(updated_settings), init_pj_source(source_type):
-        api_mock = mock.patch.object(
-            status.pj_source,
-            "get_from_params",
-            new=lambda *x, **y: api_result,
-        )
-        with api_mock:
+        with mock_get_from_params(status.pj_source, api_result):
             yield
 
 
@@ -31,20 +40,12 @@ def mock_pj_api(type_api: str, filename: str):
 
     with override_settings(updated_settings), init_pj_source(source_type):
         if type_api == "api":
-            api_mock = mock.patch.object(
-                places_utils.pj_source,
-                "get_from_params",
-                new=lambda *x, **y: api_result,
-            )
-            with api_mock:
+            with mock_get_from_params(places_utils.pj_source, api_result):
                 yield
         else:
-            api_mock = mock.patch.object(
-                places_utils.pj_source,
-                "get_from_params",
-                new=lambda *x, **y: {"search_results": {"listings": [api_result]}},
-            )
-            with api_mock:
+            with mock_get_from_params(
+                places_utils.pj_source, {"search_results": {"listings": [api_result]}}
+            ):
                 yield
 
 
@@ -0,0 +1,55 @@
+import asyncio
+from time import time
+
+import httpx
+
+from idunn.utils.auth_session import AsyncAuthSession
+
+TOKEN_LIFETIME = 1
+
+
+class DummyAuthSession(AsyncAuthSession):
+    def get_authorization_url(self):
+        return "http://auth.test/token"
+
+    def get_authorization_params(self):
+        return {"client_id": "idunn"}
+
+    @staticmethod
+    def parse_authorisation_response(resp):
+        return resp["access_token"], time() + TOKEN_LIFETIME
+
+
+def test_async_auth_session_refresh():
+    token_queries = []
+
+    def handler(request):
+        if request.url.host == "auth.test":
+            assert "Authorization" not in request.headers
+            token_queries.append(request)
+            return httpx.Response(200, json={"access_token": f"t{len(token_queries)}"})
+        return httpx.Response(200, text=request.headers["Authorization"])
+
+    session = DummyAuthSession(
+        expiration_tolerance=0.1,
+        refresh_ahead=0.3,
+        refresh_jitter=0,
+        transport=httpx.MockTransport(handler),
+    )
+
+    async def run():
+        # Concurrent requests share the first token
+        responses = await asyncio.gather(*[session.get("http://api.test/") for _ in range(3)])
+        assert [r.text for r in responses] == ["Bearer t1"] * 3
+        assert len(token_queries) == 1
+
+        # The token is renewed in the background before it expires
+        await asyncio.sleep(0.8)
+        assert len(token_queries) == 2
+        assert not session.token_is_expired()
+        assert (await session.get("http://api.test/")).text == "Bearer t2"
+        assert len(token_queries) == 2
+
+        session.refresher.cancel()
+
+    asyncio.run(run())
@@ -4,6 +4,9 @@ from fastapi.testclient import TestClient
 from app import app
 
 from .fixtures.geocodeur.autocomplete import (
+    BASE_URL,
+    NLU_URL,
+    CLASSIF_URL,
     mock_autocomplete_get,
     mock_autocomplete_post,
     mock_autocomplete_unavailable,
@@ -90,6 +93,39 @@ def test_autocomplete_ok_shape(mock_autocomplete_post):
     )
 
 
+def test_autocomplete_cache(mock_autocomplete_get, httpx_mock):
+    client = TestClient(app)
+    assert_ok_with(client, params={"q": "pavillon paris", "lang": "en", "limit": 7})
+    assert_ok_with(client, params={"q": "pavillon paris", "lang": "en", "limit": 7})
+    assert_ok_with(
+        client, params={"q": "pavillon paris", "lang": "en", "limit": 7, "request_id": "42"}
+    )
+
+    bragi_urls = [str(call.request.url) for call in httpx_mock.calls]
+    assert sum(url.startswith(f"{BASE_URL}/autocomplete") for url in bragi_urls) == 1
+
+
+def test_autocomplete_cache_ignores_shape(mock_autocomplete_post, httpx_mock):
+    client = TestClient(app)
+    shape = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [[2.29, 48.78], [2.34, 48.78], [2.34, 48.81], [2.29, 48.81], [2.29, 48.78]]
+            ],
+        },
+    }
+
+    for _ in range(2):
+        assert_ok_with(
+            client, params={"q": "paris", "lang": "en", "limit": 7}, extra={"shape": shape}
+        )
+
+    assert len(httpx_mock.calls) == 2
+
+
 def test_autocomplete_unavailable(mock_autocomplete_unavailable):
     client = TestClient(app)
     resp = client.get("http://localhost/v1/autocomplete", params={"q": "paris"})
@@ -155,6 +191,39 @@ def test_autocomplete_with_nlu_cat(mock_autocomplete_get, mock_NLU_with_cat):
     )
 
 
+def test_autocomplete_with_nlu_cache(mock_autocomplete_get, mock_NLU_with_cat, httpx_mock):
+    client = TestClient(app)
+
+    for _ in range(2):
+        assert_intention(
+            client,
+            params={"q": "pharmacie", "lang": "fr", "limit": 7, "nlu": True},
+            expected_intention={
+                "type": "category",
+                "filter": {"q": "pharmacie", "category": "pharmacy"},
+                "description": {"category": "pharmacy"},
+            },
+            expected_intention_place=None,
+        )
+
+    # The case of the query is ignored by the cache
+    assert_intention(
+        client,
+        params={"q": "Pharmacie", "lang": "fr", "limit": 7, "nlu": True},
+        expected_intention={
+            "type": "category",
+            "filter": {"q": "pharmacie", "category": "pharmacy"},
+            "description": {"category": "pharmacy"},
+        },
+        expected_intention_place=None,
+    )
+
+    # Following intentions are read from the cache
+    nlu_urls = [str(call.request.url) for call in httpx_mock.calls]
+    assert nlu_urls.count(NLU_URL) == 1
+    assert sum(url.startswith(CLASSIF_URL) for url in nlu_urls) == 1
+
+
 def test_autocomplete_with_nlu_regex_cat(mock_autocomplete_get, mock_NLU_with_cat_bank):
     # "bank" is not identified by the classifier, we expect a fallback through the regex engine.
     client = TestClient(app)
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from idunn.blocks import DescriptionBlock, ImagesBlock
+from idunn.places import OsmPOI
+from idunn.utils import verbosity
+from idunn.utils.verbosity import Verbosity, build_blocks, build_blocks_async
+
+
+def get_poi():
+    return OsmPOI(
+        {
+            "id": "osm:node:5286293722",
+            "name": "Le Fleurus",
+            "coord": {"lon": 2.3298, "lat": 48.8463},
+            "poi_type": {"id": "class_bar:subclass_bar", "name": "class_bar subclass_bar"},
+            "properties": {
+                "opening_hours": "Mo-Su 09:00-23:00",
+                "phone": "+33 1 45 44 18 24",
+                "image": "https://example.com/fleurus.jpg",
+                "description": "Bar de quartier",
+            },
+            "administrative_regions": [{"country_codes": ["FR"]}],
+        }
+    )
+
+
+def test_async_blocks_match_sync_blocks():
+    poi = get_poi()
+    sync_blocks = build_blocks(poi, "fr", Verbosity.LONG)
+    async_blocks = asyncio.run(build_blocks_async(poi, "fr", Verbosity.LONG))
+    assert [b.type for b in async_blocks] == [b.type for b in sync_blocks]
+    assert async_blocks == sync_blocks
+
+
+def test_io_blocks_run_concurrently(monkeypatch):
+    def slow_from_es(cls, place, lang):
+        time.sleep(0.3)
+        return None
+
+    monkeypatch.setattr(DescriptionBlock, "from_es", classmethod(slow_from_es))
+    monkeypatch.setattr(ImagesBlock, "from_es", classmethod(slow_from_es))
+
+    start = time.monotonic()
+    blocks = asyncio.run(build_blocks_async(get_poi(), "fr", Verbosity.LONG))
+    assert time.monotonic() - start < 0.55
+    assert {"opening_hours", "phone"} <= {b.type for b in blocks}
+
+
+def test_io_block_exceeding_budget_is_skipped(monkeypatch):
+    def slow_from_es(cls, place, lang):
+        time.sleep(0.3)
+        return cls(images=[])
+
+    monkeypatch.setattr(verbosity, "BLOCKS_IO_TIMEOUT", 0.1)
+    monkeypatch.setattr(ImagesBlock, "from_es", classmethod(slow_from_es))
+
+    blocks = asyncio.run(build_blocks_async(get_poi(), "fr", Verbosity.LONG))
+    block_types = [b.type for b in blocks]
+    assert "images" not in block_types
+    assert {"opening_hours", "phone"} <= set(block_types)
@@ -1,12 +1,18 @@
+import asyncio
 import responses
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Timer
 from unittest import mock
 from redis import Redis, RedisError
 from app import app, settings
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
-from idunn.utils.cache import async_timed_lru_cache
-from idunn.utils.redis import RedisWrapper
+from idunn.utils.cache import async_timed_lru_cache, SizedTimedLRUCache
+from idunn.utils import redis as redis_utils
+from idunn.utils.redis import AsyncRedisWrapper, RedisWrapper
+from idunn.utils.redis_codec import decode_value, encode_value
 from functools import wraps
 import pytest
 
@@ -186,3 +192,189 @@ async def test_lru_cache_with_expiration():
     # Etc...
     with freeze_time("2022-04-26 12:00:00"):
         assert await counter.get_counter(incr=1) == 18
+
+
+def test_redis_local_cache(cache_test_normal):
+    """
+    Values fetched once are served by the in-process cache without Redis
+    """
+    calls = []
+
+    def fetch_data():
+        calls.append(1)
+        return {"value": 42}
+
+    cached = RedisWrapper.cache_it("test_local_cache_key", fetch_data, prefix="test")
+    assert cached() == {"value": 42}
+    assert len(calls) == 1
+
+    with mock.patch.object(Redis, "get", side_effect=RedisError) as redis_get:
+        assert cached() == {"value": 42}
+        assert redis_get.call_count == 0
+
+    assert len(calls) == 1
+    RedisWrapper._connection.delete("test_local_cache_key")
+
+
+def test_sized_lru_cache():
+    cache = SizedTimedLRUCache(maxsize=3, maxbytes=10, seconds=60)
+
+    with freeze_time("2022-04-25 12:00:00"):
+        cache.put("a", 1, size=4)
+        cache.put("b", 2, size=4)
+        assert cache.get("a") == 1
+
+        # "b" is the least recently used entry and is evicted to fit 10 bytes
+        cache.put("c", 3, size=4)
+        assert cache.size == 8
+        with pytest.raises(IndexError):
+            cache.get("b")
+
+        # Values larger than the cache are not stored
+        cache.put("d", 4, size=11)
+        with pytest.raises(IndexError):
+            cache.get("d")
+
+        cache.put("e", 5, size=1, seconds=10)
+
+    with freeze_time("2022-04-25 12:00:30"):
+        assert cache.get("a") == 1
+        with pytest.raises(IndexError):
+            cache.get("e")
+
+    with freeze_time("2022-04-25 12:01:01"):
+        with pytest.raises(IndexError):
+            cache.get("c")
+
+
+def test_redis_cache_single_flight(cache_test_normal):
+    """
+    Concurrent misses on the same key only compute the value once
+    """
+    calls = []
+
+    def fetch_data():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    key = "test_single_flight_key"
+    cached = RedisWrapper.cache_it(key, fetch_data)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(lambda _: cached(), range(5)))
+
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    RedisWrapper._connection.delete(key)
+
+
+def test_redis_cache_serves_stale_value(cache_test_normal):
+    """
+    An expired value is returned while it is refreshed in background
+    """
+    key = "test_stale_key"
+    cached = RedisWrapper.cache_it(key, lambda: "new value", expire=60)
+    RedisWrapper.init_cache()
+
+    # The value expired 10 seconds ago but is kept for REDIS_CACHE_STALE_TTL seconds
+    RedisWrapper._connection.set(
+        key, encode_value("old value"), ex=redis_utils.REDIS_CACHE_STALE_TTL - 10
+    )
+    assert cached() == "old value"
+
+    for _ in range(20):
+        if decode_value(RedisWrapper._connection.get(key)) == "new value":
+            break
+        time.sleep(0.05)
+
+    assert decode_value(RedisWrapper._connection.get(key)) == "new value"
+    assert RedisWrapper._connection.ttl(key) > redis_utils.REDIS_CACHE_STALE_TTL
+    assert cached() == "new value"
+    RedisWrapper._connection.delete(key)
+
+
+def test_async_redis_get_and_set_many(cache_test_normal):
+    async def set_and_get():
+        await AsyncRedisWrapper.set_many({"test_many_1": b"1", "test_many_2": b"2"}, expire=60)
+        return await AsyncRedisWrapper.get_many(["test_many_1", "test_many_missing", "test_many_2"])
+
+    assert asyncio.run(set_and_get()) == [b"1", None, b"2"]
+    RedisWrapper._connection.delete("test_many_1", "test_many_2")
+
+
+def test_redis_prefetched_values(cache_test_normal):
+    """
+    Values fetched in advance are read without a new request to Redis
+    """
+    key = "test_prefetch_key"
+    cached = RedisWrapper.cache_it(key, lambda: "computed value")
+    RedisWrapper._connection.set(
+        key, encode_value("cached value"), ex=redis_utils.REDIS_CACHE_STALE_TTL + 60
+    )
+
+    values = asyncio.run(AsyncRedisWrapper.get_many_with_ttl([key]))
+
+    with mock.patch.object(Redis, "get", side_effect=RedisError) as redis_get:
+        with RedisWrapper.use_prefetched_values(values):
+            assert cached() == "cached value"
+        assert redis_get.call_count == 0
+
+    RedisWrapper._connection.delete(key)
+
+
+def test_redis_lease_follower_with_prefetched_values(cache_test_normal):
+    """
+    A value computed by the holder of the lease is read from Redis, even if a
+    miss was prefetched for the current request
+    """
+    key = "test_prefetch_lease_key"
+    calls = []
+
+    def fetch_data():
+        calls.append(1)
+        return "computed value"
+
+    cached = RedisWrapper.cache_it(key, fetch_data)
+    RedisWrapper.init_cache()
+    RedisWrapper._connection.delete(key)
+    values = asyncio.run(AsyncRedisWrapper.get_many_with_ttl([key]))
+    assert values[key][0] is None
+
+    # Another process holds the lease and stores the value shortly after
+    lease = RedisWrapper._connection.lock(f"lease_{key}", timeout=5)
+    assert lease.acquire(blocking=False)
+    store = Timer(
+        0.1,
+        RedisWrapper._connection.set,
+        args=(key, encode_value("stored value")),
+        kwargs={"ex": redis_utils.REDIS_CACHE_STALE_TTL + 60},
+    )
+    store.start()
+
+    try:
+        with RedisWrapper.use_prefetched_values(values):
+            start = time.monotonic()
+            assert cached() == "stored value"
+            assert time.monotonic() - start < redis_utils.REDIS_CACHE_LEASE_WAIT
+        assert calls == []
+    finally:
+        store.join()
+        lease.release()
+        RedisWrapper._connection.delete(key)
+
+
+@pytest.mark.parametrize("invalid_value", [b"\x03junk", b"\x02junk", b"\x01{", b""])
+def test_redis_cache_invalid_value(cache_test_normal, invalid_value):
+    """
+    A value that can't be decoded is computed again and overwritten
+    """
+    key = "test_invalid_value_key"
+    cached = RedisWrapper.cache_it(key, lambda: "new value", expire=60)
+    RedisWrapper.init_cache()
+    RedisWrapper._connection.set(key, invalid_value, ex=redis_utils.REDIS_CACHE_STALE_TTL + 60)
+
+    assert RedisWrapper.get_json(key) is None
+    assert cached() == "new value"
+    assert decode_value(RedisWrapper._connection.get(key)) == "new value"
+    RedisWrapper._connection.delete(key)
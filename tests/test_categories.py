@@ -1,8 +1,14 @@
+import asyncio
+from unittest import mock
 from unittest.mock import ANY
 from app import app
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
 
+from idunn.api import places_list
+from idunn.api.places_list import PlacesQueryParam
+from idunn.utils.verbosity import Verbosity
+
 from .fixtures.api.pj import mock_pj_api_with_musee_picasso_short
 from .test_full import OH_BLOCK
 
@@ -564,6 +570,37 @@ def test_extend_bbox():
     assert data["bbox"] == [2.338028, 48.861147, 2.338028, 48.861147]
 
 
+def test_extend_bbox_queries_are_concurrent():
+    queried_bboxes = []
+    running = []
+
+    async def fetch_places_list(params):
+        queried_bboxes.append(params.bbox)
+        running.append(params.bbox)
+        await asyncio.sleep(0.01)
+        # Both queries are sent before any of them gets its results
+        assert len(running) == 2
+        return ["place"] if params.bbox == extended_bbox else []
+
+    params = PlacesQueryParam(
+        bbox="2.350,48.850,2.351,48.851",
+        raw_filter=["museum,museum"],
+        extend_bbox=True,
+        verbosity=Verbosity.default_list(),
+    )
+    original_bbox = params.bbox
+    extended_bbox = places_list._get_extended_bbox(params)
+
+    with mock.patch.object(places_list, "_fetch_places_list", new=fetch_places_list):
+        assert asyncio.run(places_list._fetch_places_list_or_extended(params, extended_bbox)) == (
+            True,
+            ["place"],
+        )
+
+    assert queried_bboxes == [original_bbox, extended_bbox]
+    assert params.bbox == extended_bbox
+
+
 def test_invalid_bbox():
     """
     Test an invalid bbox query:
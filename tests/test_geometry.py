@@ -0,0 +1,31 @@
+import random
+
+from shapely.geometry import Point, box
+
+from idunn.utils.geometry import bbox_inside_polygon, city_surrounds_polygons, france_polygon
+
+
+def test_france_coverage():
+    assert bbox_inside_polygon(2.2, 48.8, 2.5, 48.9, poly=france_polygon)
+    assert not bbox_inside_polygon(-20, 48.8, -19, 48.9, poly=france_polygon)
+    assert not bbox_inside_polygon(-3, 43, 3, 48, poly=france_polygon, threshold=0.99)
+    assert france_polygon.contains(Point(2.35, 48.85))
+    assert not france_polygon.contains(Point(-0.12, 51.5))
+
+
+def test_prepared_polygon_matches_exact_geometry():
+    rnd = random.Random(0)
+
+    for poly in [france_polygon, *city_surrounds_polygons.values()]:
+        minx, miny, maxx, maxy = poly.polygon.bounds
+
+        for _ in range(500):
+            x = rnd.uniform(minx - 0.5, maxx + 0.5)
+            y = rnd.uniform(miny - 0.5, maxy + 0.5)
+            size = rnd.choice([0.01, 0.1, 1]) * (maxx - minx) * rnd.random() + 1e-6
+            rect = box(x, y, x + size, y + size)
+            expected = poly.polygon.intersection(rect).area / rect.area > 0.75
+            assert poly.covers_bbox(x, y, x + size, y + size, 0.75) == expected
+
+            point = Point(rnd.uniform(minx, maxx), rnd.uniform(miny, maxy))
+            assert poly.contains(point) == poly.polygon.contains(point)
@@ -1,8 +1,20 @@
 # pylint: disable = redefined-outer-name, unused-argument, unused-import
 
+import asyncio
+import time
+from unittest import mock
+
 import pytest
 from fastapi.testclient import TestClient
+from freezegun import freeze_time
 from app import app
+from idunn.api import instant_answer
+from idunn.api.instant_answer import (
+    InstantAnswerTrace,
+    build_single_ia_result,
+    get_first_search_result,
+)
+from idunn.places import OsmPOI
 
 from ..fixtures.geocodeur.autocomplete import (
     mock_autocomplete_get,
@@ -140,3 +152,108 @@ def test_ia_query_too_long():
 #     places = response.json()["data"]["result"]["places"]
 #     assert len(places) == 1
 #     assert places[0]["name"] == "43 Rue de Paris"
+
+
+class FakeDatasource:
+    def __init__(self, delay, result):
+        self.delay = delay
+        self.result = result
+        self.resolved = False
+
+    async def filter_search_result(self, results, lang, normalized_query):
+        await asyncio.sleep(self.delay)
+        self.resolved = True
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def test_ia_datasources_are_resolved_concurrently():
+    async def search():
+        return {}
+
+    async def run(priority_list, trace=None):
+        # Searches are already running when results are resolved
+        priority_list = [(d, asyncio.create_task(search())) for d in priority_list]
+        return await get_first_search_result(
+            priority_list, "fr", "query", trace or InstantAnswerTrace()
+        )
+
+    # Lower-priority results are used if higher-priority sources have none
+    sources = [FakeDatasource(0.05, None), FakeDatasource(0.05, "ta"), FakeDatasource(0, "osm")]
+    start = time.monotonic()
+    assert asyncio.run(run(sources)) == "ta"
+    assert time.monotonic() - start < 0.1
+
+    # Remaining work is cancelled once the answer is known
+    sources = [FakeDatasource(0, "pj"), FakeDatasource(0.05, "osm")]
+    assert asyncio.run(run(sources)) == "pj"
+    assert not sources[1].resolved
+
+    # Searches are not cancelled, as it could leak connections of httpx pool
+    async def run_with_slow_search():
+        searches = [asyncio.create_task(search()), asyncio.create_task(asyncio.sleep(0.05))]
+        sources = [FakeDatasource(0, "pj"), FakeDatasource(0, "osm")]
+        result = await get_first_search_result(
+            list(zip(sources, searches)), "fr", "query", InstantAnswerTrace()
+        )
+        await asyncio.sleep(0.06)
+        return result, searches[1]
+
+    result, slow_search = asyncio.run(run_with_slow_search())
+    assert result == "pj"
+    assert slow_search.done() and not slow_search.cancelled()
+
+    # The failure of a datasource is recorded in the trace
+    trace = InstantAnswerTrace()
+    sources = [FakeDatasource(0, Exception("ES is down")), FakeDatasource(0, "osm")]
+    assert asyncio.run(run(sources, trace)) == "osm"
+    assert trace.degraded
+
+
+def test_ia_cache():
+    place = OsmPOI(
+        {
+            "id": "osm:node:42",
+            "name": "Musée",
+            "coord": {"lon": 2.35, "lat": 48.85},
+            "properties": {"opening_hours": "Mo-Su 10:00-18:00"},
+            "administrative_regions": [],
+        }
+    )
+    queries = []
+
+    async def get_instant_answer_result(normalized_query, lang, user_country, trace):
+        queries.append(normalized_query)
+        if normalized_query == "musee":
+            return build_single_ia_result(await place.load_place_async(lang))
+        if normalized_query == "degraded":
+            trace.degraded = True
+        return None
+
+    client = TestClient(app)
+    instant_answer.ia_cache.clear()
+
+    def get_opening_status(q):
+        response = client.get("/v1/instant_answer", params={"q": q, "lang": "fr"})
+        if response.status_code == 204:
+            return None
+        place_blocks = response.json()["data"]["result"]["places"][0]["blocks"]
+        return next(b["status"] for b in place_blocks if b["type"] == "opening_hours")
+
+    with mock.patch.object(
+        instant_answer, "get_instant_answer_result", new=get_instant_answer_result
+    ):
+        with freeze_time("2021-06-14 7:59:40", tz_offset=0):
+            assert get_opening_status("musee") == "closed"
+            assert get_opening_status("unknown") is None
+            assert get_opening_status("degraded") is None
+
+        # The opening status of cached answers is up to date
+        with freeze_time("2021-06-14 8:00:20", tz_offset=0):
+            assert get_opening_status("Musee") == "open"
+            assert get_opening_status("unknown") is None
+            assert get_opening_status("degraded") is None
+
+    # Degraded results are not cached
+    assert queries == ["musee", "unknown", "degraded", "degraded"]
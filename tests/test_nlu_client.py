@@ -1,4 +1,9 @@
-from idunn.geocoder.nlu_client import NLU_Helper
+import asyncio
+
+import httpx
+import pytest
+
+from idunn.geocoder.nlu_client import IntentionTrace, NLU_Helper, NluClientException
 
 
 def test_classifier_handle_response():
@@ -9,3 +14,40 @@ def test_classifier_handle_response():
     assert cat_for({"intention": [(0.99, "restaurant"), (0.90, "pharmacy")]}) is None
     assert cat_for({"intention": [(0.99, "restaurant"), (0.20, "unk")]}) is None
     assert cat_for({"intention": [(0.99, "restaurant"), (0.01, "unk")]}).value == "restaurant"
+
+
+def test_cached_failure_keeps_logs_extra(monkeypatch):
+    nlu_helper = NLU_Helper()
+    calls = 0
+
+    async def failing_resolve_intention(*args):
+        nonlocal calls
+        calls += 1
+        exc = NluClientException("no category or brand")
+        exc.extra.update({"nlu_tags": ["cat"]})
+        raise exc
+
+    monkeypatch.setattr(nlu_helper, "resolve_intention", failing_resolve_intention)
+
+    extras = []
+    for text in ["pharmacie", "Pharmacie "]:
+        with pytest.raises(NluClientException) as exc_info:
+            asyncio.run(nlu_helper.get_intention(text, "fr"))
+        extras.append(exc_info.value.extra)
+
+    assert calls == 1
+    assert extras[0] == extras[1] == {"reason": "no category or brand", "nlu_tags": ["cat"]}
+
+
+def test_failed_tagger_is_traced(monkeypatch):
+    nlu_helper = NLU_Helper()
+
+    async def failing_post_intentions(*args):
+        raise httpx.ConnectTimeout("timeout")
+
+    monkeypatch.setattr(nlu_helper, "post_intentions", failing_post_intentions)
+
+    trace = IntentionTrace()
+    assert asyncio.run(nlu_helper.get_intention("pharmacie", "fr", trace=trace)) is None
+    assert trace.stages == ["tagger"]
+    assert trace.degraded
@@ -8,9 +8,11 @@ Moscow city.
 """
 
 from freezegun import freeze_time
+from unittest import mock
 from unittest.mock import ANY
 from idunn.blocks.opening_hour import OpeningHourBlock
 from idunn.places import OsmPOI
+from idunn.utils import opening_hours
 
 
 def get_oh_block(opening_hours, lat=48.0, lon=2.0, country_code="FR"):
@@ -567,3 +569,24 @@ def test_opening_hours_unknown_public_holidays():
     )
     assert len(oh_in_tokyo.days) == 7
     assert sum(1 if d.status == "open" else 0 for d in oh_in_tokyo.days) == 5
+
+
+@freeze_time("2020-07-21T08:00:00")
+def test_opening_hours_week_cache():
+    """
+    Weekly schedules of places sharing the same opening hours are computed once
+    """
+    opening_hours.get_week_intervals.cache_clear()
+    get_open_intervals = opening_hours.OpeningHours.get_open_intervals
+
+    with mock.patch.object(
+        opening_hours.OpeningHours,
+        "get_open_intervals",
+        autospec=True,
+        side_effect=get_open_intervals,
+    ) as mock_get_open_intervals:
+        blocks = [get_moscow_oh("Mo-Sa 09:00-19:00") for _ in range(3)]
+        assert mock_get_open_intervals.call_count == 1
+
+    assert blocks[0] == blocks[1] == blocks[2]
+    assert blocks[0].days[6].status == "closed"
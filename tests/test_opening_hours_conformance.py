@@ -0,0 +1,134 @@
+"""
+Check that the Python implementation of opening hours gives the same results
+as opening_hours.js on a corpus of expressions.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from idunn.utils.opening_hours import OpeningHours, engine
+from idunn.utils.opening_hours_rules import OpeningHoursRules, UnsupportedOpeningHours
+
+SUPPORTED_EXPRESSIONS = [
+    "24/7",
+    "Mo-Su 09:00-23:00",
+    "Mo-Sa 10:00-22:00; Su 10:00-14:00, 18:00-22:00",
+    "Mo-Fr 08:00-12:00,13:30-17:30; Sa 08:00-12:00",
+    "Mo-Fr 07:30-12:00, 14:00-19:00; Sa 08:00-12:00",
+    "Mo-Su 09:00-00:00",
+    "Mo-Su 09:00-02:00",
+    "Mo-Su 06:00-01:00",
+    "Fr-Sa 18:00-04:00; Su-Th 18:00-01:00",
+    "Mo 22:00-26:00",
+    "Mo-Fr 10:00-48:00",
+    "We-Mo 11:00-19:00",
+    "Tu-Su 08:30-24:00",
+    "Tu-Su 09:30-18:00; Th 09:30-21:45",
+    "Tu 08:30-18:30; We 08:30-18:30; Th 08:30-18:30; Fr 08:30-18:30; Sa 08:30-13:00",
+    "Mo-Su 18:00-22:00, Mo-Fr 11:00-14:00",
+    "Mo-Su 10:00-12:00, 11:00-14:00",
+    "Mo-Fr 08:00-18:00; Fr 12:00-13:00 off",
+    "Mo-Fr 08:00-18:00, We off",
+    "Mo-Fr 10:00-12:00; Tu-We off; We 15:00-16:00",
+    "Mo-Th 10:00-18:00; Fr 10:00-17:00; Sa-Su closed",
+    "Mo-Fr 09:00-17:00; Mo-Fr 12:00-13:00 closed",
+    "Mo 20:00-02:00; Tu off",
+    "Mo 20:00-02:00; Tu 10:00-12:00",
+    "Tu 10:00-12:00; Mo 20:00-02:00",
+    "Mo 20:00-02:00; Mo off",
+    "Mo 20:00-02:00, Tu 01:00-03:00",
+    "Mo-Su 09:00-02:00; Tu 01:00-12:00 off",
+    "Mo 10:00-12:00; 14:00-16:00",
+    "Mo 10:00-12:00; 24/7",
+    "12:00-26:00; 06:00-00:00",
+    "10:00-12:00 off; Mo 09:00-13:00",
+    "Mo-Fr 10:00-12:00; We",
+    "Mo 10:00-12:00, We",
+    "Mo off, We 10:00-11:00",
+    "Jan-Feb 10:00-20:00",
+    "Oct-Mar 07:30-19:30; Apr-Sep 07:00-21:00",
+    "Jun-Aug Mo-Su 09:00-20:00; Sep-May Mo-Fr 09:00-18:00",
+    "Mar-Oct: Mo-Su 10:00-18:00; Nov-Feb: Sa,Su 10:00-16:00",
+    "Mo,Th,Sa,Su 09:00-18:00; We,Fr 09:00-21:45; Tu off; Jan 1,May 1,Dec 25: off",
+    "Nov 3-Apr 30: 08:00-17:00; May 2-Nov 2: 08:00-17:30; Jul 14 off; May 1 off",
+    "Mo-Su 10:00-18:00; Dec 25-Jan 1 off",
+    "Dec 24 10:00-14:00; Dec 25 off",
+    "Jul 21-23 10:00-12:00",
+    "Apr 1-Sep 30: off",
+]
+
+UNSUPPORTED_EXPRESSIONS = [
+    "Mo-Sa 11:00-23:00 ; PH off",
+    "Mo-Su 12:00-14:30; Mo-Su,PH 19:00-22:30",
+    "sunrise-sunset",
+    "2018 Jul 02- 2018 Sep 02 Mo-Su 08:00-20:00",
+    'Mo-Fr 10:00-18:00 || "on appointment"',
+    "Su[1] 10:00-12:00",
+    "Mo-Fr 10:00+",
+    "Mo 10:00-12:00;",
+    "24/7, Dec 25 off",
+    "Feb 29 10:00-12:00",
+    "all day long",
+]
+
+DATETIMES = [
+    datetime(2018, 6, 14, 11, 30),
+    datetime(2019, 1, 1, 0, 0),
+    datetime(2019, 12, 31, 23, 59, 30),
+    datetime(2020, 2, 29, 12, 0),
+    datetime(2020, 7, 20, 1, 30),
+    datetime(2021, 3, 28, 2, 30),
+    datetime(2021, 11, 7, 19, 45),
+]
+
+
+def iso(dt):
+    return dt.isoformat() if dt is not None else None
+
+
+@pytest.mark.parametrize("raw", SUPPORTED_EXPRESSIONS)
+def test_conformance_with_js(raw):
+    rules = OpeningHoursRules(raw)
+    engine.call("validate", raw, None)
+
+    for dt in DATETIMES:
+        assert rules.is_open(dt) == engine.call("wrapIsOpen", raw, None, dt.isoformat())
+
+        try:
+            next_change = iso(rules.next_change(dt))
+        except UnsupportedOpeningHours:
+            pass
+        else:
+            assert next_change == engine.call("wrapNextChange", raw, None, dt.isoformat())
+
+        end = dt + timedelta(days=9)
+        expected_intervals = engine.call(
+            "wrapOpenIntervals", raw, None, dt.isoformat(), end.isoformat()
+        )
+        assert [
+            [iso(rg_start), iso(rg_end), False, None]
+            for rg_start, rg_end in rules.get_open_intervals(dt, end)
+        ] == expected_intervals
+
+
+@pytest.mark.parametrize("raw", UNSUPPORTED_EXPRESSIONS)
+def test_unsupported_expressions(raw):
+    with pytest.raises(UnsupportedOpeningHours):
+        OpeningHoursRules(raw)
+
+
+def test_fallback_to_js():
+    tz = pytz.timezone("Europe/Paris")
+    dt = tz.localize(datetime(2019, 7, 14, 10, 0))
+
+    oh = OpeningHours("Mo-Su 09:00-19:00; PH off", tz, "FR")
+    assert oh.rules is None
+    assert oh.validate()
+    assert not oh.is_open(dt)
+    assert oh.next_change(dt) == tz.localize(datetime(2019, 7, 15, 0, 0))
+
+    oh = OpeningHours("Mo-Su 09:00-19:00", tz, "FR")
+    assert oh.rules is not None
+    assert oh.is_open(dt)
+    assert oh.next_change(dt) == tz.localize(datetime(2019, 7, 14, 19, 0))
@@ -1,6 +1,12 @@
+import asyncio
+import json
+import os
+from unittest import mock
+
 from fastapi.testclient import TestClient
 
 from app import app
+from idunn.datasources.pages_jaunes import PagesJaunes
 
 from .fixtures.api.pj import (
     mock_pj_api_with_musee_picasso,
@@ -9,6 +15,8 @@ from .fixtures.api.pj import (
     mock_pj_api_with_musee_picasso_short,
 )
 
+PJ_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "api", "pj")
+
 
 def test_pj_place(mock_pj_api_with_musee_picasso):
     client = TestClient(app)
@@ -146,3 +154,30 @@ def test_pj_api_hotel(mock_pj_api_with_hotel_hilton):
             {"has_stars": "yes", "nb_stars": 4.0, "kind": "lodging"},
         ],
     }
+
+
+def test_pj_find_pages_fetched_concurrently():
+    listing = json.load(open(os.path.join(PJ_FIXTURES, "api_musee_picasso.json")))
+    pj_source = PagesJaunes()
+    requested_pages = []
+
+    async def get_from_params_async(_url, params=None):
+        page = (params or {}).get("page", 1)
+        requested_pages.append(page)
+        return {
+            "search_results": {"listings": [listing, listing]},
+            "context": {
+                "pages": {
+                    "current_page": page,
+                    "page_count": 10,
+                    "listings_per_page": 2,
+                    "next_page_url": "https://api.pagesjaunes.fr/v1/pros/search?page=next",
+                }
+            },
+        }
+
+    with mock.patch.object(pj_source, "get_from_params_async", new=get_from_params_async):
+        places = asyncio.run(pj_source.search_places("musée picasso", place_in_query=True, size=5))
+
+    assert len(places) == 5
+    assert sorted(requested_pages) == [1, 2, 3]
@@ -13,6 +13,9 @@ from freezegun import freeze_time
 from elasticsearch import Elasticsearch, ElasticsearchException
 from unittest.mock import patch
 
+from idunn.datasources.mimirsbrunn import get_place_index_from_id
+from idunn.utils.es_wrapper import AsyncMimirElasticsearch
+
 from .test_full import OH_BLOCK
 
 
@@ -643,9 +646,80 @@ def mock_search(detail, *args, **kwargs):
     raise ElasticsearchException
 
 
+async def mock_perform_request(*args, **kwargs):
+    raise ElasticsearchException
+
+
 @patch.object(Elasticsearch, "search", new=mock_search)
+@patch.object(AsyncMimirElasticsearch, "perform_request", new=mock_perform_request)
 def test_no_es():
     client = TestClient(app)
 
     response = client.get(url="http://localhost/v1/places/osm:way:63178753?lang=fr&type=poi")
     assert response.status_code == 503
+
+
+def test_place_index_from_id():
+    assert get_place_index_from_id("admin:osm:relation:7444", None) == "munin_admin"
+    assert get_place_index_from_id("addr:2.3;48.8:12", None) == "munin_addr"
+    assert get_place_index_from_id("osm:way:63178753", None) == "munin_poi,munin_poi_nosearch"
+    assert get_place_index_from_id("ta:node:36153811", None) == "munin_poi_tripadvisor"
+    assert get_place_index_from_id("osm:way:63178753", "address") == "munin_addr"
+    assert get_place_index_from_id("unknown:1", None) is None
+
+
+def test_places_batch():
+    client = TestClient(app)
+    response = client.get(
+        url="http://localhost/v1/places/batch",
+        params={
+            "ids": [
+                "osm:way:63178753",
+                "admin:osm:relation:123057",
+                "osm:way:63178753",
+                "osm:node:0",
+                "invalid",
+            ],
+            "lang": "fr",
+        },
+    )
+    assert response.status_code == 200
+
+    resp = response.json()
+    assert [place["id"] for place in resp["places"]] == [
+        "osm:way:63178753",
+        "admin:osm:relation:123057",
+    ]
+    assert resp["places"][0]["name"] == "Musée d'Orsay"
+    assert resp["errors"] == [
+        {"id": "osm:node:0", "status": 404, "detail": "place 'osm:node:0' not found"},
+        {"id": "invalid", "status": 404, "detail": "Invalid place id: 'invalid'"},
+    ]
+
+
+def test_places_batch_without_es():
+    client = TestClient(app)
+    with patch("idunn.api.places.log_place_request") as log_place_request:
+        response = client.get(
+            url="http://localhost/v1/places/batch",
+            params={"ids": ["latlon:48.85:2.35", "invalid"]},
+        )
+    assert response.status_code == 200
+
+    # Requests of places are logged as for single places
+    assert log_place_request.call_count == 1
+
+    resp = response.json()
+    assert [place["id"] for place in resp["places"]] == ["latlon:48.85000:2.35000"]
+    assert resp["errors"] == [
+        {"id": "invalid", "status": 404, "detail": "Invalid place id: 'invalid'"}
+    ]
+
+
+def test_places_batch_too_many_ids():
+    client = TestClient(app)
+    response = client.get(
+        url="http://localhost/v1/places/batch",
+        params={"ids": [f"osm:node:{i}" for i in range(51)]},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,128 @@
+import asyncio
+import random
+from unittest import mock
+
+import pytest
+
+from idunn.datasources import mimirsbrunn
+from idunn.datasources.mimirsbrunn import MimirPoiFilter, fetch_es_pois_by_tiles_async
+
+
+def make_pois(count, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {
+            "_id": f"osm:node:{i}",
+            "_source": {
+                "coord": {"lon": rnd.uniform(2.2, 2.5), "lat": rnd.uniform(48.8, 48.9)},
+                "weight": rnd.random(),
+            },
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def fake_es_pois():
+    """Mock Elasticsearch queries, counting them"""
+    pois = []
+    queries = []
+
+    async def search_es_pois_async(_index_name, _filters, bbox, max_size):
+        queries.append(bbox)
+        left, bot, right, top = bbox
+        hits = [
+            poi
+            for poi in pois
+            if left <= poi["_source"]["coord"]["lon"] <= right
+            and bot <= poi["_source"]["coord"]["lat"] <= top
+        ]
+        hits = sorted(hits, key=lambda poi: poi["_source"]["weight"], reverse=True)[:max_size]
+        return {"timed_out": False, "_shards": {"total": 1, "failed": 0}, "hits": {"hits": hits}}
+
+    mimirsbrunn.clear_pois_tiles_cache()
+    with mock.patch.object(mimirsbrunn, "search_es_pois_async", new=search_es_pois_async):
+        yield pois, queries, mimirsbrunn.fetch_es_pois_async
+    mimirsbrunn.clear_pois_tiles_cache()
+
+
+def test_tiles_match_direct_query(fake_es_pois):
+    pois, queries, fetch_direct = fake_es_pois
+    pois += make_pois(300)
+    filters = [MimirPoiFilter("museum")]
+    rnd = random.Random(1)
+
+    async def run():
+        for _ in range(50):
+            left, bot = rnd.uniform(2.2, 2.45), rnd.uniform(48.8, 48.88)
+            bbox = (left, bot, left + rnd.uniform(0.01, 0.05), bot + rnd.uniform(0.01, 0.02))
+            size = rnd.choice([1, 10, 50])
+            assert await fetch_es_pois_by_tiles_async(
+                "poi", filters, bbox, size
+            ) == await fetch_direct("poi", filters, bbox, size)
+
+    asyncio.run(run())
+
+
+def test_tiles_are_shared(fake_es_pois):
+    pois, queries, _ = fake_es_pois
+    pois += make_pois(50)
+    filters = [MimirPoiFilter("museum")]
+
+    async def run():
+        await fetch_es_pois_by_tiles_async("poi", filters, (2.30, 48.84, 2.35, 48.86), 10)
+        count = len(queries)
+        await fetch_es_pois_by_tiles_async("poi", filters, (2.301, 48.841, 2.351, 48.861), 10)
+        assert len(queries) == count
+
+        # Other filters are cached separately
+        await fetch_es_pois_by_tiles_async("poi", [], (2.30, 48.84, 2.35, 48.86), 10)
+        assert len(queries) > count
+
+    asyncio.run(run())
+
+
+def test_partial_tiles_are_not_cached(fake_es_pois):
+    pois, queries, _ = fake_es_pois
+    pois += make_pois(50)
+    filters = [MimirPoiFilter("museum")]
+    bbox = (2.30, 48.84, 2.35, 48.86)
+    search = mimirsbrunn.search_es_pois_async
+
+    async def search_timed_out(*args):
+        return {**await search(*args), "timed_out": True}
+
+    async def run():
+        with mock.patch.object(mimirsbrunn, "search_es_pois_async", new=search_timed_out):
+            await fetch_es_pois_by_tiles_async("poi", filters, bbox, 10)
+        count = len(queries)
+        await fetch_es_pois_by_tiles_async("poi", filters, bbox, 10)
+        assert len(queries) == 2 * count
+
+    asyncio.run(run())
+
+
+def test_tiles_of_cancelled_request_are_cached(fake_es_pois):
+    pois, queries, _ = fake_es_pois
+    pois += make_pois(50)
+    filters = [MimirPoiFilter("museum")]
+    bbox = (2.30, 48.84, 2.35, 48.86)
+    search = mimirsbrunn.search_es_pois_async
+
+    async def slow_search(*args):
+        await asyncio.sleep(0.05)
+        return await search(*args)
+
+    async def run():
+        with mock.patch.object(mimirsbrunn, "search_es_pois_async", new=slow_search):
+            request = asyncio.ensure_future(fetch_es_pois_by_tiles_async("poi", filters, bbox, 10))
+            await asyncio.sleep(0.01)
+            request.cancel()
+            await asyncio.sleep(0.1)
+
+        count = len(queries)
+        assert count > 0
+        await fetch_es_pois_by_tiles_async("poi", filters, bbox, 10)
+        assert len(queries) == count
+
+    asyncio.run(run())
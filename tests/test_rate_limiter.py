@@ -13,7 +13,7 @@ from .test_api_with_wiki import mock_wikipedia_response
 from .test_cache import has_wiki_desc
 from .utils import override_settings
 
-from redis import RedisError
+from redis import Redis, RedisError
 from redis_rate_limit import RateLimiter
 from functools import wraps
 
@@ -165,6 +165,29 @@ def test_rate_limiter_with_redisError(
     assert has_wiki_desc(resp)
 
 
+def test_rate_limiter_places_batch(limiter_test_normal):
+    """
+    Each place requested to /places/batch counts as a request to the places
+    endpoint: with `GET_PLACE_RL_MAX_REQUESTS` set to 60, a client can only
+    request 3 batches of 20 places.
+    """
+    client = TestClient(app)
+    headers = {"x-client-hash": "test_places_batch_client"}
+    ids = [f"latlon:48.85:{lon / 100:.2f}" for lon in range(230, 250)]
+    Redis(connection_pool=rate_limiter.redis_pool).delete(
+        "rate_limit:idunn.get_places_bbox_test_places_batch_client"
+    )
+
+    for _ in range(3):
+        response = client.get(
+            "http://localhost/v1/places/batch", params={"ids": ids}, headers=headers
+        )
+        assert response.status_code != 429
+
+    response = client.get("http://localhost/v1/places/batch", params={"ids": ids}, headers=headers)
+    assert response.status_code == 429
+
+
 def restart_wiki_redis(docker_services):
     """
     Because docker services ports are
@@ -0,0 +1,72 @@
+import json
+
+import orjson
+import pytest
+
+from idunn.utils import redis_codec
+from idunn.utils.redis_codec import (
+    InvalidCacheValue,
+    UnknownCacheFormat,
+    decode_value,
+    decode_value_with_size,
+    encode_value,
+    encode_value_with_size,
+)
+
+
+VALUE = {"title": "Musée du Louvre", "hits": [{"id": i, "score": 0.5} for i in range(3)]}
+
+
+def test_encode_small_value():
+    data = encode_value(VALUE)
+    assert data[:1] == redis_codec.FORMAT_ORJSON
+    assert decode_value(data) == VALUE
+
+
+def test_encode_large_value_is_compressed():
+    value = {"content": "Le musée du Louvre est un musée d'art. " * 200}
+    data = encode_value(value)
+    assert data[:1] == redis_codec.FORMAT_ORJSON_ZLIB
+    assert len(data) < len(json.dumps(value))
+    assert decode_value(data) == value
+
+
+def test_size_of_compressed_value():
+    value = {"content": "Le musée du Louvre est un musée d'art. " * 200}
+    data, size = encode_value_with_size(value)
+    assert size == len(orjson.dumps(value)) > len(data)
+    assert decode_value_with_size(data) == (value, size)
+
+    data, size = encode_value_with_size(value, codec="json")
+    assert size == len(data)
+    assert decode_value_with_size(data) == (value, size)
+
+
+def test_compression_disabled(monkeypatch):
+    monkeypatch.setattr(redis_codec, "REDIS_CACHE_COMPRESSION_THRESHOLD", 0)
+    value = {"content": "a" * 10000}
+    data = encode_value(value)
+    assert data[:1] == redis_codec.FORMAT_ORJSON
+    assert decode_value(data) == value
+
+
+def test_decode_legacy_json():
+    assert decode_value(json.dumps(VALUE).encode("utf-8")) == VALUE
+    assert decode_value(json.dumps(None).encode("utf-8")) is None
+    assert decode_value(encode_value(VALUE, codec="json")) == VALUE
+
+    # JSON may start with whitespace
+    assert decode_value(b"\t\r\n " + json.dumps(VALUE).encode("utf-8")) == VALUE
+
+
+def test_decode_unknown_format():
+    with pytest.raises(UnknownCacheFormat):
+        decode_value(b"\x03data")
+    with pytest.raises(UnknownCacheFormat):
+        decode_value(b"")
+
+
+@pytest.mark.parametrize("data", [b"\x02junk", b"\x01{", b"{", b"\xff"])
+def test_decode_corrupt_value(data):
+    with pytest.raises(InvalidCacheValue):
+        decode_value(data)
@@ -141,3 +141,18 @@ def test_empty_names():
         "place_type": "admin",
     }
     assert filter.check("Niort", **place_infos)
+
+
+def test_filter_batch():
+    filter = ResultFilter()
+    places = [
+        {"names": ["Rue de Paris"], "admins": ["Rennes"], "place_type": "street"},
+        {"names": ["Musée du Louvre"], "admins": ["Paris"], "place_type": "poi"},
+        {"names": ["Rue de Rennes"], "admins": ["Paris"], "place_type": "street"},
+    ]
+
+    def build_params(place):
+        return {"query": "rue de rennes paris", "postcodes": [], **place}
+
+    assert filter.filter(places, build_params) == [places[2], places[0]]
+    assert [filter.check(**build_params(place)) for place in places] == [True, False, True]
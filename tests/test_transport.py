@@ -0,0 +1,174 @@
+import asyncio
+import gzip
+
+import httpx
+
+from idunn.utils.transport import CoalescingTransport, HedgingTransport
+
+
+class SlowTransport(httpx.AsyncBaseTransport):
+    def __init__(self):
+        self.requests = []
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(
+            200,
+            headers={"Content-Encoding": "gzip"},
+            content=gzip.compress(str(request.url).encode()),
+        )
+
+
+def test_coalescing_transport():
+    upstream = SlowTransport()
+    transport = CoalescingTransport(upstream, name="test")
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(
+                *[client.get("http://upstream/a") for _ in range(5)],
+                client.get("http://upstream/b"),
+                client.post("http://upstream/a"),
+            )
+            assert [r.text for r in responses] == ["http://upstream/a"] * 5 + [
+                "http://upstream/b",
+                "http://upstream/a",
+            ]
+            assert len(upstream.requests) == 3
+
+            # Completed requests are not kept
+            assert transport.in_flight == {}
+            await client.get("http://upstream/a")
+            assert len(upstream.requests) == 4
+
+    asyncio.run(run())
+
+
+def test_coalescing_transport_ignored_params():
+    upstream = SlowTransport()
+    transport = CoalescingTransport(upstream, name="test", ignored_params=["request_id"])
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(
+                *[
+                    client.get("http://upstream/a", params={"q": "paris", "request_id": i})
+                    for i in range(5)
+                ],
+                client.get("http://upstream/a", params={"q": "lyon", "request_id": 0}),
+            )
+            assert len(upstream.requests) == 2
+            assert responses[4].text == "http://upstream/a?q=paris&request_id=0"
+            assert responses[5].text == "http://upstream/a?q=lyon&request_id=0"
+
+    asyncio.run(run())
+
+
+def test_coalescing_transport_cancelled_caller():
+    upstream = SlowTransport()
+    transport = CoalescingTransport(upstream, name="test")
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            first = asyncio.ensure_future(client.get("http://upstream/a"))
+            second = asyncio.ensure_future(client.get("http://upstream/a"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            assert (await second).text == "http://upstream/a"
+            assert len(upstream.requests) == 1
+
+    asyncio.run(run())
+
+
+class ScriptedTransport(httpx.AsyncBaseTransport):
+    """Answer the n-th request after the n-th delay of the list"""
+
+    def __init__(self, delays):
+        self.delays = iter(delays)
+        self.count = 0
+        self.responses = []
+
+    async def handle_async_request(self, request):
+        self.count += 1
+        attempt = self.count
+        await asyncio.sleep(next(self.delays))
+        response = httpx.Response(200, content=str(attempt).encode())
+        self.responses.append(response)
+        return response
+
+
+def warm_hedging_transport(upstream, **kwargs):
+    transport = HedgingTransport(upstream, name="test", **kwargs)
+    transport.MIN_SAMPLES = 10
+    for _ in range(10):
+        transport.record_latency(0.01)
+    return transport
+
+
+def test_hedging_transport():
+    # The primary request is slow, the hedge answers first
+    upstream = ScriptedTransport([0.5, 0.01, 0.001])
+    transport = warm_hedging_transport(upstream, budget=1)
+    assert transport.delay == 0.01
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            assert (await client.get("http://upstream/")).text == "2"
+            assert upstream.count == 2
+
+            # Fast responses are not hedged
+            assert (await client.get("http://upstream/")).text == "3"
+            assert upstream.count == 3
+
+    asyncio.run(run())
+
+
+def test_hedging_transport_budget():
+    upstream = ScriptedTransport([0.05, 0.05, 0.001])
+    transport = warm_hedging_transport(upstream, budget=0.5)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            # The budget allows one hedge every two requests
+            assert (await client.get("http://upstream/")).text == "1"
+            assert upstream.count == 1
+            assert (await client.get("http://upstream/")).text == "3"
+            assert upstream.count == 3
+
+    asyncio.run(run())
+
+
+def test_hedging_transport_records_primary_latency():
+    upstream = ScriptedTransport([0.1, 0.001])
+    transport = warm_hedging_transport(upstream, budget=1)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            assert (await client.get("http://upstream/")).text == "2"
+            assert len(transport.latencies) == 10
+
+            # The latency of the primary request is recorded, not the hedge's
+            await asyncio.sleep(0.15)
+            assert len(transport.latencies) == 11
+            assert transport.latencies[-1] >= 0.1
+
+    asyncio.run(run())
+
+
+def test_hedging_transport_closes_losing_request():
+    # The primary request answers first, while the hedge is still running
+    upstream = ScriptedTransport([0.03, 0.05])
+    transport = warm_hedging_transport(upstream, budget=1)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            assert (await client.get("http://upstream/")).text == "1"
+            assert upstream.count == 2
+
+            # The hedge is not cancelled, its response is closed once received
+            await asyncio.sleep(0.1)
+            assert len(upstream.responses) == 2
+            assert upstream.responses[1].is_closed
+
+    asyncio.run(run())
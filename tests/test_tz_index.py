@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from idunn.utils.tz_index import TimezoneFinder, build_tz_index
+
+# Around the borders of France, Switzerland and Italy, including some sea
+BBOX = (4, 43, 10, 48)
+
+
+@pytest.fixture(scope="module")
+def tz_index(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tz_index")
+    build_tz_index(str(path), BBOX)
+    return TimezoneFinder(str(path))
+
+
+@pytest.fixture(scope="module")
+def tzwhere():
+    return TimezoneFinder("/nonexistent").get_tzwhere()
+
+
+@pytest.mark.parametrize(
+    "lat,lon,expected",
+    [
+        (45.764, 4.835, "Europe/Paris"),
+        (46.204, 6.143, "Europe/Zurich"),
+        (45.070, 7.687, "Europe/Rome"),
+        (43.703, 7.266, "Europe/Paris"),
+        (43.5, 8.5, "Europe/Rome"),
+    ],
+)
+def test_tz_index_lookup(tz_index, lat, lon, expected):
+    assert tz_index.index is not None
+    assert tz_index.tz_name_at(lat, lon) == expected
+
+
+def test_tz_index_matches_tzwhere(tz_index, tzwhere):
+    rnd = random.Random(0)
+    for _ in range(1000):
+        lat = rnd.uniform(BBOX[1], BBOX[3])
+        lon = rnd.uniform(BBOX[0], BBOX[2])
+        if tzwhere.tzNameAt(lat, lon) is None:
+            # Points at sea are matched to the closest timezone from the
+            # center of their cell only
+            continue
+        assert tz_index.tz_name_at(lat, lon) == tzwhere.tzNameAt(lat, lon, forceTZ=True)